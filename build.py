@@ -4,7 +4,8 @@
 Orchestrates the full build pipeline:
   0. Validate environment (reacher package + its bundled firmware hex)
   1. Build React frontend (npm ci && npm run build)
-  2. Validate required assets exist
+  2. Validate required assets exist (parses every firmware hex, checks record
+     checksums and flash size, writes the hex manifest)
   3. Run PyInstaller with labrynth.spec
   4. Report output location
 
@@ -20,6 +21,7 @@ Usage:
   python build.py --avrdude /usr/bin/avrdude  # explicit avrdude path
   python build.py --cli                    # build GUI + LabrynthCLI console app
   python build.py --cli-only               # build only LabrynthCLI (no frontend)
+  python build.py --check-hex              # only validate firmware hex + write the manifest
 
 Requires: Python 3.10+, Node.js, npm, PyInstaller (pip install pyinstaller),
 and the reacher package installed (pip install reacher2p or -e ../reacher).
@@ -28,6 +30,7 @@ Building the CLI also requires the ``[cli]`` extras: pip install -e ".[cli]".
 
 import argparse
 import hashlib
+import json
 import os
 import platform
 import shutil
@@ -50,6 +53,15 @@ SPEC_FILE_CLI = os.path.join(SCRIPT_DIR, "labrynth-cli.spec")
 PARADIGMS = ("fr", "pr", "vi", "omission", "pavlovian")
 BOARDS = ("uno", "mega")
 
+# Application flash per board: total flash minus the bootloader section
+# (Uno: 32 KiB - 512 B optiboot; Mega 2560: 256 KiB - 8 KiB stk500v2).
+FLASH_LIMITS = {"uno": 32256, "mega": 253952}
+
+# Sizes and hashes of every bundled hex, written by validate_assets and shipped
+# next to the hex files so the CLI can check an upload without re-hashing it.
+HEX_MANIFEST_NAME = "hex-manifest.json"
+HEX_MANIFEST = os.path.join(PROJECT_ROOT, ".hex-manifest", HEX_MANIFEST_NAME)
+
 
 def resolve_reacher_hex_dir():
     """Return the firmware hex directory shipped inside the installed reacher package.
@@ -164,6 +176,112 @@ def _sha256_file(path):
     return h.hexdigest()
 
 
+class HexFormatError(ValueError):
+    """An Intel HEX file is malformed (bad record, checksum or missing EOF)."""
+
+
+def parse_intel_hex(path):
+    """Stream-parse an Intel HEX file, verifying every record.
+
+    Checks each line's start code, length and checksum, and that the file ends
+    with exactly one EOF record. Data addresses honour extended segment (02)
+    and extended linear (04) address records. Returns a dict with the file's
+    ``size`` and ``sha256``, the number of ``records``, the ``data_bytes``
+    they carry and the ``flash_bytes`` footprint (highest address written + 1).
+    Raises :class:`HexFormatError` naming the offending line.
+    """
+    h = hashlib.sha256()
+    size = records = data_bytes = top = base = 0
+    seen_eof = False
+    with open(path, "rb") as fh:
+        for lineno, raw in enumerate(fh, 1):
+            h.update(raw)
+            size += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            if seen_eof:
+                raise HexFormatError(f"{path}:{lineno}: data after EOF record")
+            if line[:1] != b":":
+                raise HexFormatError(f"{path}:{lineno}: missing ':' start code")
+            if len(line) % 2 == 0:
+                raise HexFormatError(f"{path}:{lineno}: odd number of hex digits (truncated?)")
+            try:
+                rec = bytes.fromhex(line[1:].decode("ascii"))
+            except (UnicodeDecodeError, ValueError):
+                raise HexFormatError(f"{path}:{lineno}: not hexadecimal") from None
+            if len(rec) < 5 or len(rec) != rec[0] + 5:
+                raise HexFormatError(f"{path}:{lineno}: record length mismatch (truncated?)")
+            if sum(rec) & 0xFF:
+                raise HexFormatError(f"{path}:{lineno}: checksum mismatch")
+            count, rtype, payload = rec[0], rec[3], rec[4:-1]
+            records += 1
+            if rtype == 0x00:
+                end = base + ((rec[1] << 8) | rec[2]) + count
+                top = max(top, end)
+                data_bytes += count
+            elif rtype == 0x01:
+                seen_eof = True
+            elif rtype == 0x02 and count == 2:
+                base = int.from_bytes(payload, "big") << 4
+            elif rtype == 0x04 and count == 2:
+                base = int.from_bytes(payload, "big") << 16
+            elif rtype in (0x03, 0x05) and count == 4:
+                pass  # start address; irrelevant to flash size
+            else:
+                raise HexFormatError(f"{path}:{lineno}: bad record type {rtype:02X}/length {count}")
+    if not seen_eof:
+        raise HexFormatError(f"{path}: no EOF record (truncated?)")
+    return {"size": size, "sha256": h.hexdigest(), "records": records,
+            "data_bytes": data_bytes, "flash_bytes": top}
+
+
+def validate_hex(hex_dir):
+    """Parse every ``<board>/<paradigm>.hex`` under *hex_dir* and check it fits.
+
+    Prints one line per board and returns ``(ok, manifest)``; *ok* is False
+    when any file is malformed or larger than its board's application flash.
+    """
+    ok = True
+    manifest = {"version": 1, "boards": {}}
+    for board in BOARDS:
+        board_dir = os.path.join(hex_dir, board)
+        limit = FLASH_LIMITS[board]
+        entries = {}
+        for paradigm in PARADIGMS:
+            path = os.path.join(board_dir, f"{paradigm}.hex")
+            if not os.path.isfile(path):
+                continue
+            try:
+                info = parse_intel_hex(path)
+            except (HexFormatError, OSError) as exc:
+                print(f"  [BAD] {exc}")
+                ok = False
+                continue
+            if info["flash_bytes"] > limit:
+                print(f"  [BAD] {board}/{paradigm}.hex needs {info['flash_bytes']:,} B of flash "
+                      f"(limit {limit:,} B)")
+                ok = False
+                continue
+            entries[paradigm] = {**info, "flash_limit": limit}
+        if entries:
+            usage = ", ".join(f"{p} {e['flash_bytes'] * 100 // limit}%" for p, e in entries.items())
+            print(f"  [OK] Hex files ({board}): {usage} of {limit:,} B")
+            manifest["boards"][board] = entries
+        else:
+            print(f"  [WARN] No hex files found for {board} in {board_dir}")
+    return ok, manifest
+
+
+def write_hex_manifest(manifest, path=HEX_MANIFEST):
+    """Write the manifest the spec files bundle as ``hex/hex-manifest.json``."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    print(f"  [OK] Hex manifest: {path}")
+
+
 def _safe_extract(zf, dest):
     """Extract a ZipFile to dest, rejecting members that escape dest (zip-slip).
 
@@ -291,14 +409,10 @@ def validate_assets(avrdude_path, require_frontend=True):
         print("  [MISSING] reacher package firmware hex (reacher/hex/)")
         ok = False
     else:
-        for board in BOARDS:
-            board_dir = os.path.join(hex_dir, board)
-            board_hex = [p for p in PARADIGMS
-                         if os.path.isfile(os.path.join(board_dir, f"{p}.hex"))]
-            if board_hex:
-                print(f"  [OK] Hex files ({board}): {', '.join(board_hex)}")
-            else:
-                print(f"  [WARN] No hex files found for {board} in {board_dir}")
+        hex_ok, manifest = validate_hex(hex_dir)
+        if hex_ok:
+            write_hex_manifest(manifest)
+        ok = ok and hex_ok
 
     # avrdude — ensure we have a real binary, not a Chocolatey shim
     if avrdude_path and os.path.isfile(avrdude_path):
@@ -403,8 +517,25 @@ def main():
         action="store_true",
         help="Build only LabrynthCLI (no frontend, no GUI bundle)",
     )
+    parser.add_argument(
+        "--check-hex",
+        action="store_true",
+        help="Only validate the reacher package's firmware hex and write the manifest",
+    )
     args = parser.parse_args()
 
+    if args.check_hex:
+        hex_dir = resolve_reacher_hex_dir()
+        if not hex_dir:
+            print("ERROR: reacher package ships no firmware hex (reacher/hex/).")
+            sys.exit(1)
+        print(f"Firmware hex: {hex_dir}")
+        hex_ok, manifest = validate_hex(hex_dir)
+        if not hex_ok:
+            sys.exit(1)
+        write_hex_manifest(manifest)
+        return
+
     print("Labrynth Build Orchestrator")
     print(f"  Platform: {platform.system()} {platform.machine()}")
     print(f"  Python:   {sys.version.split()[0]}")
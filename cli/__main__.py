@@ -4,19 +4,26 @@ Usage:
     python -m cli                  # auto-start backend + CLI
     python -m cli --no-server      # CLI only (backend must be running)
     python -m cli --port 6229      # custom backend port
+    python -m cli --http2          # multiplex requests over HTTP/2 (needs h2)
+    python -m cli --ws-window-bits 10  # smaller deflate window for a Pi backend
+    python -m cli --wire json      # never negotiate MessagePack/CBOR
+    python -m cli run session.toml # headless: run one session from a config file
+    python -m cli cmd <sid> 104    # one-shot: send a command and exit (also: sessions,
+                                   # start, stop, export, status; see cli/commands.py)
+    python -m cli --hosts rigs.toml fleet   # every host's health and sessions
+    python -m cli --host a=10.0.0.11:6229 --host b=10.0.0.12:6229   # TUI + fleet view
 """
 
 from __future__ import annotations
 
 import argparse
-import asyncio
-import atexit
 import os
 import socket
-import subprocess
 import sys
 import time
 
+from .commands import ONE_SHOT, add_parsers
+
 
 def _run_backend() -> None:
     """Run the reacher backend in-process.
@@ -64,11 +71,90 @@ def main() -> None:
         action="store_true",
         help="Don't auto-start the backend server",
     )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=20,
+        help="Max pooled HTTP connections per backend host (default: 20)",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 to the backend when the h2 package is installed",
+    )
+    parser.add_argument(
+        "--wire",
+        choices=("auto", "json", "msgpack", "cbor"),
+        default="auto",
+        help="Wire encoding to request from the backend (default: auto — best installed)",
+    )
+    parser.add_argument(
+        "--preload-firmware",
+        action="store_true",
+        help="Read and hash every local firmware hex in the background at startup",
+    )
+    parser.add_argument(
+        "--no-ws-mux",
+        action="store_true",
+        help="Open one WebSocket per session instead of one shared socket per backend",
+    )
+    parser.add_argument(
+        "--ws-compression",
+        choices=("deflate", "off"),
+        default="deflate",
+        help="permessage-deflate on event WebSockets (default: deflate)",
+    )
+    parser.add_argument(
+        "--ws-window-bits",
+        type=int,
+        choices=range(9, 16),
+        metavar="9-15",
+        default=None,
+        help="Deflate window size in bits; smaller uses less memory on the backend (default: 12)",
+    )
+    parser.add_argument(
+        "--monitor-retention",
+        action="append",
+        metavar="KIND=N",
+        help="Monitor lines kept per session for KIND (event, info, error; "
+             "default: event=200, info=50, error=50); repeatable",
+    )
+    parser.add_argument(
+        "--hosts",
+        metavar="FILE",
+        default=None,
+        help="TOML file listing REACHER hosts and their API keys (see cli/fleet.py)",
+    )
+    parser.add_argument(
+        "--host",
+        action="append",
+        metavar="[NAME=]URL",
+        help="Add a REACHER host to the fleet (repeatable)",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    run_p = sub.add_parser(
+        "run",
+        help="Run one session headlessly from a TOML config (see cli/headless.py)",
+    )
+    run_p.add_argument("config", help="Path to the session config (.toml)")
+    run_p.add_argument(
+        "--log-format",
+        choices=("json", "text"),
+        default="json",
+        help="Log line format on stderr (default: json)",
+    )
+    add_parsers(sub)
     args = parser.parse_args()
 
     server_proc = None
+    # One-shot subcommands talk to a backend that is already up; starting one
+    # would cost seconds for a call meant to take milliseconds.
+    autostart = not args.no_server and args.command not in ONE_SHOT
+
+    if autostart and not _is_running(args.port):
+        import atexit
+        import subprocess
 
-    if not args.no_server and not _is_running(args.port):
         print(f"Starting REACHER backend on port {args.port}...")
 
         env = os.environ.copy()
@@ -102,15 +188,49 @@ def main() -> None:
             print("ERROR: Backend failed to start. Is `reacher` installed?", file=sys.stderr)
             sys.exit(1)
         print("Backend ready.")
-    elif not args.no_server:
+    elif autostart:
         print(f"Backend already running on port {args.port}.")
 
-    from .app import ReacherCLI
-    from .client import ReacherClient
+    from .transport import HTTP2_AVAILABLE, TransportConfig, configure
+
+    if args.http2 and not HTTP2_AVAILABLE:
+        print("HTTP/2 requested but `h2` is not installed; using HTTP/1.1.", file=sys.stderr)
+    configure(TransportConfig(
+        max_connections=args.max_connections,
+        max_keepalive_connections=min(10, args.max_connections),
+        http2=args.http2,
+        ws_compression=args.ws_compression == "deflate",
+        ws_window_bits=args.ws_window_bits,
+    ))
 
     base = f"http://localhost:{args.port}"
-    app = ReacherCLI(port=args.port)
-    app.api = ReacherClient(base_url=base)
+    if args.command in ONE_SHOT:
+        from .commands import run
+
+        sys.exit(run(args, base))
+
+    import asyncio
+
+    if args.command == "run":
+        from .headless import run_headless
+
+        sys.exit(asyncio.run(run_headless(args.config, base, args.log_format, wire=args.wire)))
+
+    from .app import ReacherCLI
+    from .client import ReacherClient
+    from .fleet import open_fleet
+
+    from .history import parse_retention
+
+    try:
+        retention = parse_retention(args.monitor_retention)
+        api = ReacherClient(base_url=base, wire=args.wire)
+        fleet = open_fleet(args, base, local=api)
+    except ValueError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(2)
+    app = ReacherCLI(port=args.port, api=api, preload_firmware=args.preload_firmware, fleet=fleet,
+                     ws_mux=not args.no_ws_mux, monitor_retention=retention)
     asyncio.run(app.run_async())
 
 
@@ -8,7 +8,9 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import time
+from contextlib import aclosing
 from dataclasses import dataclass, field
 from typing import Callable
 
@@ -20,7 +22,24 @@ from prompt_toolkit.layout import HSplit, Layout, Window
 from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
 from prompt_toolkit.styles import Style
 
-from .client import ReacherClient
+from . import codec
+from .client import DownloadUnsupported, ReacherClient
+from .broadcast import BroadcastTarget, broadcast
+from .firmware import BOARDS, DEFAULT_PARADIGMS, default_cache
+from .flash import FlashResult, FlashTarget, FleetFlasher
+from .fleet import Fleet, FleetSnapshot, Host, format_dashboard
+from .metrics import Histogram, format_ms, percentiles_line
+from .history import MonitorHistory
+from .mux import MuxUnsupported, SessionMux
+from .presets import (
+    DEFAULT_COMMAND_LATENCY,
+    PARADIGM_SETTING_CODES,
+    PRESET_COMMAND_MAP,
+    PRESETS,
+    CommandPlan,
+    compile_plan,
+)
+from .scheduler import CommandScheduler, CommandSuperseded
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Helpers
@@ -136,14 +155,6 @@ DEVICE_CONFIGS: list[dict] = [
     },
 ]
 
-PARADIGM_SETTING_CODES = {
-    "ratio": 201,
-    "step": 205,
-    "vi_interval": 204,
-    "om_interval": 203,
-    "trace_interval": 220,
-}
-
 # Curated short labels for Pavlovian params. The param *list* is sourced
 # dynamically from reacher's registry (see _pavlovian_menu); this map only
 # supplies nicer labels than the registry's verbose `description`. A code missing
@@ -178,87 +189,20 @@ ITI_DEFAULTS = {216: 30000, 217: 10000, 218: 90000}
 # Mirrors PULSE_CODES in web/src/components/program/pavLabels.ts.
 PULSE_CODES = (374, 375, 384, 385)
 
-PRESET_COMMAND_MAP: dict[str, dict] = {
-    "rh-lever": {"arm": 1001, "disarm": 1000, "params": {"timeout": 1074, "ratio": 1075}},
-    "lh-lever": {"arm": 1301, "disarm": 1300, "params": {"timeout": 1374, "ratio": 1375}},
-    "primary-cue": {"arm": 301, "disarm": 300, "params": {"frequency": 371, "duration": 372}},
-    "secondary-cue": {"arm": 311, "disarm": 310, "params": {"frequency": 381, "duration": 382}},
-    "primary-pump": {"arm": 401, "disarm": 400, "params": {"duration": 472}},
-    "secondary-pump": {"arm": 411, "disarm": 410, "params": {"duration": 482}},
-    "laser": {"arm": 601, "disarm": 600, "params": {"frequency": 671, "duration": 672}},
-    "lick-circuit": {"arm": 501, "disarm": 500, "params": {}},
-    "microscope": {"arm": 901, "disarm": 900, "params": {}},
-}
-
-PRESETS: dict[str, dict] = {
-    "sa-high": {
-        "name": "SA High",
-        "paradigm": "fr",
-        "hardware": {
-            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
-            "secondary-cue": {"armed": False},
-            "primary-pump": {"armed": True, "duration": 2000},
-            "secondary-pump": {"armed": False},
-            "laser": {"armed": False, "frequency": 40, "duration": 5000},
-            "lick-circuit": {"armed": False},
-            "microscope": {"armed": False},
-        },
-        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
-        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 10, "delay": 60},
-    },
-    "sa-mid": {
-        "name": "SA Mid",
-        "paradigm": "fr",
-        "hardware": {
-            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
-            "secondary-cue": {"armed": False},
-            "primary-pump": {"armed": True, "duration": 2000},
-            "secondary-pump": {"armed": False},
-            "laser": {"armed": False},
-            "lick-circuit": {"armed": False},
-            "microscope": {"armed": False},
-        },
-        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
-        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 20, "delay": 60},
-    },
-    "sa-low": {
-        "name": "SA Low",
-        "paradigm": "fr",
-        "hardware": {
-            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
-            "secondary-cue": {"armed": False},
-            "primary-pump": {"armed": True, "duration": 2000},
-            "secondary-pump": {"armed": False},
-            "laser": {"armed": False},
-            "lick-circuit": {"armed": False},
-            "microscope": {"armed": False},
-        },
-        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
-        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 40, "delay": 60},
-    },
-    "sa-extinction": {
-        "name": "SA Extinction",
-        "paradigm": "fr",
-        "hardware": {
-            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
-            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
-            "secondary-cue": {"armed": False},
-            "primary-pump": {"armed": False},
-            "secondary-pump": {"armed": False},
-            "laser": {"armed": False},
-            "lick-circuit": {"armed": False},
-            "microscope": {"armed": False},
-        },
-        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
-        "limits": {"type": "Time", "time_limit": 3600, "infusion_limit": 30, "delay": 60},
-    },
+# Firmware device names (the `device` field of config entries) → DEVICE_CONFIGS ids.
+# Mirrors DEVICE_TO_UI_KEY in web/src/hooks/useSessionWebSockets.ts.
+FIRMWARE_DEVICE_IDS = {
+    "LEVER_RH": "rh-lever",
+    "LEVER_LH": "lh-lever",
+    "CUE": "primary-cue",
+    "CUE2": "secondary-cue",
+    "PUMP": "primary-pump",
+    "PUMP_1": "primary-pump",
+    "PUMP2": "secondary-pump",
+    "LASER": "laser",
+    "LICK": "lick-circuit",
+    "LICK_CIRCUIT": "lick-circuit",
+    "MICROSCOPE": "microscope",
 }
 
 SYSTEM_COMMANDS = {"test_chain": 103, "test_mode": 104}
@@ -269,10 +213,45 @@ LIMIT_TYPES_PAVLOVIAN = ["Trials", "Infusion"]
 DEVICE_BY_ID = {d["id"]: d for d in DEVICE_CONFIGS}
 
 
+def _command_labels() -> dict[int, str]:
+    """Human-readable names for command codes, for the Diagnostics menu."""
+    labels = {code: f"System: {key.replace('_', ' ')}" for key, code in SYSTEM_COMMANDS.items()}
+    for cfg in DEVICE_CONFIGS:
+        for kind in ("arm", "disarm", "test"):
+            if cfg.get(kind) is not None:
+                labels[cfg[kind]] = f"{cfg['label']} {kind}"
+        for p in cfg.get("params", []):
+            labels[p["code"]] = f"{cfg['label']} {p['label']}"
+        for role, code in (cfg.get("role") or {}).items():
+            labels[code] = f"{cfg['label']} {role}"
+    for key, code in PARADIGM_SETTING_CODES.items():
+        labels.setdefault(code, f"Paradigm {key}")
+    return labels
+
+
+COMMAND_LABELS = _command_labels()
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Session state
 # ═══════════════════════════════════════════════════════════════════════════
 
+# Seconds between fleet dashboard refreshes.
+FLEET_REFRESH = 5.0
+
+# Uploads at once for Session → Flash All Sessions (one host, one USB hub).
+FLASH_PARALLEL = 4
+
+# Backend log levels that go to the monitor's error ring.
+_ERROR_LEVELS = frozenset({"error", "critical", "fatal", "exception"})
+
+
+def _is_error_level(level) -> bool:
+    """Whether a backend log ``level`` (a name, or a ``logging`` number) is ERROR or worse."""
+    if isinstance(level, int):
+        return level >= 40  # logging.ERROR
+    return str(level).lower() in _ERROR_LEVELS
+
 
 @dataclass
 class SessionState:
@@ -308,6 +287,50 @@ class SessionState:
     backend_event_count: int = 0
     # Pavlovian command specs sourced from reacher's registry (get_commands_for_paradigm)
     pav_commands: list[dict] = field(default_factory=list)
+    # Last-known board config: {command code: value}. Seeded once from
+    # get_config, kept current by WS "config" messages and acknowledged writes;
+    # together with `armed` it lets presets/setters send only what changes.
+    device_values: dict[int, int] = field(default_factory=dict)
+    device_config_seeded: bool = False
+    limits_applied: dict | None = None  # last limit payload the backend acknowledged
+    last_export: str | None = None  # backend-side path of the most recent export
+    last_export_at: float | None = None
+    last_export_events: int = 0  # backend_event_count when it was taken
+    # Live stream (see ReacherCLI._stream_events)
+    # Bounded per line class (see cli/history.py), so memory stays flat however
+    # long the session streams in the background.
+    monitor_lines: MonitorHistory = field(default_factory=MonitorHistory, repr=False)
+    ws_task: asyncio.Task | None = field(default=None, repr=False)
+    ws_connected: bool = False
+    last_event_at: float | None = None
+    marked: bool = False  # picked for broadcast operations (Space in the split view)
+    wire_stats: codec.WireStats = field(default_factory=codec.WireStats, repr=False)  # own socket only
+
+    def ingest_device_config(self, entry: dict) -> None:
+        """Fold one firmware config entry (``{"device": "CUE", "armed": ...}``) into the cache."""
+        armed = entry.get("armed")
+        if isinstance(armed, dict):  # legacy {device_id: bool} shape
+            self.armed.update(armed)
+            return
+        dev_id = FIRMWARE_DEVICE_IDS.get(str(entry.get("device", "")).upper())
+        if dev_id is None:
+            return
+        if isinstance(armed, bool):
+            self.armed[dev_id] = armed
+        for key, code in PRESET_COMMAND_MAP[dev_id]["params"].items():
+            val = entry.get(key)
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                self.device_values[code] = int(val)
+
+    def record_ack(self, code: int, value: int | None) -> None:
+        if value is not None:
+            self.device_values[code] = value
+
+    def forget_device_config(self) -> None:
+        """Drop cached board state (after a reflash/reset/reconnect it can't be trusted)."""
+        self.armed.clear()
+        self.device_values.clear()
+        self.device_config_seeded = False
 
     @property
     def elapsed(self) -> float:
@@ -393,11 +416,37 @@ CLI_STYLE = Style.from_dict({
 
 
 class ReacherCLI:
-    def __init__(self, port: int = 6229):
-        self.api = ReacherClient(base_url=f"http://localhost:{port}")
+    def __init__(
+        self,
+        port: int = 6229,
+        api: ReacherClient | None = None,
+        preload_firmware: bool = False,
+        fleet: Fleet | None = None,
+        ws_mux: bool = True,
+        monitor_retention: dict[str, int] | None = None,
+    ):
+        self.api = api or ReacherClient(base_url=f"http://localhost:{port}")
         self.port = port
-        self.session: SessionState | None = None
-        self.mode: str = "menu"  # "menu" | "input" | "monitor" | "select"
+        # Every backend this CLI can see; just this one unless --host/--hosts
+        # were given.
+        self.fleet = fleet or Fleet([Host("local", self.api.base_url)], clients={"local": self.api})
+        self.fleet_snapshot: FleetSnapshot | None = None
+        # Local hex images, read and hashed off the event loop.
+        self.hex_cache = default_cache()
+        self.preload_firmware = preload_firmware
+        # Interactive hardware writes are rate-limited and coalesced; disarms
+        # (and program stop/pause) take the priority lane.
+        self.scheduler = CommandScheduler(
+            self.api,
+            priority_codes=[cfg["disarm"] for cfg in DEVICE_CONFIGS],
+            supersedes={cfg["disarm"]: (cfg["arm"],) for cfg in DEVICE_CONFIGS},
+        )
+        # Session registry: every session this CLI created or attached, in
+        # insertion order. Menus act on the active one; the split monitor
+        # shows all of them.
+        self.sessions: dict[str, SessionState] = {}
+        self.active_sid: str | None = None
+        self.mode: str = "menu"  # "menu" | "input" | "monitor" | "split" | "fleet" | "select"
         self.status_message: str = ""
         self.status_is_error: bool = False
 
@@ -412,9 +461,15 @@ class ReacherCLI:
         self.select_index: int = 0
         self.select_callback: Callable | None = None
 
-        # Monitor mode state
-        self.monitor_lines: list[tuple[str, str]] = []  # (style, text)
-        self._ws_task: asyncio.Task | None = None
+        # Monitor mode state (lines and streams live on each SessionState)
+        self.split_index: int = 0
+        self._refresh_task: asyncio.Task | None = None
+        # Sessions share one multiplexed WebSocket unless it is disabled or the
+        # backend turns out not to have one (then: a socket per session).
+        self.ws_mux = ws_mux
+        self.monitor_retention = monitor_retention
+        self._mux: SessionMux | None = None
+        self._mux_task: asyncio.Task | None = None
 
         # Menu
         self.menu: MenuState = self._main_menu()
@@ -422,6 +477,102 @@ class ReacherCLI:
         # prompt_toolkit app (set up in run_async)
         self.app: Application | None = None
 
+    # ───────────────────────────────────────────────────────────────────
+    # Session registry
+    # ───────────────────────────────────────────────────────────────────
+
+    @property
+    def session(self) -> SessionState | None:
+        """The active session (the one menus act on)."""
+        return self.sessions.get(self.active_sid) if self.active_sid else None
+
+    @session.setter
+    def session(self, s: SessionState | None) -> None:
+        # Assigning registers and activates *s*; assigning None drops the
+        # active session (stopping its stream) and activates the next one.
+        if s is None:
+            old = self.sessions.pop(self.active_sid, None) if self.active_sid else None
+            if old is not None:
+                self._stop_stream(old)
+            self.active_sid = next(iter(self.sessions), None)
+            return
+        if self.monitor_retention and s.monitor_lines.retention != self.monitor_retention:
+            s.monitor_lines.resize(self.monitor_retention)
+        self.sessions[s.id] = s
+        self.active_sid = s.id
+
+    def _activate(self, sid: str) -> None:
+        if sid not in self.sessions:
+            return
+        self.active_sid = sid
+        if self.mode == "monitor":
+            self._ensure_stream(self.sessions[sid])
+        else:
+            self._rebuild_current_menu()
+        self._invalidate()
+
+    def _cycle_session(self, delta: int) -> None:
+        ids = list(self.sessions)
+        if len(ids) < 2:
+            return
+        idx = ids.index(self.active_sid) if self.active_sid in ids else 0
+        self._activate(ids[(idx + delta) % len(ids)])
+        self._set_status(f"Active session: {self._session_label(self.session)}")
+
+    @staticmethod
+    def _session_label(s: SessionState) -> str:
+        return f"{s.id[:8]} {s.name or s.port}".rstrip()
+
+    async def _switch_session(self) -> None:
+        if not self.sessions:
+            self._set_status("No sessions — create or attach one first", error=True)
+            return
+        options = [
+            (f"{'*' if sid == self.active_sid else ' '} {self._session_label(s)}  [{s.state}]", sid)
+            for sid, s in self.sessions.items()
+        ]
+        self._prompt_select("Switch to session:", options, self._on_session_switched)
+
+    async def _on_session_switched(self, sid: str) -> None:
+        self._activate(sid)
+        self._set_status(f"Active session: {self._session_label(self.session)}")
+
+    async def _attach_session(self) -> None:
+        """Pick a session that already exists on the backend and add it to the registry."""
+        try:
+            resp = await self.api.list_sessions()
+        except Exception as exc:
+            self._set_status(f"Could not list sessions: {exc}", error=True)
+            return
+        entries = resp.get("sessions", []) if isinstance(resp, dict) else resp or []
+        options = []
+        for e in entries:
+            sid = str(e.get("session_id") or e.get("id") or "")
+            if not sid or sid in self.sessions:
+                continue
+            state = e.get("state") or e.get("status") or "-"
+            options.append((f"{sid[:8]}  {e.get('port') or '-'}  [{state}]", sid))
+        if not options:
+            self._set_status("No other sessions on the backend")
+            return
+        by_id = {str(e.get("session_id") or e.get("id")): e for e in entries}
+
+        async def _attach(sid: str) -> None:
+            e = by_id.get(sid, {})
+            s = SessionState(id=sid, port=e.get("port") or "", paradigm=e.get("paradigm"),
+                             state=e.get("state") or e.get("status") or "idle")
+            try:
+                # Count what is already recorded so the stream's reconnect
+                # recovery starts from the right place.
+                s.backend_event_count = await self.api.behavior_count(sid)
+            except Exception:
+                pass
+            self.session = s
+            self._set_status(f"Attached session {sid[:8]} ({len(self.sessions)} open)")
+            self._rebuild_current_menu()
+
+        self._prompt_select("Attach backend session:", options, _attach)
+
     # ───────────────────────────────────────────────────────────────────
     # Rendering
     # ───────────────────────────────────────────────────────────────────
@@ -434,10 +585,18 @@ class ReacherCLI:
         style = "class:header-status" if self.session else "class:header-disconnected"
         lines.append(("class:header", "REACHER CLI v2.0.0  "))
         lines.append((style, status))
+        if self.session:
+            n = len(self.sessions)
+            lines.append(("class:item-suffix", f"  {self._session_label(self.session)}"
+                          + (f"  (1 of {n}, [Tab] next)" if n > 1 else "")))
         lines.append(("", "\n"))
 
         if self.mode == "monitor":
             self._render_monitor(lines)
+        elif self.mode == "split":
+            self._render_split(lines)
+        elif self.mode == "fleet":
+            self._render_fleet(lines)
         elif self.mode == "input":
             self._render_input(lines)
         elif self.mode == "select":
@@ -511,18 +670,66 @@ class ReacherCLI:
             prs = self.session.press_count
             st = self.session.state
             lines.append(("class:monitor-stats", f"  Infusions: {inf}  |  Presses: {prs}  |  State: {st}\n"))
+            wire, shared = self._wire_stats(self.session)
+            lines.append(("class:monitor-time",
+                          f"  Wire: {wire.summary()}{'  [shared socket]' if shared else ''}\n"))
+            evicted = self.session.monitor_lines.evicted_summary()
+            if evicted:
+                lines.append(("class:monitor-time", f"  Older lines dropped: {evicted}\n"))
             lines.append(("", "\n"))
 
         # Show last N lines (tail)
-        visible = self.monitor_lines[-30:]
-        for style, text in visible:
+        history = self.session.monitor_lines.tail(30) if self.session else ()
+        for style, text in history:
             lines.append((style, f"  {text}\n"))
 
-        if not visible:
+        if not history:
             lines.append(("class:separator", "  Waiting for events...\n"))
 
         lines.append(("", "\n"))
-        lines.append(("class:help-bar", "[Esc] Exit monitor\n"))
+        help_text = "[Tab] Next session  [Esc] Exit monitor" if len(self.sessions) > 1 else "[Esc] Exit monitor"
+        lines.append(("class:help-bar", help_text + "\n"))
+        self._render_status(lines)
+
+    def _render_split(self, lines: list[tuple[str, str]]) -> None:
+        """One line of counters per session — a cheap overview of many chambers."""
+        now = time.time()
+        lines.append(("class:separator", "\u2550" * 78 + "\n"))
+        lines.append(("class:monitor-header", f"Split Monitor — {len(self.sessions)} sessions\n"))
+        lines.append(("class:separator", "\u2500" * 78 + "\n"))
+        lines.append(("class:monitor-time",
+                      f"    {'Session':<22}{'State':<10}{'Elapsed':>9}{'Inf':>6}{'Press':>7}"
+                      f"{'Trials':>7}  {'WS':<5}{'Last':>6}\n"))
+        for i, s in enumerate(self.sessions.values()):
+            selected = i == self.split_index
+            last = "-" if s.last_event_at is None else f"{min(now - s.last_event_at, 9999):.0f}s"
+            ws = "live" if s.ws_connected else "down"
+            row = (f"{'>' if selected else ' '}{'*' if s.id == self.active_sid else ' '}"
+                   f"{'+' if s.marked else ' '}"
+                   f"{self._session_label(s)[:21]:<22}{s.state[:9]:<10}{s.elapsed_str:>9}"
+                   f"{s.infusion_count:>6}{s.press_count:>7}{s.trial_count:>7}  {ws:<5}{last:>6}")
+            lines.append(("class:item-selected" if selected else "class:monitor-stats", row + "\n"))
+
+        lines.append(("", "\n"))
+        lines.append(("class:help-bar",
+                      "[Up/Down] Select  [Space] Mark for broadcast  [Enter] Open monitor  [Esc] Back\n"))
+        self._render_status(lines)
+
+    def _render_fleet(self, lines: list[tuple[str, str]]) -> None:
+        lines.append(("class:separator", "\u2550" * 78 + "\n"))
+        lines.append(("class:monitor-header", f"Fleet — {len(self.fleet.hosts)} hosts\n"))
+        lines.append(("class:separator", "\u2500" * 78 + "\n"))
+        snap = self.fleet_snapshot
+        if snap is None:
+            lines.append(("class:separator", "  Querying hosts...\n"))
+        else:
+            age = time.time() - snap.taken_at
+            for text in format_dashboard(snap):
+                style = "class:status-bar-error" if " timeout " in text or " down " in text else "class:monitor-event"
+                lines.append((style, f"  {text}\n"))
+            lines.append(("class:monitor-time", f"\n  updated {age:.0f}s ago\n"))
+        lines.append(("", "\n"))
+        lines.append(("class:help-bar", "[Esc] Back\n"))
         self._render_status(lines)
 
     def _render_status(self, lines: list[tuple[str, str]]) -> None:
@@ -550,6 +757,7 @@ class ReacherCLI:
             MenuItem("Program", action=lambda: self._push_menu(self._program_menu())),
             MenuItem("Monitor", action=lambda: self._push_menu(self._monitor_menu())),
             MenuItem("Data", action=lambda: self._push_menu(self._data_menu())),
+            MenuItem("Diagnostics", action=lambda: self._push_menu(self._diagnostics_menu())),
             MenuItem("Quit", action=self._quit),
         ]
         return MenuState(title="Main Menu", items=items)
@@ -559,13 +767,21 @@ class ReacherCLI:
         state_suffix = f"[{s.state}]" if s else ""
         items = [
             MenuItem("Create New Session", action=self._create_session),
+            MenuItem("Switch Session", action=self._switch_session,
+                     suffix=f"[{len(self.sessions)} open]" if self.sessions else ""),
+            MenuItem("Attach Backend Session", action=self._attach_session),
             MenuItem("Connect", action=self._connect,
                      suffix="[connected]" if s and s.state == "connected" else ""),
             MenuItem("Disconnect", action=self._disconnect),
             MenuItem("Upload Firmware", action=self._upload_firmware),
+            MenuItem("Flash All Sessions", action=self._flash_all,
+                     suffix=f"[{len(self.sessions)}]" if len(self.sessions) > 1 else ""),
+            MenuItem("Resync Device Config", action=self._resync_device_config),
+            MenuItem("Refresh Backend Metadata", action=self._refresh_metadata),
             MenuItem("Reset Session", action=self._reset_session),
             MenuItem("Destroy Session", action=self._destroy_session),
             MenuItem("Session Info", action=self._show_session_info, suffix=state_suffix),
+            MenuItem("Connection Pool", action=self._show_pool_stats),
             MenuItem("Back", action=self._pop_menu),
         ]
         return MenuState(title="Session", items=items)
@@ -583,6 +799,9 @@ class ReacherCLI:
             ))
         items.append(MenuItem("\u2500\u2500\u2500\u2500 System \u2500\u2500\u2500\u2500", is_separator=True))
         items.append(MenuItem("Test Chain", action=self._test_chain))
+        depth = self.scheduler.stats(self.session.id).depth if self.session else 0
+        items.append(MenuItem("Command Queue", action=self._show_queue_stats,
+                              suffix=f"[{depth} queued]" if depth else ""))
         test_mode = self.session.test_mode if self.session else False
         items.append(MenuItem(
             "Test Mode Off" if test_mode else "Test Mode On",
@@ -661,9 +880,29 @@ class ReacherCLI:
         else:
             items.append(MenuItem("Start Session", action=self._start_program))
 
+        if len(self.sessions) > 1:
+            items.append(MenuItem("Broadcast", action=lambda: self._push_menu(self._broadcast_menu()),
+                                  suffix=f"[{len(self._broadcast_sessions())} sessions]"))
         items.append(MenuItem("Back", action=self._pop_menu))
         return MenuState(title="Program", items=items)
 
+    def _broadcast_menu(self) -> MenuState:
+        marked = sum(s.marked for s in self.sessions.values())
+        scope = f"{marked} marked" if marked else f"all {len(self.sessions)}"
+        items = [
+            MenuItem(f"──── Targets: {scope} (mark in Monitor → Split View) ────", is_separator=True),
+            MenuItem("Apply Preset", action=lambda: self._prompt_select(
+                "Apply which preset to every target?",
+                [(p["name"], k) for k, p in PRESETS.items()],
+                lambda k: self._run_broadcast("preset", lambda s: self._apply_plan_to(s, k)),
+            )),
+            MenuItem("Start Sessions", action=lambda: self._run_broadcast("start", self._start_one)),
+            MenuItem("Stop Sessions", action=lambda: self._confirm_broadcast("stop", self._stop_one)),
+            MenuItem("Reset Sessions", action=lambda: self._confirm_broadcast("reset", self._reset_one)),
+            MenuItem("Back", action=self._pop_menu),
+        ]
+        return MenuState(title="Program > Broadcast", items=items, selected=1)
+
     def _preset_menu(self) -> MenuState:
         items = []
         for key, preset in PRESETS.items():
@@ -671,6 +910,11 @@ class ReacherCLI:
                 preset["name"],
                 action=lambda k=key: self._apply_preset(k),
             ))
+        items.append(MenuItem("Dry Run", action=lambda: self._prompt_select(
+            "Dry run which preset?",
+            [(p["name"], k) for k, p in PRESETS.items()],
+            self._dry_run_preset,
+        )))
         items.append(MenuItem("Back", action=self._pop_menu))
         return MenuState(title="Program > Apply Preset", items=items)
 
@@ -804,6 +1048,10 @@ class ReacherCLI:
         items = [
             MenuItem("View Status", action=self._view_status),
             MenuItem("Live Stream", action=self._enter_monitor),
+            MenuItem("Split View (All Sessions)", action=self._enter_split,
+                     suffix=f"[{len(self.sessions)}]" if self.sessions else ""),
+            MenuItem("Fleet Dashboard", action=self._enter_fleet,
+                     suffix=f"[{len(self.fleet.hosts)} hosts]"),
             MenuItem("Back", action=self._pop_menu),
         ]
         return MenuState(title="Monitor", items=items)
@@ -817,11 +1065,98 @@ class ReacherCLI:
             MenuItem("Set Notes", action=lambda: self._prompt_input(
                 "Enter notes:", self._set_notes)),
             MenuItem("Export ZIP", action=self._export_zip),
+            MenuItem("Download ZIP", action=lambda: self._prompt_input(
+                "Save to local folder or file:", self._download_zip)),
             MenuItem("View Data Preview", action=self._view_data_preview),
             MenuItem("Back", action=self._pop_menu),
         ]
         return MenuState(title="Data", items=items)
 
+    def _diagnostics_menu(self) -> MenuState:
+        m = self.api.metrics
+        calls = sum(r.latency.count for r in m.routes.values())
+        items = [
+            MenuItem("Endpoint Latency", action=lambda: self._push_menu(self._endpoint_latency_menu()),
+                     suffix=f"[{calls} calls]" if calls else ""),
+            MenuItem("Command Latency", action=lambda: self._push_menu(self._command_latency_menu()),
+                     suffix=percentiles_line(m.command_latency) if m.command_latency.count else ""),
+            MenuItem("Connection Pool", action=self._show_pool_stats),
+            MenuItem("Command Queue", action=self._show_queue_stats),
+            MenuItem("Firmware Cache", action=lambda: self._set_status(
+                f"Firmware cache: {self.hex_cache.summary()}")),
+            MenuItem("WebSocket Streams", action=lambda: self._set_status(
+                f"WebSocket streams: {self._stream_summary()}")),
+            MenuItem("Dump to JSON", action=lambda: self._prompt_input(
+                "Write diagnostics JSON to:", self._dump_diagnostics)),
+            MenuItem("Reset Counters", action=self._reset_diagnostics),
+            MenuItem("Back", action=self._pop_menu),
+        ]
+        return MenuState(title="Diagnostics", items=items)
+
+    def _endpoint_latency_menu(self) -> MenuState:
+        items = []
+        routes = sorted(self.api.metrics.routes.items(), key=lambda kv: -kv[1].latency.count)
+        for route, stats in routes:
+            label = route.replace(" /api/", " ", 1)
+            items.append(MenuItem(
+                label, suffix=percentiles_line(stats.latency),
+                action=lambda r=route, st=stats: self._set_status(
+                    f"{r}: {st.latency.count} calls, {st.errors} errors  |  "
+                    f"mean {format_ms(st.latency.mean)} ms, max {format_ms(st.latency.max)} ms  |  "
+                    f"{st.bytes_out:,} B out, {st.bytes_in:,} B in"),
+            ))
+        if not items:
+            items.append(MenuItem("(no requests yet)", is_separator=True))
+        items.append(MenuItem("Back", action=self._pop_menu))
+        return MenuState(title="Endpoint Latency (ms)", items=items)
+
+    def _command_latency_menu(self) -> MenuState:
+        items = []
+        for code, h in sorted(self.api.metrics.commands.items()):
+            label = f"{code} {COMMAND_LABELS.get(code, '')}".rstrip()
+            items.append(MenuItem(label, suffix=percentiles_line(h),
+                                  action=lambda c=code, hh=h: self._show_histogram(str(c), hh)))
+        if not items:
+            items.append(MenuItem("(no commands yet)", is_separator=True))
+        items.append(MenuItem("Back", action=self._pop_menu))
+        return MenuState(title="Command Latency (ms)", items=items)
+
+    def _show_histogram(self, name: str, h: Histogram) -> None:
+        self._set_status(f"{name}: {h.count} sent  |  min {format_ms(h.min)} / "
+                         f"mean {format_ms(h.mean)} / max {format_ms(h.max)} ms")
+
+    async def _dump_diagnostics(self, path: str) -> None:
+        path = os.path.expanduser(path)
+        snap = {"client": self.api.metrics.snapshot()}
+        pool = self.api.pool_stats()
+        if pool is not None:
+            snap["pool"] = {"host": pool.host, "http2": pool.http2, "requests": pool.requests,
+                            "connections": pool.connections, "reuse_ratio": pool.reuse_ratio}
+        snap["retries"] = {"retries": self.api.retry_budget.retries,
+                           "budget_exhausted": self.api.retry_budget.exhausted}
+        links = [("shared", self._mux.wire_stats)] if self._mux is not None else []
+        links += [(s.id, s.wire_stats) for s in self.sessions.values() if s.wire_stats.messages]
+        snap["websocket"] = {name: {"wire_bytes": w.wire_bytes, "payload_bytes": w.payload_bytes,
+                                    "messages": w.messages, "compression": w.compression}
+                             for name, w in links}
+        if self.session:
+            q = self.scheduler.stats(self.session.id)
+            snap["queue"] = {"session": self.session.id, "dispatched": q.dispatched,
+                             "coalesced": q.coalesced, "priority": q.priority, "failed": q.failed,
+                             "wait_avg": q.wait_avg, "wait_max": q.wait_max}
+        try:
+            with open(path, "w") as f:
+                json.dump(snap, f, indent=2)
+        except OSError as exc:
+            self._set_status(f"Dump failed: {exc}", error=True)
+            return
+        self._set_status(f"Diagnostics written to {path}")
+
+    async def _reset_diagnostics(self) -> None:
+        self.api.metrics.reset()
+        self._set_status("Latency counters reset")
+        self._rebuild_current_menu()
+
     # ───────────────────────────────────────────────────────────────────
     # Menu navigation
     # ───────────────────────────────────────────────────────────────────
@@ -853,8 +1188,10 @@ class ReacherCLI:
             "Program > Paradigm Settings": self._paradigm_settings_menu,
             "Program > Pavlovian Settings": self._pavlovian_menu,
             "Program > Limits": self._limits_menu,
+            "Program > Broadcast": self._broadcast_menu,
             "Monitor": self._monitor_menu,
             "Data": self._data_menu,
+            "Diagnostics": self._diagnostics_menu,
         }
 
         builder = builders.get(title)
@@ -991,6 +1328,7 @@ class ReacherCLI:
             return
         try:
             await self.api.connect_serial(self.session.id)
+            self.session.forget_device_config()
             self.session.state = "connected"
             self._set_status("Serial connected")
             self._rebuild_current_menu()
@@ -1003,6 +1341,7 @@ class ReacherCLI:
             return
         try:
             await self.api.disconnect_serial(self.session.id)
+            self.session.forget_device_config()
             self.session.state = "idle"
             self._set_status("Serial disconnected")
             self._rebuild_current_menu()
@@ -1024,7 +1363,7 @@ class ReacherCLI:
             paradigms_resp = await self.api.list_paradigms(board)
             paradigms = paradigms_resp.get("paradigms", [])
         except Exception:
-            paradigms = ["fr", "pr", "vi", "omission", "pavlovian"]
+            paradigms = list(DEFAULT_PARADIGMS)
 
         self._prompt_select(
             "Select Paradigm",
@@ -1032,32 +1371,28 @@ class ReacherCLI:
             lambda p: self._finish_upload(board, p),
         )
 
-    def _read_local_hex(self, paradigm: str, board: str) -> str | None:
-        """Read a local hex file and return base64-encoded content, or None."""
-        import base64
-
-        try:
-            from reacher.uploader import FirmwareUploader
-
-            uploader = FirmwareUploader()
-            path = uploader.get_hex_path(paradigm, board)
-            with open(path, "rb") as f:
-                return base64.b64encode(f.read()).decode("ascii")
-        except Exception:
-            return None
-
     async def _finish_upload(self, board: str, paradigm: str) -> None:
         if not self.session:
             return
         try:
             self._set_status("Uploading firmware...")
             self.session.state = "uploading"
-            hex_data = self._read_local_hex(paradigm, board)
-            await self.api.upload_firmware(self.session.id, paradigm, board, hex_data=hex_data)
+            asset = await self.hex_cache.get(paradigm, board)
+            resp = await self.api.upload_firmware(
+                self.session.id, paradigm, board,
+                hex_data=asset.data if asset else None,
+                sha256=asset.sha256 if asset else None,
+            )
+            skipped = isinstance(resp, dict) and resp.get("skipped")
+            if not skipped:
+                self.session.forget_device_config()
             self.session.paradigm = paradigm
             self.session.board = board
             self.session.state = "connected"
-            self._set_status(f"Firmware uploaded: {paradigm} ({board})")
+            if skipped:
+                self._set_status(f"Firmware already current: {paradigm} ({board}) — flash skipped")
+            else:
+                self._set_status(f"Firmware uploaded: {paradigm} ({board})")
             if not self.session.name:
                 self.session.name = f"{paradigm.upper()} {self.session.port}"
             if paradigm.lower() == "pavlovian":
@@ -1067,35 +1402,154 @@ class ReacherCLI:
             self.session.state = "idle"
             self._set_status(f"Upload failed: {exc}", error=True)
 
+    async def _flash_all(self) -> None:
+        if not self.sessions:
+            self._set_status("No sessions — create or attach some first", error=True)
+            return
+        self._prompt_select(
+            f"Flash all {len(self.sessions)} sessions — select board",
+            [("Arduino Uno", "uno"), ("Arduino Mega", "mega")],
+            self._on_flash_all_board,
+        )
+
+    async def _on_flash_all_board(self, board: str) -> None:
+        try:
+            paradigms_resp = await self.api.list_paradigms(board)
+            paradigms = paradigms_resp.get("paradigms", [])
+        except Exception:
+            paradigms = list(DEFAULT_PARADIGMS)
+        self._prompt_select(
+            "Select Paradigm",
+            [("Each session's own", "")] + [(p, p) for p in paradigms],
+            lambda p: self._finish_flash_all(board, p),
+        )
+
+    async def _finish_flash_all(self, board: str, paradigm: str) -> None:
+        host = self._local_host()
+        targets, missing = [], []
+        for s in self.sessions.values():
+            p = paradigm or s.paradigm
+            if p:
+                targets.append(FlashTarget(host, p, board, sid=s.id))
+            else:
+                missing.append(s.id[:8])
+        if missing:
+            self._set_status(f"No paradigm for {', '.join(missing)} — pick one explicitly", error=True)
+            return
+
+        stages: dict[str, str] = {}
+
+        def _progress(r: FlashResult) -> None:
+            stages[r.target.sid] = r.stage
+            counts = {st: sum(v == st for v in stages.values())
+                      for st in ("uploading", "done", "skipped", "failed")}
+            self._set_status(f"Flashing {len(targets)}: " + ", ".join(
+                f"{n} {st}" for st, n in counts.items() if n))
+
+        for t in targets:
+            self.sessions[t.sid].state = "uploading"
+        flasher = FleetFlasher(self.fleet, parallel=FLASH_PARALLEL, hex_cache=self.hex_cache,
+                               on_progress=_progress)
+        report = await flasher.run(targets)
+        for r in report.results:
+            s = self.sessions.get(r.target.sid)
+            if s is None:
+                continue
+            s.state = "connected" if r.ok else "idle"
+            if r.ok:
+                if not r.skipped:
+                    s.forget_device_config()
+                s.paradigm, s.board = r.target.paradigm, board
+        failed = "; ".join(f"{r.target.sid[:8]}: {r.error}" for r in report.failed)
+        self._set_status(report.summary() + (f"  |  {failed}" if failed else ""),
+                         error=bool(report.failed))
+        self._rebuild_current_menu()
+
+    def _local_host(self) -> str:
+        """This CLI's own backend's name in the fleet."""
+        return next(name for name, api in self.fleet.clients.items() if api is self.api)
+
+    async def _preload_firmware(self) -> None:
+        """Warm the hex cache for every board/paradigm the backend offers."""
+        combos = []
+        for board in BOARDS:
+            try:
+                resp = await self.api.list_paradigms(board)
+                paradigms = resp.get("paradigms", []) or DEFAULT_PARADIGMS
+            except Exception:
+                paradigms = DEFAULT_PARADIGMS
+            combos += [(p, board) for p in paradigms]
+        await self.hex_cache.preload(combos)
+
     async def _load_pav_commands(self) -> None:
         """Fetch the registry-driven Pavlovian command set for the session's paradigm."""
         if not self.session:
             return
         try:
-            resp = await self.api.get_commands(self.session.id)
+            resp = await self.api.get_commands(self.session.id, self.session.paradigm)
             self.session.pav_commands = resp.get("commands", [])
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Failed to load Pavlovian commands: {exc}", error=True)
 
+    async def _ensure_device_config(self, s: SessionState | None = None) -> None:
+        """Seed the session's device-config cache from the backend (once)."""
+        s = s or self.session
+        if not s or s.device_config_seeded:
+            return
+        try:
+            cfg = await self.api.get_config(s.id)
+        except Exception:
+            return  # unseeded cache just means every code is sent
+        if cfg.get("firmware_info"):
+            s.firmware_info = cfg["firmware_info"]
+        for entry in cfg.get("hardware_settings") or []:
+            if isinstance(entry, dict):
+                s.ingest_device_config(entry)
+        s.device_config_seeded = True
+
+    async def _resync_device_config(self) -> None:
+        if not self.session:
+            self._set_status("No session", error=True)
+            return
+        self.session.forget_device_config()
+        await self._ensure_device_config()
+        if self.session.device_config_seeded:
+            known = len(self.session.armed) + len(self.session.device_values)
+            self._set_status(f"Device config resynced ({known} known values)")
+        else:
+            self._set_status("Device config unavailable — next preset sends every code", error=True)
+        self._rebuild_current_menu()
+
+    async def _refresh_metadata(self) -> None:
+        self.api.invalidate_metadata()
+        if self.session:
+            await self._load_pav_commands()
+        self._set_status("Cached boards/paradigms/ports/command registries cleared")
+
     async def _reset_session(self) -> None:
         if not self.session:
             self._set_status("No session", error=True)
             return
         try:
-            await self.api.reset_session(self.session.id)
-            self.session.state = "idle"
-            self.session.armed.clear()
-            self.session.infusion_count = 0
-            self.session.press_count = 0
-            self.session.trial_count = 0
-            self.session.program_start = None
-            self.session.program_end = None
+            await self._reset_one(self.session)
             self._set_status("Session reset")
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Reset failed: {exc}", error=True)
 
+    async def _reset_one(self, s: SessionState) -> str:
+        await self.api.reset_session(s.id)
+        s.state = "idle"
+        s.forget_device_config()
+        s.limits_applied = None
+        s.infusion_count = 0
+        s.press_count = 0
+        s.trial_count = 0
+        s.program_start = None
+        s.program_end = None
+        return "reset"
+
     async def _destroy_session(self) -> None:
         if not self.session:
             self._set_status("No session", error=True)
@@ -1112,6 +1566,7 @@ class ReacherCLI:
             return
         try:
             await self.api.destroy_session(self.session.id)
+            self.scheduler.forget(self.session.id)
             self.session = None
             self._set_status("Session destroyed")
             self._rebuild_current_menu()
@@ -1127,6 +1582,13 @@ class ReacherCLI:
                 f"Paradigm: {s.paradigm or 'none'}  |  Board: {s.board or 'none'}")
         self._set_status(info)
 
+    async def _show_pool_stats(self) -> None:
+        stats = self.api.pool_stats()
+        if stats is None:
+            self._set_status("No open connection pool", error=True)
+            return
+        self._set_status(f"{stats.summary()}  |  {self.api.retry_budget.summary()}")
+
     # ───────────────────────────────────────────────────────────────────
     # Hardware actions
     # ───────────────────────────────────────────────────────────────────
@@ -1136,7 +1598,8 @@ class ReacherCLI:
             self._set_status("No session", error=True)
             return
         try:
-            await self.api.send_command(self.session.id, code, value)
+            await self.scheduler.submit(self.session.id, code, value)
+            self.session.record_ack(code, value)
             # Update armed state if this was an arm/disarm command
             for cfg in DEVICE_CONFIGS:
                 if code == cfg["arm"]:
@@ -1153,9 +1616,18 @@ class ReacherCLI:
                 else:
                     self._set_status(f"Command {code} sent")
             self._rebuild_current_menu()
+        except CommandSuperseded:
+            # A later disarm made this write moot; its own status wins.
+            return
         except Exception as exc:
             self._set_status(f"Command failed: {exc}", error=True)
 
+    async def _show_queue_stats(self) -> None:
+        if not self.session:
+            self._set_status("No session", error=True)
+            return
+        self._set_status(self.scheduler.stats(self.session.id).summary())
+
     async def _test_chain(self) -> None:
         await self._send_hw_command(SYSTEM_COMMANDS["test_chain"])
 
@@ -1175,41 +1647,130 @@ class ReacherCLI:
         if not self.session:
             self._set_status("No session", error=True)
             return
-        preset = PRESETS[preset_key]
-        self._set_status(f"Applying preset: {preset['name']}...")
+        s = self.session
+        try:
+            plan = compile_plan(preset_key, s.paradigm, s.board)
+        except (KeyError, ValueError) as exc:
+            self._set_status(f"Preset failed: {exc}", error=True)
+            return
+        self._set_status(f"Applying preset: {plan.name}...")
         try:
-            # Apply hardware settings
-            for dev_id, hw_cfg in preset["hardware"].items():
-                cmd_map = PRESET_COMMAND_MAP[dev_id]
-                arm_code = cmd_map["arm"] if hw_cfg.get("armed") else cmd_map["disarm"]
-                await self.api.send_command(self.session.id, arm_code)
-                self.session.armed[dev_id] = hw_cfg.get("armed", False)
-                for param_key, param_code in cmd_map.get("params", {}).items():
-                    if param_key in hw_cfg:
-                        val = _safe_int(str(hw_cfg[param_key]), param_key)
-                        if val is not None:
-                            await self.api.send_command(self.session.id, param_code, val)
-
-            # Apply paradigm settings
-            ps = preset.get("paradigm_settings", {})
-            for key, code in PARADIGM_SETTING_CODES.items():
-                if key in ps:
-                    val = _safe_int(str(ps[key]), key)
-                    if val is not None:
-                        await self.api.send_command(self.session.id, code, val)
-            self.session.paradigm_settings.update(ps)
-
-            # Apply limits
-            lim = preset.get("limits", {})
-            if lim:
-                await self.api.set_limit(self.session.id, **lim)
-                self.session.limit_settings.update(lim)
-
-            self._set_status(f"Preset '{preset['name']}' applied")
+            changed, failed = await self._apply_plan(s, plan)
+            if failed:
+                codes = ", ".join(str(res.code) for res in failed)
+                self._set_status(
+                    f"Preset '{plan.name}' applied with {len(failed)} failed "
+                    f"command(s): {codes}",
+                    error=True,
+                )
+            else:
+                self._set_status(
+                    f"Preset '{plan.name}' applied "
+                    f"({len(changed)} of {len(plan.commands)} commands changed)"
+                )
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Preset failed: {exc}", error=True)
 
+    async def _apply_plan(self, s: SessionState, plan: CommandPlan) -> tuple[list, list]:
+        """Send the part of *plan* that differs from *s*'s cached board config.
+
+        Returns the commands sent and the results of those that failed.
+        """
+        sid = s.id
+        await self._ensure_device_config(s)
+        changed, changed_arms = self._changed_commands(plan, s)
+
+        # Limits ride alongside the command batch rather than after it. The
+        # batch goes through the scheduler so it is paced like any other
+        # write and a STOP/pause still overtakes it.
+        lim = plan.limits
+        lim_payload = {**s.limit_settings, **lim}
+        limit_error = None
+        if lim and lim_payload != s.limits_applied:
+            results, limit_error = await asyncio.gather(
+                self.scheduler.submit_plan(sid, changed),
+                self.api.set_limit(sid, **lim_payload),
+                return_exceptions=True,
+            )
+            if isinstance(results, BaseException):
+                raise results
+            if not isinstance(limit_error, BaseException):
+                limit_error = None
+                s.limits_applied = lim_payload
+        else:
+            results = await self.scheduler.submit_plan(sid, changed)
+
+        # Record what the board acknowledged even if the limits failed, so
+        # the cache matches the board before the limit error surfaces.
+        for i, res in enumerate(results):
+            if not res.ok:
+                continue
+            if i in changed_arms:
+                dev_id, armed = changed_arms[i]
+                s.armed[dev_id] = armed
+            else:
+                s.record_ack(res.code, res.value)
+        if limit_error is not None:
+            raise limit_error
+        s.limit_settings.update(lim)
+        s.paradigm_settings.update(plan.paradigm_settings)
+        return changed, [res for res in results if not res.ok]
+
+    async def _apply_plan_to(self, s: SessionState, preset_key: str) -> str:
+        """Broadcast form of Apply Preset: raises when any command fails."""
+        plan = compile_plan(preset_key, s.paradigm, s.board)
+        changed, failed = await self._apply_plan(s, plan)
+        if failed:
+            raise RuntimeError(f"{len(failed)} command(s) failed: "
+                               + ", ".join(str(res.code) for res in failed))
+        return f"{len(changed)} of {len(plan.commands)} commands changed"
+
+    def _changed_commands(
+        self, plan: CommandPlan, s: SessionState | None = None
+    ) -> tuple[list[tuple[int, int | None]], dict[int, tuple[str, bool]]]:
+        """Filter *plan* to the commands that differ from the cached board config.
+
+        Returns the commands to send and, keyed by their index in that list,
+        the ``(device_id, armed)`` each arm/disarm sets.
+        """
+        s = s or self.session
+        changed: list[tuple[int, int | None]] = []
+        changed_arms: dict[int, tuple[str, bool]] = {}
+        for i, (code, val) in enumerate(plan.commands):
+            arm = plan.arms.get(i)
+            if arm is not None:
+                if s and s.armed.get(arm[0]) == arm[1]:
+                    continue
+                changed_arms[len(changed)] = arm
+            elif s and s.device_values.get(code) == val:
+                continue
+            changed.append((code, val))
+        return changed, changed_arms
+
+    async def _dry_run_preset(self, preset_key: str) -> None:
+        """Report what applying a preset would cost, without sending anything."""
+        s = self.session
+        try:
+            plan = compile_plan(preset_key, s.paradigm if s else None, s.board if s else None)
+        except (KeyError, ValueError) as exc:
+            self._set_status(f"Dry run failed: {exc}", error=True)
+            return
+        if s:
+            await self._ensure_device_config()
+        changed, _ = self._changed_commands(plan)
+        measured = self.api.command_latency
+        latency = measured if measured is not None else DEFAULT_COMMAND_LATENCY
+        bulk = bool(self.api.bulk_commands)
+        diff = f", {len(changed)} would change" if s else ""
+        basis = "measured p50" if measured is not None else "assumed"
+        self._set_status(
+            f"{plan.name} ({plan.paradigm or '?'}/{plan.board or '?'}): "
+            f"{len(plan.commands)} commands{' + limits' if plan.limits else ''}"
+            f"{diff}  |  est. {plan.estimate_seconds(latency, bulk):.2f}s "
+            f"at {latency * 1000:.0f} ms/cmd ({basis}, {'bulk' if bulk else 'pipelined'})"
+        )
+
     async def _send_paradigm_setting(self, key: str, value: int) -> None:
         if not self.session:
             self._set_status("No session", error=True)
@@ -1218,7 +1779,10 @@ class ReacherCLI:
         if code is None:
             self._set_status(f"Unknown setting: {key}", error=True)
             return
-        await self._send_hw_command(code, value)
+        if self.session.device_values.get(code) == value:
+            self._set_status(f"{key} already {value} — nothing sent")
+        else:
+            await self._send_hw_command(code, value)
         # VI and OM share the single "interval" storage slot (mirrors the GUI,
         # which keeps one `interval` field but sends 204 for VI / 203 for OM).
         store_key = "interval" if key in ("vi_interval", "om_interval") else key
@@ -1262,15 +1826,19 @@ class ReacherCLI:
             self._set_status("No session", error=True)
             return
         try:
-            await self.api.start_program(self.session.id)
-            self.session.state = "running"
-            self.session.program_start = time.time()
-            self.session.program_end = None
+            await self._start_one(self.session)
             self._set_status("Session started")
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Start failed: {exc}", error=True)
 
+    async def _start_one(self, s: SessionState) -> str:
+        await self.api.start_program(s.id)
+        s.state = "running"
+        s.program_start = time.time()
+        s.program_end = None
+        return "started"
+
     async def _stop_program(self) -> None:
         if not self.session:
             self._set_status("No session", error=True)
@@ -1286,20 +1854,63 @@ class ReacherCLI:
             self._set_status("Cancelled")
             return
         try:
-            await self.api.stop_program(self.session.id)
-            self.session.state = "stopped"
-            self.session.program_end = time.time()
+            await self._stop_one(self.session)
             self._set_status("Session stopped")
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Stop failed: {exc}", error=True)
 
+    async def _stop_one(self, s: SessionState) -> str:
+        sid = s.id
+        await self.scheduler.priority(sid, lambda: self.api.stop_program(sid))
+        s.state = "stopped"
+        s.program_end = time.time()
+        return "stopped"
+
+    # ── Broadcast ─────────────────────────────────────────────────────
+
+    def _broadcast_sessions(self) -> list[SessionState]:
+        """Marked sessions, or every open session when none are marked."""
+        marked = [s for s in self.sessions.values() if s.marked]
+        return marked or list(self.sessions.values())
+
+    async def _confirm_broadcast(self, op: str, fn: Callable) -> None:
+        n = len(self._broadcast_sessions())
+
+        async def _confirmed(choice: str) -> None:
+            if choice == "yes":
+                await self._run_broadcast(op, fn)
+            else:
+                self._set_status("Cancelled")
+
+        self._prompt_select(f"{op.capitalize()} {n} sessions?", [("Yes", "yes"), ("No", "no")], _confirmed)
+
+    async def _run_broadcast(self, op: str, fn: Callable) -> None:
+        """Run ``fn(session)`` on every broadcast target concurrently."""
+        targets = self._broadcast_sessions()
+        if not targets:
+            self._set_status("No sessions", error=True)
+            return
+        host = self._local_host()
+        self._set_status(f"{op.capitalize()}: {len(targets)} sessions...")
+        report = await broadcast(
+            self.fleet,
+            [BroadcastTarget(host, s.id, s.paradigm, s.board) for s in targets],
+            op,
+            lambda _api, t: fn(self.sessions[t.sid]),
+        )
+        failed = "; ".join(f"{r.target.sid[:8]}: {r.detail}" for r in report.failed)
+        self._set_status(report.summary() + (f"  |  {failed}" if failed else ""),
+                         error=bool(report.failed))
+        self._rebuild_current_menu()
+
     async def _pause_program(self) -> None:
         if not self.session:
             self._set_status("No session", error=True)
             return
         try:
-            await self.api.pause_program(self.session.id)
+            sid = self.session.id
+            await self.scheduler.priority(sid, lambda: self.api.pause_program(sid))
             if self.session.state == "paused":
                 # Resume
                 if self.session.pause_start:
@@ -1342,6 +1953,7 @@ class ReacherCLI:
             return
         try:
             await self.api.restart_program(self.session.id)
+            self.session.forget_device_config()
             self.session.state = "running"
             self.session.program_start = time.time()
             self.session.program_end = None
@@ -1358,8 +1970,10 @@ class ReacherCLI:
             return
         self.session.limit_settings["type"] = limit_type
         try:
-            await self.api.set_limit(self.session.id, **self.session.limit_settings)
-            self._set_status(f"Limit type set to {limit_type}")
+            if await self._push_limits():
+                self._set_status(f"Limit type set to {limit_type}")
+            else:
+                self._set_status(f"Limit type already {limit_type} — nothing sent")
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Set limit failed: {exc}", error=True)
@@ -1370,12 +1984,24 @@ class ReacherCLI:
             return
         self.session.limit_settings[key] = value
         try:
-            await self.api.set_limit(self.session.id, **self.session.limit_settings)
-            self._set_status(f"{key} set to {value}")
+            if await self._push_limits():
+                self._set_status(f"{key} set to {value}")
+            else:
+                self._set_status(f"{key} already {value} — nothing sent")
             self._rebuild_current_menu()
         except Exception as exc:
             self._set_status(f"Set limit failed: {exc}", error=True)
 
+    async def _push_limits(self) -> bool:
+        """Send the session's limit settings unless the backend already has them."""
+        s = self.session
+        payload = dict(s.limit_settings)
+        if payload == s.limits_applied:
+            return False
+        await self.api.set_limit(s.id, **payload)
+        s.limits_applied = payload
+        return True
+
     # ───────────────────────────────────────────────────────────────────
     # Monitor actions
     # ───────────────────────────────────────────────────────────────────
@@ -1395,101 +2021,224 @@ class ReacherCLI:
             self._set_status("No session — create one first", error=True)
             return
         self.mode = "monitor"
-        self.monitor_lines.clear()
+        self._ensure_stream(self.session)
+        self._start_refresh()
         self._invalidate()
-        self._ws_task = asyncio.ensure_future(self._stream_events())
 
     async def _exit_monitor(self) -> None:
-        if self._ws_task and not self._ws_task.done():
-            self._ws_task.cancel()
-            self._ws_task = None
+        # Streams keep running in the background so counters stay current for
+        # the split view; they end when their session is destroyed or on quit.
+        self._stop_refresh()
         self.mode = "menu"
         self._invalidate()
 
-    async def _stream_events(self) -> None:
-        if not self.session:
+    async def _enter_split(self) -> None:
+        if not self.sessions:
+            self._set_status("No sessions — create one first", error=True)
+            return
+        for s in self.sessions.values():
+            self._ensure_stream(s)
+        ids = list(self.sessions)
+        self.split_index = ids.index(self.active_sid) if self.active_sid in ids else 0
+        self.mode = "split"
+        self._start_refresh()
+        self._invalidate()
+
+    async def _enter_fleet(self) -> None:
+        self.mode = "fleet"
+        self._start_refresh(self._poll_fleet)
+        self._invalidate()
+
+    async def _poll_fleet(self) -> None:
+        while True:
+            self.fleet_snapshot = await self.fleet.snapshot()
+            self._invalidate()
+            await asyncio.sleep(FLEET_REFRESH)
+
+    def _ensure_stream(self, s: SessionState) -> None:
+        if self.ws_mux and self.api.ws_mux is not False:
+            if self._mux is None:
+                self._mux = SessionMux(self.api, self._on_mux_message,
+                                       self._on_mux_reconnect, self._on_mux_link)
+            self._mux.subscribe(s.id)
+            s.ws_connected = self._mux.connected
+            if self._mux_task is None or self._mux_task.done():
+                self._mux_task = asyncio.ensure_future(self._run_mux(self._mux))
             return
+        if s.ws_task is None or s.ws_task.done():
+            s.ws_task = asyncio.ensure_future(self._stream_events(s))
+
+    def _stop_stream(self, s: SessionState) -> None:
+        if self._mux is not None:
+            self._mux.unsubscribe(s.id)
+            if not self._mux.sids:
+                # Start over with the next subscribe: a new link, not a
+                # "reconnect" that would run missed-event recovery.
+                if self._mux_task is not None:
+                    self._mux_task.cancel()
+                    self._mux_task = None
+                self._mux = None
+        if s.ws_task is not None and not s.ws_task.done():
+            s.ws_task.cancel()
+        s.ws_task = None
+        s.ws_connected = False
+
+    async def _run_mux(self, mux: SessionMux) -> None:
+        try:
+            await mux.run()
+        except asyncio.CancelledError:
+            pass
+        except MuxUnsupported:
+            # Older backend: move every subscribed session to its own socket.
+            self._mux = None
+            for sid in sorted(mux.sids):
+                if sid in self.sessions:
+                    self._ensure_stream(self.sessions[sid])
+        except ImportError:
+            for sid in mux.sids:
+                if sid in self.sessions:
+                    self.sessions[sid].monitor_lines.append(
+                        ("class:status-bar-error", "websockets not installed — cannot stream"), "error")
+            self._invalidate()
+        except Exception:
+            pass  # gave up reconnecting; _on_mux_link already said so
+
+    def _on_mux_message(self, sid: str, msg: dict) -> None:
+        s = self.sessions.get(sid)
+        if s is None:
+            return
+        self._handle_ws_message(msg, s)
+        if self._is_visible(s):
+            self._invalidate()
+
+    async def _on_mux_reconnect(self, sid: str) -> None:
+        s = self.sessions.get(sid)
+        if s is None:
+            return
+        await self._recover_missed_events(s)
+        s.monitor_lines.append(("class:monitor-event", "  [info] WebSocket reconnected"))
+
+    def _on_mux_link(self, connected: bool, detail: str) -> None:
+        for sid in self._mux.sids if self._mux else ():
+            s = self.sessions.get(sid)
+            if s is None:
+                continue
+            s.ws_connected = connected
+            if not connected:
+                s.monitor_lines.append(("class:status-bar-error", f"WebSocket {detail}"), "error")
+        self._invalidate()
+
+    def _wire_stats(self, s: SessionState) -> tuple[codec.WireStats, bool]:
+        """Byte counters of the socket carrying *s*, and whether it is shared."""
+        if self._mux is not None and s.id in self._mux.sids:
+            return self._mux.wire_stats, True
+        return s.wire_stats, False
+
+    def _stream_summary(self) -> str:
+        if self._mux is not None:
+            return f"Multiplexed: {self._mux.summary()}  |  {self._mux.wire_stats.summary()}"
+        per_session = sum(s.ws_task is not None and not s.ws_task.done() for s in self.sessions.values())
+        why = "disabled" if not self.ws_mux else "not offered by backend" if self.api.ws_mux is False else "idle"
+        links = [s.wire_stats for s in self.sessions.values() if s.wire_stats.messages]
+        total = codec.WireStats(sum(w.wire_bytes for w in links), sum(w.payload_bytes for w in links),
+                                sum(w.messages for w in links), links[0].compression if links else "-")
+        return f"{per_session} per-session socket(s) (multiplexing {why})  |  {total.summary()}"
+
+    def _start_refresh(self, loop: Callable | None = None) -> None:
+        """Redraw once a second while a monitor is open (elapsed timers), or
+        run *loop* instead for views that poll."""
+        if self._refresh_task is None or self._refresh_task.done():
+            async def _refresh_loop():
+                while True:
+                    await asyncio.sleep(1)
+                    self._invalidate()
+
+            self._refresh_task = asyncio.ensure_future((loop or _refresh_loop)())
+
+    def _stop_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def _is_visible(self, s: SessionState) -> bool:
+        return self.mode == "split" or (self.mode == "monitor" and s.id == self.active_sid)
+
+    async def _stream_events(self, s: SessionState) -> None:
         try:
             import websockets
         except ImportError:
-            self.monitor_lines.append(("class:status-bar-error",
-                                       "websockets not installed — cannot stream"))
+            s.monitor_lines.append(("class:status-bar-error",
+                                    "websockets not installed — cannot stream"), "error")
             self._invalidate()
             return
 
-        ws_url = f"ws://localhost:{self.port}/ws/{self.session.id}"
+        ws_url = self.api.ws_url(s.id)
+        connect_kw = self.api.ws_connect_kwargs()
         attempt = 0
         max_attempts = 15
         connected_once = False
 
-        while attempt < max_attempts:
+        while True:
+            error = "closed by backend"
             try:
-                async with websockets.connect(ws_url) as ws:
-                    attempt = 0  # Reset on successful connection
+                async with websockets.connect(ws_url, **connect_kw) as ws:
+                    s.ws_connected = True
+                    frame_codec = codec.for_subprotocol(ws.subprotocol)
 
                     if connected_once:
-                        await self._recover_missed_events()
-                        self.monitor_lines.append(
+                        await self._recover_missed_events(s)
+                        s.monitor_lines.append(
                             ("class:monitor-event", "  [info] WebSocket reconnected"))
                         self._invalidate()
                     connected_once = True
 
-                    async def _refresh_loop():
-                        while True:
-                            await asyncio.sleep(1)
-                            self._invalidate()
-
-                    refresh = asyncio.ensure_future(_refresh_loop())
-                    try:
-                        async for raw in ws:
-                            try:
-                                msg = json.loads(raw)
-                            except json.JSONDecodeError:
-                                continue
-                            self._handle_ws_message(msg)
+                    async for msg in codec.ws_messages(ws, frame_codec, s.wire_stats):
+                        attempt = 0  # the link works; a later drop backs off afresh
+                        self._handle_ws_message(msg, s)
+                        if self._is_visible(s):
                             self._invalidate()
-                    finally:
-                        refresh.cancel()
             except asyncio.CancelledError:
                 return
             except Exception as exc:
-                attempt += 1
-                if attempt >= max_attempts:
-                    self.monitor_lines.append(
-                        ("class:status-bar-error",
-                         f"WebSocket failed after {max_attempts} attempts: {exc}"))
-                    self._invalidate()
-                    return
-                delay = min(1.0 * (2 ** (attempt - 1)), 10.0)
-                self.monitor_lines.append(
+                error = str(exc) or type(exc).__name__
+            finally:
+                s.ws_connected = False
+            # A clean close counts too: a backend that keeps accepting and
+            # closing must not get a tight reconnect-and-recover loop.
+            attempt += 1
+            if attempt >= max_attempts:
+                s.monitor_lines.append(
                     ("class:status-bar-error",
-                     f"WebSocket disconnected, retrying in {delay:.0f}s..."))
+                     f"WebSocket failed after {max_attempts} attempts: {error}"), "error")
                 self._invalidate()
-                await asyncio.sleep(delay)
+                return
+            delay = min(1.0 * (2 ** (attempt - 1)), 10.0)
+            s.monitor_lines.append(
+                ("class:status-bar-error",
+                 f"WebSocket disconnected, retrying in {delay:.0f}s..."), "error")
+            self._invalidate()
+            await asyncio.sleep(delay)
 
-    async def _recover_missed_events(self) -> None:
+    async def _recover_missed_events(self, s: SessionState) -> None:
         """Fetch events missed during WebSocket disconnect from REST API."""
-        if not self.session:
-            return
         try:
-            since = self.session.backend_event_count
-            resp = await self.api.get_behavior(self.session.id, since=since)
-            data = resp.get("data", [])
-            total = resp.get("total", 0)
-            if data:
-                for entry in data:
-                    fake_msg = {"type": "event", "data": entry}
-                    self._handle_ws_message(fake_msg)
-                self.session.backend_event_count = total
-                self.monitor_lines.append(
+            since = s.backend_event_count
+            recovered = 0
+            async with aclosing(self.api.iter_behavior(s.id, since=since)) as missed:
+                async for entry in missed:
+                    self._handle_ws_message({"type": "event", "data": entry}, s)
+                    recovered += 1
+            if recovered:
+                s.backend_event_count = since + recovered
+                s.monitor_lines.append(
                     ("class:monitor-event",
-                     f"  [info] Recovered {len(data)} missed events"))
+                     f"  [info] Recovered {recovered} missed events"))
         except Exception as exc:
-            self.monitor_lines.append(
+            s.monitor_lines.append(
                 ("class:status-bar-error",
-                 f"Event recovery failed: {exc}"))
+                 f"Event recovery failed: {exc}"), "error")
 
-    def _handle_ws_message(self, msg: dict) -> None:
+    def _handle_ws_message(self, msg: dict, s: SessionState) -> None:
         msg_type = msg.get("type", "")
         data = msg.get("data", msg)
 
@@ -1499,70 +2248,70 @@ class ReacherCLI:
             ts = data.get("timestamp", "")
             if isinstance(ts, (int, float)):
                 ts = time.strftime("%H:%M:%S", time.localtime(ts))
-            self.monitor_lines.append((
+            s.monitor_lines.append((
                 "class:monitor-event",
                 f"[{ts}]  {device:<16} {event}"
-            ))
+            ), "event")
+            s.last_event_at = time.time()
 
             # Update counts. The backend emits UPPERCASE device/event strings
             # (see reacher kernel `_emit("event", ...)`); match them the same way
             # pushEvent does in web/src/store/useSessionStore.ts. (.upper() keeps
             # this robust to casing.)
-            if self.session:
-                self.session.backend_event_count += 1
-                dev = device.upper()
-                evt = event.upper()
-                if dev in ("PUMP", "PUMP_1") and evt == "INFUSION":
-                    self.session.infusion_count += 1
-                elif dev in ("RH_LEVER", "LEVER_RH", "LH_LEVER", "LEVER_LH") and "PRESS" in evt:
-                    self.session.press_count += 1
-                    counts = (self.session.rh_counts if dev in ("RH_LEVER", "LEVER_RH")
-                              else self.session.lh_counts)
-                    if evt == "ACTIVE_PRESS":
-                        counts["active"] = counts.get("active", 0) + 1
-                    elif evt == "TIMEOUT_PRESS":
-                        counts["timeout"] = counts.get("timeout", 0) + 1
-                    elif evt == "INACTIVE_PRESS":
-                        counts["inactive"] = counts.get("inactive", 0) + 1
-                elif dev == "PAVLOV" and evt == "TRIAL_START":
-                    self.session.trial_count += 1
+            s.backend_event_count += 1
+            dev = device.upper()
+            evt = event.upper()
+            if dev in ("PUMP", "PUMP_1") and evt == "INFUSION":
+                s.infusion_count += 1
+            elif dev in ("RH_LEVER", "LEVER_RH", "LH_LEVER", "LEVER_LH") and "PRESS" in evt:
+                s.press_count += 1
+                counts = s.rh_counts if dev in ("RH_LEVER", "LEVER_RH") else s.lh_counts
+                if evt == "ACTIVE_PRESS":
+                    counts["active"] = counts.get("active", 0) + 1
+                elif evt == "TIMEOUT_PRESS":
+                    counts["timeout"] = counts.get("timeout", 0) + 1
+                elif evt == "INACTIVE_PRESS":
+                    counts["inactive"] = counts.get("inactive", 0) + 1
+            elif dev == "PAVLOV" and evt == "TRIAL_START":
+                s.trial_count += 1
 
         elif msg_type == "session_state":
             state = data.get("state", "")
-            if self.session and state:
-                self.session.state = state
-                if state == "running" and self.session.program_start is None:
-                    self.session.program_start = time.time()
+            if state:
+                s.state = state
+                if state == "running" and s.program_start is None:
+                    s.program_start = time.time()
                 elif state == "stopped":
-                    self.session.program_end = time.time()
+                    s.program_end = time.time()
 
         elif msg_type == "config":
-            if self.session:
-                armed = data.get("armed", {})
-                if armed:
-                    self.session.armed.update(armed)
+            if str(data.get("device", "")).upper() == "CONTROLLER":
+                s.firmware_info = data
+            else:
+                s.ingest_device_config(data)
 
         elif msg_type == "split":
             seg = data.get("segment_number", "?")
-            self.monitor_lines.append((
+            s.monitor_lines.append((
                 "class:monitor-event",
                 f"  [split] Segment split — now on segment {int(seg) + 1}"
             ))
 
         elif msg_type == "restart":
-            if self.session:
-                self.session.state = "running"
-                self.session.program_start = time.time()
-                self.session.program_end = None
-                self.session.paused_time = 0
-                self.session.pause_start = None
-                self.session.infusion_count = 0
-                self.session.press_count = 0
-                self.session.trial_count = 0
-                self.session.backend_event_count = 0
-                self.session.rh_counts = {}
-                self.session.lh_counts = {}
-            self.monitor_lines.append((
+            s.state = "running"
+            s.program_start = time.time()
+            s.program_end = None
+            s.paused_time = 0
+            s.pause_start = None
+            s.infusion_count = 0
+            s.press_count = 0
+            s.trial_count = 0
+            s.backend_event_count = 0
+            s.rh_counts = {}
+            s.lh_counts = {}
+            # The board came back up with its own defaults.
+            s.forget_device_config()
+            s.monitor_lines.append((
                 "class:monitor-event",
                 "  [restart] Program restarted"
             ))
@@ -1570,7 +2319,12 @@ class ReacherCLI:
         elif msg_type == "log":
             level = data.get("level", "info")
             text = data.get("message", str(data))
-            self.monitor_lines.append(("class:monitor-event", f"  [{level}] {text}"))
+            # Backend errors go to the error ring, so a burst of them can't
+            # push reconnect notices out of the info ring.
+            if _is_error_level(level):
+                s.monitor_lines.append(("class:status-bar-error", f"  [{level}] {text}"), "error")
+            else:
+                s.monitor_lines.append(("class:monitor-event", f"  [{level}] {text}"))
 
     # ───────────────────────────────────────────────────────────────────
     # Data actions
@@ -1613,36 +2367,99 @@ class ReacherCLI:
         if not self.session:
             self._set_status("No session", error=True)
             return
+        path = await self._run_export()
+        if path:
+            self._set_status(f"ZIP exported: {path}")
+
+    async def _run_export(self, s: SessionState | None = None) -> str | None:
+        """Export on the backend host; returns the archive path there."""
+        s = s or self.session
         try:
             # Mirror triggerAutoExport in web/src/hooks/useSessionWebSockets.ts.
             # Microscope frame rate/averaging are omitted: the CLI has no UI to
             # configure them, matching the GUI's conditional spread when the
             # microscope is disarmed.
             export_payload = {
-                "session_name": self.session.name or "",
-                "notes": self.session.file_config.get("notes", ""),
-                "infusion_count": self.session.infusion_count,
-                "press_count": self.session.press_count,
-                "trial_count": self.session.trial_count,
-                "program_start_time": self.session.program_start,
+                "session_name": s.name or "",
+                "notes": s.file_config.get("notes", ""),
+                "infusion_count": s.infusion_count,
+                "press_count": s.press_count,
+                "trial_count": s.trial_count,
+                "program_start_time": s.program_start,
             }
-            resp = await self.api.export_zip(self.session.id, **export_payload)
-            path = resp.get("path", resp.get("file", "exported"))
-            self._set_status(f"ZIP exported: {path}")
+            resp = await self.api.export_zip(s.id, **export_payload)
         except Exception as exc:
             self._set_status(f"Export failed: {exc}", error=True)
+            return None
+        path = resp.get("file_path") or resp.get("path") or resp.get("file")
+        s.last_export = path
+        s.last_export_at = time.time()
+        s.last_export_events = s.backend_event_count
+        return path or "exported"
+
+    async def _download_zip(self, dest: str) -> None:
+        s = self.session
+        if not s:
+            self._set_status("No session", error=True)
+            return
+        if not s.last_export or s.last_export_at is None:
+            await self._finish_download(s, dest, "fresh")
+            return
+        # An older archive misses whatever was recorded since: ask, showing its age.
+        taken = time.strftime("%H:%M:%S", time.localtime(s.last_export_at))
+        new = s.backend_event_count - s.last_export_events
+        since = f"{new} new events since" if new > 0 else "no new events since"
+        self._prompt_select(
+            f"Last export was at {taken} ({since}). Download:",
+            [("Export again, then download", "fresh"),
+             (f"The {taken} export", "last"),
+             ("Cancel", "cancel")],
+            lambda choice: self._finish_download(s, dest, choice),
+        )
+
+    async def _finish_download(self, s: SessionState, dest: str, choice: str) -> None:
+        if choice == "cancel":
+            self._set_status("Cancelled")
+            return
+        remote = s.last_export if choice == "last" else await self._run_export(s)
+        if not remote or remote == "exported":
+            if remote:
+                self._set_status("Backend did not report the archive path", error=True)
+            return
+        dest = os.path.expanduser(dest)
+        last = [0.0]
+
+        def _progress(done: int, total: int | None) -> None:
+            now = time.monotonic()
+            if now - last[0] < 0.2:
+                return
+            last[0] = now
+            mb = done / 1_048_576
+            pct = f" ({done * 100 // total}%)" if total else ""
+            self._set_status(f"Downloading {os.path.basename(remote)}: {mb:.1f} MB{pct}")
+
+        try:
+            result = await self.api.download_export(s.id, remote, dest, progress=_progress,
+                                                    resume=choice == "last")
+        except DownloadUnsupported as exc:
+            self._set_status(str(exc), error=True)
+            return
+        except Exception as exc:
+            self._set_status(f"Download failed: {exc}", error=True)
+            return
+        resumed = f", resumed at {result.resumed_from / 1_048_576:.1f} MB" if result.resumed_from else ""
+        self._set_status(f"Saved {result.path} ({result.size / 1_048_576:.1f} MB, "
+                         f"checksum: {result.verified}{resumed})")
 
     async def _view_data_preview(self) -> None:
         if not self.session:
             self._set_status("No session", error=True)
             return
         try:
-            resp = await self.api.get_behavior(self.session.id)
-            events = resp.get("events", resp.get("data", []))
-            if not events:
+            last = [e async for e in self.api.iter_behavior(self.session.id, tail=10)]
+            if not last:
                 self._set_status("No data recorded yet")
                 return
-            last = events[-10:]
             lines = []
             for e in last:
                 ts = e.get("timestamp", "")
@@ -1676,7 +2493,14 @@ class ReacherCLI:
             self._set_status("Cancelled")
 
     async def _do_quit(self) -> None:
+        self._stop_refresh()
+        for s in self.sessions.values():
+            self._stop_stream(s)
+        if self._mux_task is not None:
+            self._mux_task.cancel()
         try:
+            await self.scheduler.close()
+            await self.fleet.close()
             await self.api.close()
         except Exception:
             pass
@@ -1695,6 +2519,9 @@ class ReacherCLI:
             if self.mode == "menu":
                 self.menu.move(-1)
                 self._invalidate()
+            elif self.mode == "split":
+                self.split_index = max(0, self.split_index - 1)
+                self._invalidate()
             elif self.mode == "select":
                 self.select_index = max(0, self.select_index - 1)
                 self._invalidate()
@@ -1704,6 +2531,9 @@ class ReacherCLI:
             if self.mode == "menu":
                 self.menu.move(1)
                 self._invalidate()
+            elif self.mode == "split":
+                self.split_index = min(len(self.sessions) - 1, self.split_index + 1)
+                self._invalidate()
             elif self.mode == "select":
                 self.select_index = min(len(self.select_options) - 1, self.select_index + 1)
                 self._invalidate()
@@ -1718,10 +2548,30 @@ class ReacherCLI:
                 self._submit_input()
             elif self.mode == "select":
                 self._submit_select()
+            elif self.mode == "split" and self.sessions:
+                ids = list(self.sessions)
+                self.active_sid = ids[min(self.split_index, len(ids) - 1)]
+                self._run_action(self._enter_monitor)
+
+        @kb.add("space")
+        def _space(event):
+            if self.mode == "split" and self.sessions:
+                ids = list(self.sessions)
+                s = self.sessions[ids[min(self.split_index, len(ids) - 1)]]
+                s.marked = not s.marked
+                self._invalidate()
+            elif self.mode == "input":
+                self.input_value += " "
+                self._invalidate()
+
+        @kb.add("tab")
+        def _tab(event):
+            if self.mode in ("menu", "monitor"):
+                self._cycle_session(1)
 
         @kb.add("escape")
         def _escape(event):
-            if self.mode == "monitor":
+            if self.mode in ("monitor", "split", "fleet"):
                 self._run_action(self._exit_monitor)
             elif self.mode in ("input", "select"):
                 self._cancel_input()
@@ -1770,6 +2620,14 @@ class ReacherCLI:
             style=CLI_STYLE,
             full_screen=True,
             mouse_support=False,
+            # With many sessions streaming, coalesce redraws instead of
+            # repainting once per event.
+            min_redraw_interval=0.05,
         )
 
-        await self.app.run_async()
+        preload = asyncio.ensure_future(self._preload_firmware()) if self.preload_firmware else None
+        try:
+            await self.app.run_async()
+        finally:
+            if preload is not None:
+                preload.cancel()
@@ -0,0 +1,138 @@
+"""Broadcast operations: one preset/start/stop/reset across many sessions.
+
+Starting a cohort used to mean selecting each chamber's session and starting
+it in turn. :func:`broadcast` runs one operation on a group of sessions — on
+any hosts of a :class:`~cli.fleet.Fleet` — concurrently, within the fleet's
+concurrency cap and a per-session deadline. It returns a result per session
+and the wall time of the whole fan-out, so a cohort start costs about one
+round trip rather than one per chamber.
+
+:func:`operation` gives stateless implementations for ``reacher-cli fleet
+broadcast``; the TUI passes its own so its session state stays in step.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from .fleet import Fleet, HostResult
+
+OPERATIONS = ("preset", "start", "stop", "reset")
+
+# Per-session deadline. A preset is a batch of serial writes, so it gets more
+# than a fleet status probe.
+DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class BroadcastTarget:
+    host: str
+    sid: str
+    paradigm: str | None = None
+    board: str | None = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.host}:{self.sid[:8]}"
+
+
+@dataclass
+class BroadcastResult:
+    target: BroadcastTarget
+    ok: bool
+    detail: str = ""  # what happened, e.g. "12 commands"; the error when not ok
+    elapsed: float = 0.0
+
+
+@dataclass
+class BroadcastReport:
+    op: str
+    results: list[BroadcastResult]
+    wall: float
+
+    @property
+    def failed(self) -> list[BroadcastResult]:
+        return [r for r in self.results if not r.ok]
+
+    def summary(self) -> str:
+        ok = len(self.results) - len(self.failed)
+        times = sorted(r.elapsed for r in self.results)
+        slowest = f", slowest {times[-1] * 1000:.0f} ms" if times else ""
+        return (f"{self.op}: {ok}/{len(self.results)} sessions ok in "
+                f"{self.wall * 1000:.0f} ms{slowest}")
+
+
+# ``fn(api, target)`` performs the operation on one session and returns a short
+# description of what it did.
+Operation = Callable[..., Awaitable[str]]
+
+
+async def broadcast(
+    fleet: Fleet,
+    targets: list[BroadcastTarget],
+    op: str,
+    fn: Operation,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> BroadcastReport:
+    """Run *fn* on every target at once, bounded by the fleet's concurrency."""
+    t0 = time.perf_counter()
+
+    async def one(t: BroadcastTarget) -> BroadcastResult:
+        r: HostResult = await fleet.call(t.host, lambda api: fn(api, t), timeout=timeout)
+        return BroadcastResult(t, r.ok, r.value if r.ok else r.error, r.elapsed)
+
+    results = list(await asyncio.gather(*(one(t) for t in targets)))
+    return BroadcastReport(op, results, time.perf_counter() - t0)
+
+
+def operation(op: str, preset: str | None = None) -> Operation:
+    """A stateless implementation of *op* (one of :data:`OPERATIONS`).
+
+    ``preset`` sends the preset's full command plan and limits to each session,
+    compiled for that session's paradigm and board.
+    """
+    if op == "start":
+        async def fn(api, t):
+            await api.start_program(t.sid)
+            return "started"
+    elif op == "stop":
+        async def fn(api, t):
+            await api.stop_program(t.sid)
+            return "stopped"
+    elif op == "reset":
+        async def fn(api, t):
+            await api.reset_session(t.sid)
+            return "reset"
+    elif op == "preset":
+        from .presets import PRESETS, compile_plan
+        from .scheduler import CommandScheduler
+
+        if not preset:
+            raise ValueError("the preset operation needs a preset name (--preset)")
+        if preset not in PRESETS:
+            raise ValueError(f"unknown preset {preset!r} (known: {', '.join(PRESETS)})")
+
+        async def fn(api, t):
+            plan = compile_plan(preset, t.paradigm, t.board)
+            # Paced like the TUI's writes so a long plan can't flood the board.
+            scheduler = CommandScheduler(api)
+            try:
+                sends = [scheduler.submit_plan(t.sid, plan.commands)]
+                if plan.limits:
+                    sends.append(api.set_limit(t.sid, **plan.limits))
+                results, *limit = await asyncio.gather(*sends, return_exceptions=True)
+            finally:
+                await scheduler.close()
+            for outcome in (results, *limit):
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            failed = [str(r.code) for r in results if not r.ok]
+            if failed:
+                raise RuntimeError(f"{len(failed)} command(s) failed: {', '.join(failed)}")
+            return f"{plan.name}: {len(plan.commands)} commands"
+    else:
+        raise ValueError(f"unknown operation {op!r} (known: {', '.join(OPERATIONS)})")
+    return fn
@@ -2,12 +2,46 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import json
 import os
+import time
+import zipfile
+from urllib.parse import quote
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable
 
 import httpx
 
+from . import codec
+from .metrics import ClientMetrics
+from .retry import RetryBudget, RetryPolicy, is_retryable, retry_after
+from .transport import TransportManager, default_manager
+
 DEFAULT_BASE = "http://localhost:6229"
 _KEY_FILE = os.path.expanduser("~/.reacher/api_key")
+_CACHE_DIR = os.path.expanduser("~/.reacher/cache")
+
+# Freshness windows (seconds) for cached backend metadata. Ports change whenever
+# a board is plugged in, so they are only remembered briefly and never persisted.
+METADATA_TTLS = {"boards": 86400.0, "paradigms": 86400.0, "commands": 86400.0, "ports": 5.0}
+
+# Maximum commands in flight at once when a batch is pipelined (no bulk endpoint).
+DEFAULT_PIPELINE_DEPTH = 8
+
+# Methods that are idempotent by HTTP semantics; POSTs opt in per endpoint.
+_SAFE_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+# Bytes per read/write when streaming an export archive to disk.
+DOWNLOAD_CHUNK = 256 * 1024
+
+# Where the backend reports the sha256 of the hex it last flashed.
+_FIRMWARE_HASH_KEYS = ("sha256", "hex_sha256")
+
+# Events per request when paging through behavior data.
+BEHAVIOR_PAGE = 500
 
 
 def _read_api_key() -> str | None:
@@ -22,23 +56,362 @@ def _read_api_key() -> str | None:
         return None
 
 
+def command_lane(code: int) -> int:
+    """Ordering lane for a firmware command code.
+
+    Every device keeps its arm/disarm/test/param codes inside one hundred-block
+    (RH lever 10xx, cues 3xx, pumps 4xx, paradigm settings 2xx, ...), so codes
+    sharing a lane must reach the board in order while separate lanes may be
+    in flight together.
+    """
+    return code // 100
+
+
+def _body_rejected(exc: httpx.HTTPStatusError) -> bool:
+    """True if *exc* means the backend wants a JSON body rather than multipart."""
+    return exc.response.status_code in (415, 422)
+
+
+def _route_missing(exc: httpx.HTTPStatusError) -> bool:
+    """True if *exc* means the backend has no such route (vs. e.g. unknown session)."""
+    r = exc.response
+    if r.status_code == 405:
+        return True
+    if r.status_code != 404:
+        return False
+    try:
+        return r.json().get("detail") == "Not Found"
+    except ValueError:
+        return True
+
+
+class MetadataCache:
+    """Memory + disk cache for slow-changing backend metadata.
+
+    Entries are scoped to one backend (device id, or base URL, plus its reported
+    version), so an upgraded backend never serves a stale paradigm list. The
+    persisted entries live in ``~/.reacher/cache/metadata-<scope>.json`` and
+    survive CLI restarts; each keeps the response ETag for revalidation.
+    """
+
+    def __init__(self, directory: str = _CACHE_DIR):
+        self.directory = directory
+        self.scope: str | None = None
+        self._path: str | None = None
+        self._entries: dict[str, dict] = {}
+
+    def bind(self, scope: str) -> None:
+        """Switch to *scope*, loading whatever was persisted for it."""
+        if scope == self.scope:
+            return
+        self.scope = scope
+        digest = hashlib.sha1(scope.encode()).hexdigest()[:16]
+        self._path = os.path.join(self.directory, f"metadata-{digest}.json")
+        self._entries = {}
+        try:
+            with open(self._path) as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(doc, dict) and doc.get("scope") == scope:
+            self._entries = {k: dict(v, persist=True) for k, v in doc.get("entries", {}).items()}
+
+    def get(self, key: str) -> dict | None:
+        return self._entries.get(key)
+
+    def put(self, key: str, data, etag: str | None, persist: bool = True) -> None:
+        self._entries[key] = {"data": data, "etag": etag, "stored": time.time(), "persist": persist}
+        if persist:
+            self._save()
+
+    def touch(self, key: str) -> None:
+        """Mark *key* fresh again (the backend answered 304 Not Modified)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry["stored"] = time.time()
+            if entry["persist"]:
+                self._save()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    def _save(self) -> None:
+        if not self._path:
+            return
+        entries = {
+            k: {"data": v["data"], "etag": v["etag"], "stored": v["stored"]}
+            for k, v in self._entries.items() if v["persist"]
+        }
+        tmp = f"{self._path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"scope": self.scope, "entries": entries}, f)
+            os.replace(tmp, self._path)
+        except OSError:
+            pass  # read-only home etc. — the in-memory copy still works
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    """Outcome of one command in a :meth:`ReacherClient.send_commands` batch."""
+
+    code: int
+    value: int | None
+    ok: bool
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    """A completed :meth:`ReacherClient.download_export`."""
+
+    path: str
+    size: int
+    sha256: str
+    resumed_from: int = 0
+    verified: str = "none"  # "sha256" (matched the backend's digest), "zip-crc" or "none"
+
+
+class ChecksumMismatch(Exception):
+    """The downloaded archive does not match the backend's digest (or its own CRCs)."""
+
+
+class DownloadUnsupported(Exception):
+    """The backend has no export download endpoint; the archive stays on its host."""
+
+
+def _sha256_of(path: str, upto: int):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = upto
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h
+
+
+def _digest_header(response: httpx.Response) -> str | None:
+    """Hex sha256 advertised by the backend (``X-Checksum-Sha256`` or ``Digest``)."""
+    value = response.headers.get("X-Checksum-Sha256")
+    if value:
+        return value.strip().lower()
+    for header in ("Repr-Digest", "Digest"):
+        for part in response.headers.get(header, "").split(","):
+            algo, _, b64 = part.strip().partition("=")
+            if algo.lower() == "sha-256" and b64:
+                try:
+                    return base64.b64decode(b64.strip(":")).hex()
+                except ValueError:
+                    return None
+    return None
+
+
+def _zip_crc_ok(path: str) -> bool:
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return zf.testzip() is None
+    except zipfile.BadZipFile:
+        return False
+
+
 class ReacherClient:
     """Thin async wrapper around every REACHER REST endpoint."""
 
-    def __init__(self, base_url: str = DEFAULT_BASE):
-        api_key = _read_api_key()
-        headers: dict[str, str] = {}
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE,
+        metadata_cache: MetadataCache | None = None,
+        transport: TransportManager | None = None,
+        retry: RetryPolicy | None = None,
+        wire: str = "auto",
+        api_key: str | None = None,
+    ):
+        # Resolve everything that can raise (an unknown or uninstalled wire
+        # encoding) before taking a pool reference, so a failed construction
+        # leaks nothing.
+        self.wire_codecs = codec.preferred(wire)
+        # An explicit key (one per host in a fleet) wins over the local default.
+        api_key = self._api_key = api_key or _read_api_key()
+        self._headers: dict[str, str] = {}
         if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        self._http = httpx.AsyncClient(base_url=base_url, timeout=30.0, headers=headers)
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._headers["Accept"] = codec.accept_header(self.wire_codecs)
+        self.base_url = base_url
+        # The pooled client is shared per host; keep any path prefix ourselves.
+        self._prefix = httpx.URL(base_url).path.rstrip("/")
+        self.retry_policy = retry or RetryPolicy()
+        self.retry_budget = RetryBudget()
+        self.metrics = ClientMetrics()
+        # None = not probed yet; False once the backend answers 404/405.
+        self._bulk_commands: bool | None = None
+        # Same for multipart firmware uploads (False once the backend rejects one).
+        self._multipart_upload: bool | None = None
+        # Same for the multiplexed /ws endpoint (set by cli.mux.SessionMux).
+        self.ws_mux: bool | None = None
+        self._meta = metadata_cache if metadata_cache is not None else MetadataCache()
+        self._meta_bound = False
+        self._transport = transport if transport is not None else default_manager()
+        self._http = self._transport.acquire(base_url)
+        self._closed = False
+
+    @property
+    def bulk_commands(self) -> bool | None:
+        """Whether the backend has a bulk command endpoint (None = not probed yet)."""
+        return self._bulk_commands
+
+    @property
+    def command_latency(self) -> float | None:
+        """Median send_command round-trip time in seconds (None until measured)."""
+        return self.metrics.command_latency.percentile(0.5)
 
     async def close(self):
-        await self._http.aclose()
-
-    async def _req(self, method: str, path: str, **kw) -> dict:
-        r = await self._http.request(method, path, **kw)
+        if not self._closed:
+            self._closed = True
+            await self._transport.release(self.base_url)
+
+    def ws_url(self, sid: str) -> str:
+        """WebSocket URL of *sid*'s event stream (the API key rides as ``?token=``)."""
+        return self._ws(f"/ws/{sid}")
+
+    def ws_connect_kwargs(self) -> dict:
+        """``websockets.connect`` options: wire subprotocols and compression."""
+        # Offer binary encodings only when one is installed, so a JSON-only
+        # setup keeps the exact handshake the backend has always seen.
+        offered = [c.subprotocol for c in self.wire_codecs]
+        kw = {"subprotocols": offered} if len(offered) > 1 else {}
+        kw.update(self._transport.config.ws_options())
+        return kw
+
+    def ws_mux_url(self) -> str:
+        """WebSocket URL of the multiplexed stream (see :mod:`cli.mux`)."""
+        return self._ws("/ws")
+
+    def _ws(self, path: str) -> str:
+        url = httpx.URL(self.base_url)
+        scheme = "wss" if url.scheme == "https" else "ws"
+        ws = f"{scheme}://{url.netloc.decode('ascii')}{self._prefix}{path}"
+        return f"{ws}?token={quote(self._api_key)}" if self._api_key else ws
+
+    def pool_stats(self):
+        """Connection statistics for this client's backend host."""
+        stats = self._transport.stats(self.base_url)
+        return stats[0] if stats else None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        kind: str = "default",
+        safe: bool | None = None,
+        stream: bool = False,
+        **kw,
+    ) -> httpx.Response:
+        """Issue a request on the shared pool with this client's auth and the
+        timeout configured for *kind* (``command``, ``upload``, ``export``...).
+
+        Transient failures are retried per :mod:`cli.retry`; *safe* marks the
+        request idempotent (defaults to the HTTP method's semantics). With
+        *stream* the body is left unread — the caller must ``aclose()`` the
+        response — and the latency recorded is the time to the headers.
+        """
+        if safe is None:
+            safe = method in _SAFE_METHODS
+        headers = {**self._headers, **(kw.pop("headers", None) or {})}
+        if method not in ("GET", "HEAD"):
+            # One key per logical request, reused by every retry of it.
+            headers.setdefault("Idempotency-Key", os.urandom(16).hex())
+        kw.setdefault("timeout", self._transport.config.timeout(kind))
+        policy, budget = self.retry_policy, self.retry_budget
+        budget.deposit()
+        attempt = 0
+        while True:
+            error: httpx.TransportError | None = None
+            response: httpx.Response | None = None
+            t0 = time.perf_counter()
+            try:
+                if stream:
+                    request = self._http.build_request(method, self._prefix + path, headers=headers, **kw)
+                    response = await self._http.send(request, stream=True)
+                else:
+                    response = await self._http.request(method, self._prefix + path, headers=headers, **kw)
+            except httpx.TransportError as exc:
+                error = exc
+            elapsed = time.perf_counter() - t0
+            if response is None:
+                self.metrics.observe(method, path, elapsed, ok=False)
+            else:
+                self.metrics.observe(
+                    method, path, elapsed, ok=response.status_code < 400,
+                    bytes_in=response.num_bytes_downloaded,
+                    bytes_out=int(response.request.headers.get("Content-Length", 0)),
+                )
+            if (
+                not is_retryable(error, response, safe)
+                or attempt + 1 >= policy.max_attempts
+                or not budget.withdraw()
+            ):
+                if error is not None:
+                    raise error
+                return response  # type: ignore[return-value]
+            delay = retry_after(response)
+            delay = policy.backoff(attempt) if delay is None else min(delay, policy.max_retry_after)
+            if stream and response is not None:
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _decode(r: httpx.Response):
+        return codec.for_content_type(r.headers.get("Content-Type")).decode(r.content)
+
+    async def _req(
+        self, method: str, path: str, kind: str = "default", safe: bool | None = None, **kw
+    ) -> dict:
+        r = await self._request(method, path, kind, safe, **kw)
+        r.raise_for_status()
+        return self._decode(r)
+
+    async def _cached_get(self, key: str, path: str, ttl: float, persist: bool = True, **kw):
+        """GET *path* through the metadata cache.
+
+        A fresh entry is returned without touching the network; a stale one is
+        revalidated with If-None-Match when the backend gave an ETag.
+        """
+        if not self._meta_bound:
+            # Scope the cache to this backend build; /health is cheap.
+            try:
+                info = await self.health()
+            except Exception:
+                info = {}
+            ident = info.get("device_id") or self.base_url
+            self._meta.bind(f"{ident}|{info.get('version', 'unknown')}")
+            self._meta_bound = True
+
+        entry = self._meta.get(key)
+        if entry is not None and time.time() - entry["stored"] < ttl:
+            return entry["data"]
+        headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+        r = await self._request("GET", path, headers=headers, **kw)
+        if r.status_code == 304 and entry is not None:
+            self._meta.touch(key)
+            return entry["data"]
         r.raise_for_status()
-        return r.json()
+        data = self._decode(r)
+        self._meta.put(key, data, r.headers.get("ETag"), persist=persist)
+        return data
+
+    def invalidate_metadata(self) -> None:
+        """Forget cached boards/paradigms/ports/command registries (memory and disk)."""
+        self._meta.clear()
 
     # ── Health ─────────────────────────────────────────────
     async def health(self):
@@ -54,49 +427,206 @@ class ReacherClient:
             body["paradigm"] = paradigm
         return await self._req("POST", "/api/sessions", json=body)
 
+    async def get_session(self, sid: str):
+        return await self._req("GET", f"/api/sessions/{sid}")
+
     async def destroy_session(self, sid: str):
         return await self._req("DELETE", f"/api/sessions/{sid}")
 
     async def reset_session(self, sid: str):
-        return await self._req("POST", f"/api/sessions/{sid}/reset")
+        return await self._req("POST", f"/api/sessions/{sid}/reset", safe=True)
 
     # ── Serial ─────────────────────────────────────────────
     async def list_ports(self):
-        return await self._req("GET", "/api/serial/ports")
+        return await self._cached_get(
+            "ports", "/api/serial/ports", METADATA_TTLS["ports"], persist=False
+        )
 
     async def connect_serial(self, sid: str):
         return await self._req("POST", f"/api/serial/{sid}/connect")
 
     async def disconnect_serial(self, sid: str):
-        return await self._req("POST", f"/api/serial/{sid}/disconnect")
+        return await self._req("POST", f"/api/serial/{sid}/disconnect", safe=True)
 
     # ── Firmware ───────────────────────────────────────────
     async def list_boards(self):
-        return await self._req("GET", "/api/firmware/boards")
+        return await self._cached_get("boards", "/api/firmware/boards", METADATA_TTLS["boards"])
 
     async def list_paradigms(self, board: str | None = None):
         params = {"board": board} if board else {}
-        return await self._req("GET", "/api/firmware/paradigms", params=params)
-
-    async def upload_firmware(self, sid: str, paradigm: str, board: str = "uno", hex_data: str | None = None):
-        body: dict = {"paradigm": paradigm, "board": board}
-        if hex_data:
-            body["hex_data"] = hex_data
-        return await self._req(
-            "POST",
-            f"/api/firmware/upload/{sid}",
-            json=body,
+        return await self._cached_get(
+            f"paradigms:{board or '*'}", "/api/firmware/paradigms",
+            METADATA_TTLS["paradigms"], params=params,
         )
 
+    async def upload_firmware(
+        self,
+        sid: str,
+        paradigm: str,
+        board: str = "uno",
+        hex_data: bytes | None = None,
+        force: bool = False,
+        sha256: str | None = None,
+    ):
+        """Flash *paradigm* onto *sid*'s board.
+
+        *hex_data* is the raw Intel HEX file; without it the backend flashes
+        its own copy. With it, the file's sha256 is compared to the hash in
+        the board's current ``firmware_info`` first and, on a match, nothing is
+        sent (unless *force*) and ``{"skipped": True, ...}`` is returned.
+        Otherwise the hex goes up as a multipart file with its hash alongside,
+        which the backend can record for the next comparison; a backend that
+        only takes JSON gets the old base64 body. Pass *sha256* when it is
+        already known (e.g. from :class:`cli.firmware.HexAsset`).
+        """
+        path = f"/api/firmware/upload/{sid}"
+        fields = {"paradigm": paradigm, "board": board}
+        if not hex_data:
+            return await self._req("POST", path, kind="upload", json=fields)
+
+        digest = sha256 or (await asyncio.to_thread(hashlib.sha256, hex_data)).hexdigest()
+        if not force:
+            current = await self.firmware_hash(sid)
+            if current == digest:
+                return {"skipped": True, "sha256": digest, **fields}
+        fields["sha256"] = digest
+        if self._multipart_upload is not False:
+            try:
+                resp = await self._req(
+                    "POST", path, kind="upload", data=fields,
+                    files={"hex_file": (f"{paradigm}_{board}.hex", hex_data,
+                                        "application/octet-stream")},
+                )
+            except httpx.HTTPStatusError as exc:
+                if not (_body_rejected(exc) or _route_missing(exc)):
+                    raise
+                self._multipart_upload = False
+            else:
+                self._multipart_upload = True
+                return resp
+        # A hex image runs to hundreds of KB; encode it off the event loop so
+        # the other sessions' streams keep flowing.
+        encoded = await asyncio.to_thread(base64.b64encode, hex_data)
+        body = {**fields, "hex_data": encoded.decode("ascii")}
+        return await self._req("POST", path, kind="upload", json=body)
+
+    async def firmware_hash(self, sid: str) -> str | None:
+        """sha256 of the hex last flashed to *sid*'s board, as the backend
+        reports it in ``firmware_info`` (None when unknown)."""
+        try:
+            cfg = await self.get_config(sid)
+        except httpx.HTTPError:
+            return None
+        info = cfg.get("firmware_info") if isinstance(cfg, dict) else None
+        if not isinstance(info, dict):
+            return None
+        for key in _FIRMWARE_HASH_KEYS:
+            if info.get(key):
+                return str(info[key]).lower()
+        return None
+
     # ── Hardware ───────────────────────────────────────────
     async def send_command(self, sid: str, code: int, value: int | None = None):
         body: dict = {"code": code}
         if value is not None:
             body["value"] = value
-        return await self._req("POST", f"/api/hardware/{sid}/command", json=body)
-
-    async def get_commands(self, sid: str):
-        return await self._req("GET", f"/api/hardware/{sid}/commands")
+        t0 = time.perf_counter()
+        resp = await self._req("POST", f"/api/hardware/{sid}/command", kind="command", json=body)
+        self.metrics.observe_command(code, time.perf_counter() - t0)
+        return resp
+
+    async def send_commands(
+        self,
+        sid: str,
+        commands: Iterable[tuple[int, int | None]],
+        max_in_flight: int = DEFAULT_PIPELINE_DEPTH,
+    ) -> list[CommandResult]:
+        """Send a whole command plan, returning one :class:`CommandResult` per command.
+
+        Uses the backend's bulk endpoint when it has one (a single round-trip).
+        Otherwise the plan is pipelined over the pooled connection: commands in
+        the same :func:`command_lane` are sent strictly in order, separate lanes
+        run concurrently (at most *max_in_flight* requests at a time). A failed
+        command is reported, not raised, and does not stop the rest of the plan.
+        """
+        plan = [(int(code), value) for code, value in commands]
+        if not plan:
+            return []
+
+        if self._bulk_commands is not False:
+            body = {"commands": [
+                {"code": c} if v is None else {"code": c, "value": v} for c, v in plan
+            ]}
+            t0 = time.perf_counter()
+            try:
+                resp = await self._req("POST", f"/api/hardware/{sid}/commands/batch", json=body)
+            except httpx.HTTPStatusError as exc:
+                if not _route_missing(exc):
+                    raise
+                self._bulk_commands = False
+            else:
+                self._bulk_commands = True
+                return self._batch_results(plan, resp, time.perf_counter() - t0)
+
+        results: list[CommandResult | None] = [None] * len(plan)
+        lanes: dict[int, list[int]] = {}
+        for i, (code, _value) in enumerate(plan):
+            lanes.setdefault(command_lane(code), []).append(i)
+        gate = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def _drain(indices: list[int]) -> None:
+            for i in indices:
+                code, value = plan[i]
+                async with gate:
+                    try:
+                        await self.send_command(sid, code, value)
+                    except Exception as exc:
+                        results[i] = CommandResult(code, value, False, str(exc))
+                    else:
+                        results[i] = CommandResult(code, value, True)
+
+        await asyncio.gather(*(_drain(ix) for ix in lanes.values()))
+        return results  # type: ignore[return-value]
+
+    def _batch_results(self, plan: list[tuple[int, int | None]], resp, elapsed: float) -> list[CommandResult]:
+        """Match a bulk response to *plan*, one ``{"ok": bool, "error": ...}`` per command.
+
+        Only an explicit ``ok`` counts as acknowledged: the scheduler caches
+        acknowledged values, so a missing, short or malformed result list marks
+        the unmatched commands failed. The batch already reached the backend,
+        so they are not re-sent one by one. Each acknowledged command is
+        recorded with its share of the round trip.
+        """
+        entries = resp.get("results") if isinstance(resp, dict) else None
+        if not isinstance(entries, list) or len(entries) != len(plan):
+            got = len(entries) if isinstance(entries, list) else "no"
+            error = f"bulk response had {got} results for {len(plan)} commands"
+            return [CommandResult(c, v, False, error) for c, v in plan]
+        share = elapsed / len(plan)
+        results = []
+        for (code, value), e in zip(plan, entries):
+            ok = e.get("ok") if isinstance(e, dict) else None
+            if not isinstance(ok, bool):
+                results.append(CommandResult(code, value, False, f"malformed bulk result: {e!r}"))
+            elif ok:
+                self.metrics.observe_command(code, share)
+                results.append(CommandResult(code, value, True))
+            else:
+                results.append(CommandResult(code, value, False, str(e.get("error") or "failed")))
+        return results
+
+    async def get_commands(self, sid: str, paradigm: str | None = None):
+        """Command registry for the session's paradigm.
+
+        The registry depends only on the paradigm, so passing it lets every
+        session running that paradigm share one cached copy.
+        """
+        if not paradigm:
+            return await self._req("GET", f"/api/hardware/{sid}/commands")
+        return await self._cached_get(
+            f"commands:{paradigm.lower()}", f"/api/hardware/{sid}/commands",
+            METADATA_TTLS["commands"],
+        )
 
     async def get_config(self, sid: str):
         return await self._req("GET", f"/api/hardware/{sid}/config")
@@ -106,7 +636,7 @@ class ReacherClient:
         return await self._req("POST", f"/api/program/{sid}/start")
 
     async def stop_program(self, sid: str):
-        return await self._req("POST", f"/api/program/{sid}/stop")
+        return await self._req("POST", f"/api/program/{sid}/stop", safe=True)
 
     async def pause_program(self, sid: str):
         return await self._req("POST", f"/api/program/{sid}/pause")
@@ -117,25 +647,211 @@ class ReacherClient:
     async def restart_program(self, sid: str):
         return await self._req("POST", f"/api/program/{sid}/restart")
 
-    async def set_limit(self, sid: str, limit_type: str, **kw):
-        return await self._req(
-            "POST", f"/api/program/{sid}/limit", json={"type": limit_type, **kw}
-        )
+    async def set_limit(self, sid: str, limit_type: str | None = None, **kw):
+        """Set the session limit; the type may be given positionally or as ``type=``."""
+        if limit_type is not None:
+            kw["type"] = limit_type
+        return await self._req("POST", f"/api/program/{sid}/limit", safe=True, json=kw)
 
     # ── Data ───────────────────────────────────────────────
     async def get_behavior(self, sid: str, since: int | None = None):
         params = {"since": since} if since is not None else {}
         return await self._req("GET", f"/api/data/{sid}/behavior", params=params)
 
+    async def behavior_count(self, sid: str) -> int:
+        """Number of behavior events recorded so far.
+
+        Reads the ``total`` of a one-event page. A backend whose pages carry no
+        ``total`` is counted from the events themselves, fetching them all when
+        it honoured ``limit``.
+        """
+        path = f"/api/data/{sid}/behavior"
+        page = await self._req("GET", path, params={"since": 0, "limit": 1})
+        total = page.get("total") if isinstance(page, dict) else None
+        if isinstance(total, int) and not isinstance(total, bool):
+            return total
+        events = page.get("data", page.get("events", [])) if isinstance(page, dict) else page
+        if len(events) <= 1:
+            page = await self._req("GET", path, params={"since": 0})
+            events = page.get("data", page.get("events", [])) if isinstance(page, dict) else page
+        return len(events)
+
+    async def iter_behavior(
+        self,
+        sid: str,
+        since: int = 0,
+        limit: int | None = None,
+        tail: int | None = None,
+        page_size: int = BEHAVIOR_PAGE,
+    ) -> AsyncIterator[dict]:
+        """Yield behavior events one at a time, fetching them page by page.
+
+        Pages are requested from the ``since`` cursor with a ``limit``; an
+        NDJSON response (``application/x-ndjson``) is parsed line by line as it
+        arrives, a JSON ``{data, total, next_cursor?}`` page as a whole. At most
+        *limit* events are yielded; *tail* yields only the last *tail* events.
+        Backends that ignore ``limit`` still work — the first page is simply
+        everything after *since*.
+
+        Each page's response is open while its events are being yielded. A
+        consumer that may stop early should iterate inside
+        ``contextlib.aclosing(...)``, so the connection goes back to the pool
+        straight away instead of when the generator is garbage-collected.
+        """
+        if tail is not None:
+            since = max(since, await self.behavior_count(sid) - tail)
+            limit = tail if limit is None else min(limit, tail)
+        path = f"/api/data/{sid}/behavior"
+        headers = {"Accept": f"application/x-ndjson, {self._headers['Accept']}"}
+        cursor, sent = since, 0
+        while limit is None or sent < limit:
+            want = page_size if limit is None else min(page_size, limit - sent)
+            got, total, next_cursor = 0, None, None
+            r = await self._request(
+                "GET", path, params={"since": cursor, "limit": want}, headers=headers, stream=True,
+            )
+            try:
+                r.raise_for_status()
+                if "ndjson" in r.headers.get("Content-Type", ""):
+                    buf = bytearray()
+                    async for chunk in r.aiter_bytes():
+                        for event in codec.iter_ndjson(buf, chunk):
+                            yield event
+                            got += 1
+                            sent += 1
+                            if limit is not None and sent >= limit:
+                                return
+                    for event in codec.iter_ndjson(buf, b"\n"):
+                        yield event
+                        got += 1
+                        sent += 1
+                        if limit is not None and sent >= limit:
+                            return
+                    total = r.headers.get("X-Total-Count")
+                    next_cursor = r.headers.get("X-Next-Cursor")
+                else:
+                    await r.aread()
+                    page = self._decode(r)
+                    total = page.get("total")
+                    next_cursor = page.get("next_cursor")
+                    for event in page.get("data", page.get("events", [])):
+                        yield event
+                        got += 1
+                        sent += 1
+                        if limit is not None and sent >= limit:
+                            return
+            finally:
+                await r.aclose()
+            cursor = int(next_cursor) if next_cursor is not None else cursor + got
+            if got < want or (total is not None and cursor >= int(total)):
+                return
+
     async def get_frames(self, sid: str):
         return await self._req("GET", f"/api/data/{sid}/frames")
 
     async def export_zip(self, sid: str, **kw):
-        return await self._req("POST", f"/api/file/{sid}/export/zip", json=kw)
+        return await self._req("POST", f"/api/file/{sid}/export/zip", kind="export", json=kw)
+
+    async def download_export(
+        self,
+        sid: str,
+        file_path: str,
+        dest: str,
+        progress: Callable[[int, int | None], None] | None = None,
+        expected_sha256: str | None = None,
+        resume: bool = True,
+    ) -> DownloadResult:
+        """Stream an exported archive from the backend host to *dest*.
+
+        *file_path* is the backend-side path returned by :meth:`export_zip`;
+        *dest* is a local file or directory. Data goes to ``<dest>.part`` in
+        :data:`DOWNLOAD_CHUNK` pieces, so memory stays flat whatever the size,
+        and an interrupted download (this call's retries, or a later call)
+        resumes from the partial file with an HTTP Range request. Pass
+        ``resume=False`` when *file_path* was just re-exported: a partial file
+        left from the previous archive would not match it. The result is
+        checked against *expected_sha256* or the backend's digest header, and
+        failing both, against the ZIP's own member CRCs.
+
+        Raises :class:`DownloadUnsupported` when the backend predates
+        ``/api/file/{sid}/export/download``.
+        """
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(file_path) or "export.zip")
+        part = f"{dest}.part"
+        if not resume and os.path.exists(part):
+            os.remove(part)
+        path = f"/api/file/{sid}/export/download"
+        policy = self.retry_policy
+        resumed_from = os.path.getsize(part) if os.path.exists(part) else 0
+        advertised: str | None = None
+        attempt = 0
+        while True:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            headers = dict(self._headers)
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            try:
+                async with self._http.stream(
+                    "GET", self._prefix + path, params={"path": file_path}, headers=headers,
+                    timeout=self._transport.config.timeout("export"),
+                ) as r:
+                    if r.status_code == 416 and offset:
+                        break  # nothing left past our offset: the part file is complete
+                    if r.status_code in (404, 405):
+                        await r.aread()  # _route_missing looks at the error body
+                    try:
+                        r.raise_for_status()
+                    except httpx.HTTPStatusError as exc:
+                        # Backends older than the download endpoint only export
+                        # to their own disk.
+                        if _route_missing(exc):
+                            raise DownloadUnsupported(
+                                f"backend cannot serve downloads; the archive is at "
+                                f"{file_path} on the backend host") from exc
+                        raise
+                    if r.status_code != 206:
+                        offset = 0  # server ignored the range; start over
+                    advertised = _digest_header(r) or advertised
+                    length = r.headers.get("Content-Length")
+                    total = offset + int(length) if length is not None else None
+                    done = offset
+                    with open(part, "ab" if offset else "wb") as f:
+                        async for chunk in r.aiter_bytes(DOWNLOAD_CHUNK):
+                            f.write(chunk)
+                            done += len(chunk)
+                            if progress:
+                                progress(done, total)
+                    if total is not None and done < total:
+                        raise httpx.ReadError("export stream ended early")
+                    break
+            except httpx.TransportError:
+                attempt += 1
+                if attempt >= policy.max_attempts or not self.retry_budget.withdraw():
+                    raise
+                await asyncio.sleep(policy.backoff(attempt))
+
+        size = os.path.getsize(part)
+        digest = (await asyncio.to_thread(_sha256_of, part, size)).hexdigest()
+        expected = (expected_sha256 or advertised or "").lower() or None
+        if expected is not None:
+            if digest != expected:
+                os.remove(part)
+                raise ChecksumMismatch(f"sha256 {digest} != expected {expected}")
+            verified = "sha256"
+        elif file_path.lower().endswith(".zip"):
+            if not await asyncio.to_thread(_zip_crc_ok, part):
+                os.remove(part)
+                raise ChecksumMismatch("archive failed its ZIP CRC check")
+            verified = "zip-crc"
+        else:
+            verified = "none"
+        os.replace(part, dest)
+        return DownloadResult(dest, size, digest, resumed_from, verified)
 
     # ── File ───────────────────────────────────────────────
     async def set_file_config(self, sid: str, **kw):
-        return await self._req("POST", f"/api/file/{sid}/config", json=kw)
+        return await self._req("POST", f"/api/file/{sid}/config", safe=True, json=kw)
 
     # ── Lifecycle ──────────────────────────────────────────
     async def shutdown(self):
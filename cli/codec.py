@@ -0,0 +1,226 @@
+"""Wire encodings shared by ``ReacherClient`` and the monitor's WebSocket.
+
+JSON is always available, decoded by ``orjson`` when it is importable and by
+the stdlib otherwise; both accept ``bytes``, so REST bodies, NDJSON lines and
+WebSocket frames are decoded without an intermediate ``str``. MessagePack
+(``msgpack``) and CBOR (``cbor2``) are optional (``pip install
+labrynth[cli-fast]``, which also brings ``orjson``); when installed, the CLI
+offers them to the backend — via ``Accept`` on REST calls and WebSocket
+subprotocols on the event stream — and decodes whatever the backend actually
+sends back. A backend that knows only JSON keeps answering in JSON, so nothing
+changes until it opts in.
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    media_type: str
+    subprotocol: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+def _json_encode(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+_stdlib_decode = json.JSONDecoder().decode
+
+
+def stdlib_loads(data: str | bytes) -> Any:
+    """Stdlib fallback: decode UTF-8 and call the decoder directly, skipping
+    ``json.loads``'s type checks and encoding sniffing."""
+    if not isinstance(data, str):
+        data = bytes(data).decode()
+    return _stdlib_decode(data)
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    json_loads: Callable[[str | bytes], Any] = orjson.loads
+    json_dumps: Callable[[Any], bytes] = orjson.dumps
+else:
+    JSON_BACKEND = "stdlib"
+    json_loads = stdlib_loads
+    json_dumps = _json_encode
+
+# orjson raises its own JSONDecodeError, a ValueError subclass like the stdlib's.
+JSON = Codec("json", "application/json", "reacher.json", json_dumps, json_loads)
+
+CODECS: dict[str, Codec] = {}
+if msgpack is not None:
+    CODECS["msgpack"] = Codec(
+        "msgpack", "application/msgpack", "reacher.msgpack",
+        msgpack.packb, lambda b: msgpack.unpackb(b, raw=False),
+    )
+if cbor2 is not None:
+    CODECS["cbor"] = Codec("cbor", "application/cbor", "reacher.cbor", cbor2.dumps, cbor2.loads)
+CODECS["json"] = JSON
+
+# Alternate media types backends commonly send for the same encodings.
+_MEDIA_ALIASES = {"application/x-msgpack": "application/msgpack"}
+
+
+def preferred(wire: str = "auto") -> list[Codec]:
+    """Codecs to offer, best first. *wire* is ``auto`` (every installed
+    codec) or one codec name (that codec, then JSON)."""
+    if wire == "auto":
+        return list(CODECS.values())
+    if wire not in CODECS:
+        raise ValueError(f"wire encoding {wire!r} not available (installed: {', '.join(CODECS)})")
+    return [CODECS[wire]] if wire == "json" else [CODECS[wire], JSON]
+
+
+def accept_header(codecs: list[Codec]) -> str:
+    """``Accept`` value listing *codecs* with descending q-values."""
+    parts = []
+    for i, codec in enumerate(codecs):
+        q = round(1.0 - 0.1 * i, 1)
+        parts.append(codec.media_type if q >= 1.0 else f"{codec.media_type};q={q}")
+    return ", ".join(parts)
+
+
+def for_content_type(content_type: str | None) -> Codec:
+    """Codec for a response ``Content-Type`` (JSON when unknown or missing)."""
+    media = (content_type or "").split(";", 1)[0].strip().lower()
+    media = _MEDIA_ALIASES.get(media, media)
+    for codec in CODECS.values():
+        if codec.media_type == media:
+            return codec
+    return JSON
+
+
+def for_subprotocol(subprotocol: str | None) -> Codec:
+    """Codec the backend selected during the WebSocket handshake."""
+    for codec in CODECS.values():
+        if codec.subprotocol == subprotocol:
+            return codec
+    return JSON
+
+
+def decode_frame(raw: str | bytes, codec: Codec) -> Any:
+    """Decode one WebSocket message: text frames are JSON, binary frames use *codec*."""
+    if isinstance(raw, str):
+        return json_loads(raw)
+    return codec.decode(raw)
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:,.1f} KB" if n >= 1024 else f"{n} B"
+
+
+@dataclass
+class WireStats:
+    """What a WebSocket received on the wire against what it decoded.
+
+    ``wire_bytes`` is everything read from the socket after the handshake —
+    frame headers included, compressed when permessage-deflate was negotiated;
+    ``payload_bytes`` is the message payloads after inflating. Their ratio is
+    what compression saves on the link.
+    """
+
+    wire_bytes: int = 0
+    payload_bytes: int = 0
+    messages: int = 0
+    compression: str = "-"
+
+    def attach(self, ws) -> None:
+        """Count *ws*'s incoming bytes from now on and note what it negotiated."""
+        # websockets >= 14 keeps the extensions on the Sans-I/O protocol object.
+        extensions = getattr(ws, "extensions", None)
+        if extensions is None:
+            extensions = getattr(getattr(ws, "protocol", None), "extensions", None) or []
+        deflate = next((e for e in extensions if e.name == "permessage-deflate"), None)
+        if deflate is None:
+            self.compression = "none"
+        else:
+            bits = getattr(deflate, "remote_max_window_bits", None) or 15
+            self.compression = f"deflate, {bits}-bit window"
+        received = getattr(ws, "data_received", None)
+        if received is None:
+            return
+
+        def data_received(data, _received=received):
+            self.wire_bytes += len(data)
+            _received(data)
+
+        ws.data_received = data_received  # asyncio looks it up on every read
+
+    @property
+    def ratio(self) -> float:
+        return self.payload_bytes / self.wire_bytes if self.wire_bytes else 0.0
+
+    def summary(self) -> str:
+        if not self.messages:
+            return f"no messages yet ({self.compression})"
+        return (f"{_kb(self.wire_bytes)} on the wire, {_kb(self.payload_bytes)} decoded "
+                f"({self.ratio:.1f}x, {self.compression}), {self.messages} messages")
+
+
+async def ws_messages(ws, frame_codec: Codec, stats: WireStats | None = None) -> AsyncIterator[Any]:
+    """Decoded messages from a ``websockets`` connection until it closes cleanly.
+
+    On a JSON stream, websockets >= 13 can hand text frames over as raw bytes
+    (``recv(decode=False)``), skipping the UTF-8 → ``str`` copy before parsing.
+    Undecodable messages are skipped. *stats*, when given, counts the bytes.
+    """
+    from websockets.exceptions import ConnectionClosedOK
+
+    raw_text = frame_codec is JSON and "decode" in inspect.signature(ws.recv).parameters
+    if stats is not None:
+        stats.attach(ws)
+    while True:
+        try:
+            raw = await (ws.recv(decode=False) if raw_text else ws.recv())
+        except ConnectionClosedOK:
+            return
+        if stats is not None:
+            stats.messages += 1
+            stats.payload_bytes += len(raw) if isinstance(raw, bytes) else len(raw.encode())
+        try:
+            msg = decode_frame(raw, frame_codec)
+        except ValueError:
+            continue
+        yield msg
+
+
+def iter_ndjson(buffer: bytearray, chunk: bytes):
+    """Feed *chunk* into *buffer* and yield each complete NDJSON record.
+
+    Records are decoded straight from the byte slice; a trailing partial line
+    stays in *buffer* for the next chunk (pass ``b"\n"`` to flush it).
+    """
+    buffer += chunk
+    start = 0
+    while True:
+        end = buffer.find(b"\n", start)
+        if end < 0:
+            break
+        line = bytes(buffer[start:end]).strip()
+        start = end + 1
+        if line:
+            yield json_loads(line)
+    del buffer[:start]
@@ -0,0 +1,428 @@
+"""One-shot subcommands: ``reacher-cli sessions``, ``cmd``, ``start``, ``stop``,
+``export``, ``status``, ``stream`` and ``fleet``.
+
+Each one talks to an already-running backend, prints the result and exits —
+no TUI, no backend auto-start. This module is imported by ``cli.__main__`` to
+register the subparsers, so it imports nothing beyond the stdlib at module
+level; ``cli.client`` (and with it httpx) is loaded only once a subcommand is
+actually dispatched, and prompt_toolkit, websockets and the menu code never
+are (``stream`` loads websockets when it connects).
+``scripts/check-import-time.py`` keeps that footprint from creeping up.
+
+Output is one short line per item; ``--json`` prints the backend's response
+instead, for scripts. Exit status is 0 on success, 1 when the backend refuses
+or cannot be reached.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+ONE_SHOT = ("sessions", "cmd", "start", "stop", "export", "status", "stream", "fleet")
+
+
+def add_parsers(sub) -> None:
+    """Register the one-shot subcommands on *sub* (an argparse subparsers action)."""
+    p = sub.add_parser("sessions", help="List sessions on the backend")
+    _json_flag(p)
+
+    p = sub.add_parser("cmd", help="Send one or more hardware command codes to a session")
+    p.add_argument("sid", help="Session id")
+    p.add_argument("codes", nargs="+", type=int, metavar="CODE", help="Command code(s), e.g. 104")
+    p.add_argument("--value", type=int, default=None, help="Value sent with every code")
+    _json_flag(p)
+
+    for name, verb in (("start", "Start"), ("stop", "Stop")):
+        p = sub.add_parser(name, help=f"{verb} a session's program")
+        p.add_argument("sid", help="Session id")
+        _json_flag(p)
+
+    p = sub.add_parser("export", help="Export a session to ZIP (optionally download it)")
+    p.add_argument("sid", help="Session id")
+    p.add_argument("--download", metavar="DEST", default=None,
+                   help="Also download the archive to this file or directory")
+    _json_flag(p)
+
+    p = sub.add_parser("status", help="Backend health, or one session's state")
+    p.add_argument("sid", nargs="?", default=None, help="Session id (omit for backend health)")
+    _json_flag(p)
+
+    p = sub.add_parser("stream", help="Write a session's live events to stdout as JSON lines")
+    p.add_argument("sid", help="Session id")
+    p.add_argument("--type", action="append", dest="types", metavar="TYPE",
+                   help="Only messages of this type, e.g. event (repeatable; default: all)")
+    p.add_argument("--exit-on-stop", action="store_true",
+                   help="End the stream when the session's program stops")
+    p.add_argument("--batch-bytes", type=int, default=64 * 1024,
+                   help="Write to stdout once this much output is pending (default: 65536)")
+    p.add_argument("--flush-interval", type=float, default=0.05,
+                   help="Longest a line waits before being written, in seconds (default: 0.05)")
+
+    p = sub.add_parser("fleet", help="Every host's health and sessions (see --host/--hosts)")
+    fleet_sub = p.add_subparsers(dest="fleet_command", metavar="ACTION")
+    fp = fleet_sub.add_parser("status", help="Dashboard of hosts and sessions (the default)")
+    for q in (p, fp):
+        _fleet_flags(q)
+        q.add_argument("--watch", type=float, default=argparse.SUPPRESS, metavar="SECONDS",
+                       help="Redraw every SECONDS until interrupted")
+
+    fp = fleet_sub.add_parser("flash", help="Flash firmware to many ports/sessions in parallel")
+    fp.add_argument("--plan", metavar="FILE", default=None,
+                    help="TOML flash plan of targets and defaults (see cli/flash.py)")
+    fp.add_argument("--port", action="append", metavar="[HOST:]PORT",
+                    help="Flash the board on this serial port (repeatable)")
+    fp.add_argument("--session", action="append", metavar="[HOST:]SID",
+                    help="Flash an existing session's board (repeatable)")
+    fp.add_argument("--all-sessions", action="store_true",
+                    help="Flash every session on every host")
+    fp.add_argument("--board", default=None, help="Board for targets that don't set one (default: uno)")
+    fp.add_argument("--paradigm", default=None, help="Paradigm for targets that don't set one")
+    fp.add_argument("--parallel", type=int, default=None,
+                    help="Uploads at once per host (default: 4, or the plan's)")
+    fp.add_argument("--retries", type=int, default=None,
+                    help="Extra rounds that retry only failed targets (default: 1)")
+    fp.add_argument("--force", action="store_true", help="Flash even when the board already has the hex")
+    fp.add_argument("--keep-sessions", action="store_true",
+                    help="Keep the sessions opened for --port targets")
+    _fleet_flags(fp)
+
+    bp = fleet_sub.add_parser("broadcast", help="Apply a preset, start, stop or reset many sessions at once")
+    bp.add_argument("op", choices=("preset", "start", "stop", "reset"), help="Operation")
+    bp.add_argument("--preset", default=None, help="Preset key, for the preset operation")
+    bp.add_argument("--session", action="append", metavar="[HOST:]SID",
+                    help="Target this session (repeatable)")
+    bp.add_argument("--all-sessions", action="store_true", help="Target every session on every host")
+    bp.add_argument("--state", default=None,
+                    help="Only sessions in this state, e.g. idle or running")
+    _fleet_flags(bp)
+
+
+def _json_flag(parser) -> None:
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON response")
+
+
+def _fleet_flags(parser) -> None:
+    # SUPPRESS keeps a flag given before the action from being reset by the
+    # action's own parser, so both `fleet --json status` and `fleet status --json` work.
+    parser.add_argument("--timeout", type=float, default=argparse.SUPPRESS,
+                        help="Seconds each host gets per call (default: 5, or the hosts file's)")
+    parser.add_argument("--concurrency", type=int, default=argparse.SUPPRESS,
+                        help="Calls in flight across the fleet (default: 8, or the hosts file's)")
+    parser.add_argument("--json", action="store_true", default=argparse.SUPPRESS,
+                        help="Print the raw JSON result")
+
+
+def run(args, base_url: str) -> int:
+    """Run the subcommand named by ``args.command``; returns the exit status."""
+    import asyncio
+
+    if args.command == "fleet":
+        return asyncio.run(_fleet(args, base_url))
+    return asyncio.run(_dispatch(args, base_url))
+
+
+async def _dispatch(args, base_url: str) -> int:
+    import httpx
+
+    from .client import ChecksumMismatch, DownloadUnsupported, ReacherClient
+
+    try:
+        api = ReacherClient(base_url=base_url, wire=args.wire)
+    except ValueError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    handler = _HANDLERS[args.command]
+    try:
+        return await handler(api, args)
+    except httpx.HTTPStatusError as exc:
+        print(f"ERROR: {exc.response.status_code} {_detail(exc.response)}", file=sys.stderr)
+        return 1
+    except httpx.TransportError as exc:
+        print(f"ERROR: backend not reachable at {base_url} ({exc.__class__.__name__}). "
+              "Start it with `reacher-cli` or `python -m reacher`.", file=sys.stderr)
+        return 1
+    except ChecksumMismatch as exc:
+        print(f"ERROR: download corrupt: {exc}", file=sys.stderr)
+        return 1
+    except DownloadUnsupported as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        await api.close()
+
+
+def _detail(response) -> str:
+    try:
+        body = response.json()
+    except ValueError:
+        return response.reason_phrase
+    if isinstance(body, dict) and body.get("detail"):
+        return str(body["detail"])
+    return response.reason_phrase
+
+
+def _emit(args, data, text: str | None = None) -> None:
+    if args.json or text is None:
+        print(json.dumps(data, indent=2, default=str))
+    else:
+        print(text)
+
+
+def _session_id(entry: dict) -> str:
+    return str(entry.get("session_id") or entry.get("id") or "?")
+
+
+async def _sessions(api, args) -> int:
+    resp = await api.list_sessions()
+    sessions = resp.get("sessions", []) if isinstance(resp, dict) else resp or []
+    if args.json:
+        _emit(args, resp)
+        return 0
+    if not sessions:
+        print("No sessions.")
+        return 0
+    for s in sessions:
+        state = s.get("state") or s.get("status") or "-"
+        print(f"{_session_id(s):<12} {state:<10} {s.get('port') or '-':<14} "
+              f"{s.get('paradigm') or '-'}")
+    return 0
+
+
+async def _cmd(api, args) -> int:
+    if len(args.codes) == 1:
+        resp = await api.send_command(args.sid, args.codes[0], args.value)
+        _emit(args, resp, f"{args.codes[0]}: ok")
+        return 0
+    results = await api.send_commands(args.sid, [(c, args.value) for c in args.codes])
+    if args.json:
+        _emit(args, [{"code": r.code, "value": r.value, "ok": r.ok, "error": r.error}
+                     for r in results])
+    else:
+        for r in results:
+            print(f"{r.code}: ok" if r.ok else f"{r.code}: failed ({r.error})")
+    return 0 if all(r.ok for r in results) else 1
+
+
+async def _start(api, args) -> int:
+    _emit(args, await api.start_program(args.sid), f"{args.sid}: started")
+    return 0
+
+
+async def _stop(api, args) -> int:
+    _emit(args, await api.stop_program(args.sid), f"{args.sid}: stopped")
+    return 0
+
+
+async def _export(api, args) -> int:
+    resp = await api.export_zip(args.sid)
+    path = resp.get("file_path") if isinstance(resp, dict) else None
+    if not args.download:
+        _emit(args, resp, path)
+        return 0
+    if not path:
+        print("ERROR: backend did not report the archive path", file=sys.stderr)
+        return 1
+    # Just exported: a .part from an earlier run belongs to an older archive.
+    result = await api.download_export(args.sid, path, args.download, resume=False)
+    _emit(
+        args,
+        {**resp, "downloaded": result.path, "size": result.size,
+         "sha256": result.sha256, "verified": result.verified},
+        f"{result.path} ({result.size:,} bytes, sha256 {result.sha256[:12]}, "
+        f"verified: {result.verified})",
+    )
+    return 0
+
+
+async def _status(api, args) -> int:
+    if args.sid is None:
+        resp = await api.health()
+        text = None
+        if isinstance(resp, dict):
+            text = " ".join(f"{k}={v}" for k, v in resp.items() if not isinstance(v, (dict, list)))
+        _emit(args, resp, text)
+        return 0
+    resp = await api.get_session(args.sid)
+    text = None
+    if isinstance(resp, dict):
+        state = resp.get("state") or resp.get("status") or "-"
+        text = f"{args.sid}: {state}"
+    _emit(args, resp, text)
+    return 0
+
+
+async def _stream(api, args) -> int:
+    import os
+
+    from .stream import NdjsonSink, stream_events
+
+    sys.stdout.flush()
+    sink = NdjsonSink(sys.stdout.buffer, args.batch_bytes, args.flush_interval)
+    status = await stream_events(
+        api, args.sid, sink,
+        types=set(args.types) if args.types else None,
+        exit_on_stop=args.exit_on_stop,
+    )
+    if sink.closed:
+        # The reader went away; keep the interpreter's final stdout flush quiet.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return status
+
+
+async def _fleet(args, base_url: str) -> int:
+    from .fleet import Fleet, FleetConfigError, open_fleet
+
+    try:
+        fleet: Fleet = open_fleet(args, base_url)
+    except (FleetConfigError, ValueError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    try:
+        return await _FLEET_HANDLERS[args.fleet_command or "status"](fleet, args)
+    finally:
+        await fleet.close()
+
+
+async def _fleet_status(fleet, args) -> int:
+    import asyncio
+    import dataclasses
+
+    from .fleet import format_dashboard
+
+    while True:
+        snap = await fleet.snapshot()
+        if getattr(args, "json", False):
+            print(json.dumps(dataclasses.asdict(snap), default=str), flush=True)
+        else:
+            if getattr(args, "watch", None) and sys.stdout.isatty():
+                print("\x1b[H\x1b[2J", end="")
+            print("\n".join(format_dashboard(snap)), flush=True)
+        watch = getattr(args, "watch", None)
+        if not watch:
+            return 0 if snap.reachable == len(snap.hosts) else 1
+        try:
+            await asyncio.sleep(watch)
+        except asyncio.CancelledError:
+            return 130
+
+
+async def _fleet_flash(fleet, args) -> int:
+    from .flash import (
+        DEFAULT_PARALLEL,
+        DEFAULT_RETRIES,
+        FleetFlasher,
+        format_progress,
+        load_plan,
+        targets_for_sessions,
+        targets_from_args,
+    )
+    from .fleet import FleetConfigError
+
+    try:
+        targets, defaults = load_plan(args.plan, fleet) if args.plan else ([], {})
+        defaults = {**defaults, **{k: v for k, v in (("board", args.board),
+                                                     ("paradigm", args.paradigm)) if v}}
+        targets += targets_from_args(fleet, args.port, args.session, defaults)
+        if args.all_sessions:
+            snap = await fleet.snapshot()
+            down = [h.name for h in snap.hosts if not h.reachable]
+            if down:
+                print(f"WARNING: not flashing unreachable host(s): {', '.join(down)}", file=sys.stderr)
+            targets += targets_for_sessions(fleet, snap.sessions, defaults)
+    except FleetConfigError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    if not targets:
+        print("ERROR: nothing to flash (use --plan, --port, --session or --all-sessions)",
+              file=sys.stderr)
+        return 2
+
+    flasher = FleetFlasher(
+        fleet,
+        parallel=args.parallel or int(defaults.get("parallel", DEFAULT_PARALLEL)),
+        force=args.force or bool(defaults.get("force")),
+        keep_sessions=args.keep_sessions or bool(defaults.get("keep_sessions")),
+        on_progress=lambda r: print(format_progress(r), file=sys.stderr, flush=True),
+    )
+    retries = args.retries if args.retries is not None else int(defaults.get("retries", DEFAULT_RETRIES))
+    report = await flasher.run(targets, retries=retries)
+    if getattr(args, "json", False):
+        _emit(args, {
+            "wall_s": round(report.wall, 3),
+            "uploads_total_s": round(report.serial_time, 3),
+            "parallel": report.parallel,
+            "rounds": report.rounds,
+            "results": [{"host": r.target.host, "port": r.target.port, "session": r.target.sid,
+                         "paradigm": r.target.paradigm, "board": r.target.board,
+                         "ok": r.ok, "skipped": r.skipped, "error": r.error,
+                         "elapsed_s": round(r.elapsed, 3), "attempts": r.attempts}
+                        for r in report.results],
+        })
+    else:
+        for r in report.failed:
+            print(f"FAILED {r.target.label}: {r.error}")
+        print(report.summary())
+    return 0 if not report.failed else 1
+
+
+async def _fleet_broadcast(fleet, args) -> int:
+    from .broadcast import BroadcastTarget, broadcast, operation
+    from .flash import split_spec
+
+    try:
+        fn = operation(args.op, args.preset)
+    except (KeyError, ValueError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    # The snapshot supplies each session's paradigm (for presets) and state.
+    snap = await fleet.snapshot()
+    known = {(s.host, s.sid): s for s in snap.sessions}
+    if args.all_sessions:
+        picked = list(known)
+    else:
+        picked = [split_spec(fleet, spec) for spec in args.session or ()]
+    if args.state:
+        picked = [k for k in picked if k in known and known[k].state == args.state]
+    if not picked:
+        print("ERROR: no sessions selected (use --session or --all-sessions)", file=sys.stderr)
+        return 2
+    targets = []
+    for host, sid in picked:
+        entry = known.get((host, sid))
+        targets.append(BroadcastTarget(host, sid, paradigm=(entry.paradigm or None) if entry else None))
+
+    report = await broadcast(fleet, targets, args.op, fn)
+    if getattr(args, "json", False):
+        _emit(args, {
+            "op": report.op,
+            "wall_s": round(report.wall, 3),
+            "results": [{"host": r.target.host, "session": r.target.sid, "ok": r.ok,
+                         "detail": r.detail, "elapsed_s": round(r.elapsed, 3)}
+                        for r in report.results],
+        })
+    else:
+        for r in report.results:
+            status = "ok" if r.ok else "FAILED"
+            print(f"{r.target.label:<24} {status:<7} {r.elapsed * 1000:>6.0f} ms  {r.detail}")
+        print(report.summary())
+    return 0 if not report.failed else 1
+
+
+_FLEET_HANDLERS = {
+    "status": _fleet_status,
+    "flash": _fleet_flash,
+    "broadcast": _fleet_broadcast,
+}
+
+
+_HANDLERS = {
+    "sessions": _sessions,
+    "cmd": _cmd,
+    "start": _start,
+    "stop": _stop,
+    "export": _export,
+    "status": _status,
+    "stream": _stream,
+}
@@ -0,0 +1,172 @@
+"""Local firmware hex lookup shared by the TUI and headless runs.
+
+Hex files come from the installed reacher package. :class:`HexAssetCache`
+keeps each (paradigm, board) file in memory with its sha256, keyed by the
+file's mtime and size so a reinstalled reacher is picked up, and does every
+lookup, read and hash on a worker thread — preparing an upload never blocks
+the event loop (and with it the TUI and the WebSocket stream).
+
+Bundled builds ship ``hex/hex-manifest.json`` (written by ``build.py``, which
+parses every hex and checks it fits the board's flash). When a file has a
+manifest entry its size is checked against it — a truncated or swapped file is
+refused before it reaches a chamber. The manifest's sha256 is used instead of
+hashing the file again only while the file is no newer than the manifest; a
+file modified since is hashed, and refused if the hash no longer matches.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+BOARDS = ("uno", "mega")
+# Used when the backend can't be asked which paradigms it has.
+DEFAULT_PARADIGMS = ("fr", "pr", "vi", "omission", "pavlovian")
+
+MANIFEST_NAME = "hex-manifest.json"  # at the root of the hex tree (see build.py)
+
+
+class FirmwareMismatch(Exception):
+    """A local hex file does not match its build-manifest entry."""
+
+
+@dataclass(frozen=True)
+class HexAsset:
+    """One firmware image as read from disk."""
+
+    paradigm: str
+    board: str
+    path: str
+    data: bytes
+    sha256: str
+    mtime_ns: int
+    size: int
+    flash_bytes: int | None = None  # from the manifest, when there is one
+    verified: str = "hashed"  # "manifest" when the sha256 came from the manifest
+
+
+class HexAssetCache:
+    """In-memory hex images, revalidated against the file's mtime and size."""
+
+    def __init__(self):
+        self._assets: dict[tuple[str, str], HexAsset] = {}
+        self._paths: dict[tuple[str, str], str | None] = {}
+        # root -> (parsed manifest or None, manifest mtime_ns)
+        self._manifests: dict[str, tuple[dict | None, int]] = {}
+        self._loading: dict[tuple[str, str], asyncio.Future] = {}
+        self._uploader = None
+        self._uploader_lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    async def get(self, paradigm: str, board: str) -> HexAsset | None:
+        """The hex reacher ships for (*paradigm*, *board*), or None when
+        reacher or the file is unavailable (the backend then uses its own copy)."""
+        key = (paradigm, board)
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = self._loading[key] = asyncio.ensure_future(asyncio.to_thread(self._load, key))
+            pending.add_done_callback(lambda _f: self._loading.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def preload(self, combos) -> int:
+        """Load every (paradigm, board) in *combos* concurrently; returns how
+        many were found."""
+        assets = await asyncio.gather(*(self.get(p, b) for p, b in combos),
+                                      return_exceptions=True)
+        return sum(isinstance(a, HexAsset) for a in assets)
+
+    def clear(self) -> None:
+        self._assets.clear()
+        self._paths.clear()
+        self._manifests.clear()
+
+    def summary(self) -> str:
+        size = sum(a.size for a in self._assets.values())
+        return f"{len(self._assets)} hex files ({size:,} bytes), {self.hits} hits, {self.loads} loads"
+
+    # Runs on a worker thread.
+    def _load(self, key: tuple[str, str]) -> HexAsset | None:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self._assets.get(key)
+        if cached is not None and (cached.mtime_ns, cached.size) == (st.st_mtime_ns, st.st_size):
+            self.hits += 1
+            return cached
+        entry, manifest_mtime_ns = self._manifest_entry(path, key)
+        if entry is not None and entry.get("size") != st.st_size:
+            raise FirmwareMismatch(
+                f"{path} is {st.st_size:,} bytes but the build manifest says "
+                f"{entry.get('size'):,}; reinstall to restore it")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if entry is not None and st.st_mtime_ns <= manifest_mtime_ns:
+            asset = HexAsset(key[0], key[1], path, data, entry["sha256"], st.st_mtime_ns,
+                             st.st_size, entry.get("flash_bytes"), "manifest")
+        elif entry is not None:
+            # Touched since the manifest was written: same size is not enough.
+            digest = hashlib.sha256(data).hexdigest()
+            if digest != str(entry["sha256"]).lower():
+                raise FirmwareMismatch(
+                    f"{path} was modified after the build manifest and its sha256 "
+                    f"no longer matches; reinstall to restore it")
+            asset = HexAsset(key[0], key[1], path, data, digest, st.st_mtime_ns,
+                             st.st_size, entry.get("flash_bytes"))
+        else:
+            asset = HexAsset(key[0], key[1], path, data, hashlib.sha256(data).hexdigest(),
+                             st.st_mtime_ns, st.st_size)
+        self._assets[key] = asset
+        self.loads += 1
+        return asset
+
+    def _manifest_entry(self, path: str, key: tuple[str, str]) -> tuple[dict | None, int]:
+        """*key*'s manifest entry (or None) and the manifest's mtime_ns."""
+        root = os.path.dirname(os.path.dirname(path))  # <root>/<board>/<paradigm>.hex
+        if root not in self._manifests:
+            manifest_path = os.path.join(root, MANIFEST_NAME)
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    self._manifests[root] = (json.load(f), os.stat(manifest_path).st_mtime_ns)
+            except (OSError, ValueError):
+                self._manifests[root] = (None, 0)
+        manifest, mtime_ns = self._manifests[root]
+        if not isinstance(manifest, dict):
+            return None, 0
+        entry = manifest.get("boards", {}).get(key[1], {}).get(key[0])
+        return (entry if isinstance(entry, dict) and entry.get("sha256") else None), mtime_ns
+
+    def _path(self, key: tuple[str, str]) -> str | None:
+        if key not in self._paths:
+            with self._uploader_lock:  # preload resolves many keys at once
+                try:
+                    if self._uploader is None:
+                        from reacher.uploader import FirmwareUploader
+
+                        self._uploader = FirmwareUploader()
+                    self._paths[key] = self._uploader.get_hex_path(*key)
+                except Exception:
+                    self._paths[key] = None
+        return self._paths[key]
+
+
+_default: HexAssetCache | None = None
+
+
+def default_cache() -> HexAssetCache:
+    """The process-wide hex cache."""
+    global _default
+    if _default is None:
+        _default = HexAssetCache()
+    return _default
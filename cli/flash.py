@@ -0,0 +1,264 @@
+"""Fleet firmware flashing: many ports or sessions, several at a time.
+
+Bringing up a rack after a reacher pin bump means flashing every chamber.
+:class:`FleetFlasher` takes a list of :class:`FlashTarget` — a serial port or
+an existing session, on any host of a :class:`~cli.fleet.Fleet`, each with its
+board and paradigm — and runs the uploads concurrently, at most ``parallel``
+at a time per host (each host has its own USB hub; size it to that). Each hex
+is read once through the shared :class:`~cli.firmware.HexAssetCache`, and a
+board already running that hex is skipped unless ``force`` is set.
+
+A port target gets a temporary session (create → connect → upload) that is
+destroyed afterwards unless ``keep_sessions`` is set and the upload worked.
+Failed targets are retried, and only those, for ``retries`` more rounds. The
+report gives each target's outcome and time, plus the total wall time next to
+the sum of the upload times, which shows what the parallelism bought.
+
+Plan file (TOML), for ``reacher-cli fleet flash --plan``::
+
+    [defaults]
+    board = "uno"
+    paradigm = "fr"
+    parallel = 4                    # uploads at once per host
+    retries = 1                     # extra rounds for failed targets
+    force = false
+    keep_sessions = false
+
+    [[target]]
+    host = "rig-a"                  # optional; the first host by default
+    port = "/dev/ttyACM0"
+    paradigm = "pr"                 # overrides [defaults]
+
+    [[target]]
+    host = "rig-b"
+    session = "3f9c0a12"            # an existing session instead of a port
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .firmware import BOARDS, HexAssetCache, default_cache
+from .fleet import Fleet, FleetConfigError, describe_error
+
+DEFAULT_PARALLEL = 4
+DEFAULT_RETRIES = 1
+
+# Progress stages, in order; a result ends in "done", "skipped" or "failed".
+STAGES = ("queued", "session", "connecting", "uploading", "done", "skipped", "failed")
+
+
+@dataclass(frozen=True)
+class FlashTarget:
+    host: str
+    paradigm: str
+    board: str
+    port: str = ""
+    sid: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"{self.host}:{self.port or self.sid[:8]}"
+
+
+@dataclass
+class FlashResult:
+    target: FlashTarget
+    stage: str = "queued"
+    ok: bool = False
+    skipped: bool = False
+    error: str = ""
+    elapsed: float = 0.0  # of the last attempt
+    attempts: int = 0
+
+
+@dataclass
+class FlashReport:
+    results: list[FlashResult]
+    wall: float
+    parallel: int
+    rounds: int
+
+    @property
+    def failed(self) -> list[FlashResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def serial_time(self) -> float:
+        """Sum of the last attempt's time per target: the one-at-a-time cost."""
+        return sum(r.elapsed for r in self.results)
+
+    def summary(self) -> str:
+        flashed = sum(r.ok and not r.skipped for r in self.results)
+        skipped = sum(r.skipped for r in self.results)
+        speedup = self.serial_time / self.wall if self.wall else 0.0
+        return (f"{flashed} flashed, {skipped} already current, {len(self.failed)} failed "
+                f"of {len(self.results)} in {self.wall:.1f} s "
+                f"(uploads total {self.serial_time:.1f} s, {speedup:.1f}x at parallel "
+                f"{self.parallel}, {self.rounds} round(s))")
+
+
+class FleetFlasher:
+    """Concurrent, per-host-bounded firmware uploads with retry of failures."""
+
+    def __init__(
+        self,
+        fleet: Fleet,
+        parallel: int = DEFAULT_PARALLEL,
+        force: bool = False,
+        keep_sessions: bool = False,
+        on_progress: Callable[[FlashResult], None] | None = None,
+        hex_cache: HexAssetCache | None = None,
+    ):
+        self.fleet = fleet
+        self.parallel = max(1, parallel)
+        self.force = force
+        self.keep_sessions = keep_sessions
+        self.on_progress = on_progress
+        self.hex_cache = hex_cache or default_cache()
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    async def run(self, targets: list[FlashTarget], retries: int = DEFAULT_RETRIES) -> FlashReport:
+        results = [FlashResult(t) for t in targets]
+        t0 = time.perf_counter()
+        # Read every distinct hex once, up front and concurrently.
+        await self.hex_cache.preload({(t.paradigm, t.board) for t in targets})
+        rounds = 0
+        pending = results
+        while pending and rounds <= retries:
+            rounds += 1
+            for r in pending:
+                self._stage(r, "queued")
+            await asyncio.gather(*(self._flash(r) for r in pending))
+            pending = [r for r in results if not r.ok]
+        return FlashReport(results, time.perf_counter() - t0, self.parallel, rounds)
+
+    def _stage(self, r: FlashResult, stage: str) -> None:
+        r.stage = stage
+        if self.on_progress is not None:
+            self.on_progress(r)
+
+    async def _flash(self, r: FlashResult) -> None:
+        t = r.target
+        slots = self._slots.setdefault(t.host, asyncio.Semaphore(self.parallel))
+        async with slots:
+            api = self.fleet.client(t.host)
+            r.attempts += 1
+            r.error = ""
+            t0 = time.perf_counter()
+            sid, created = t.sid, False
+            try:
+                asset = await self.hex_cache.get(t.paradigm, t.board)
+                if not sid:
+                    self._stage(r, "session")
+                    resp = await api.create_session(t.port, t.paradigm)
+                    sid = resp.get("session_id") or resp.get("id", "")
+                    if not sid:
+                        raise RuntimeError(f"backend returned no session id: {resp}")
+                    created = True
+                    self._stage(r, "connecting")
+                    await api.connect_serial(sid)
+                self._stage(r, "uploading")
+                resp = await api.upload_firmware(
+                    sid, t.paradigm, t.board,
+                    hex_data=asset.data if asset else None,
+                    sha256=asset.sha256 if asset else None,
+                    force=self.force,
+                )
+                r.ok = True
+                r.skipped = bool(isinstance(resp, dict) and resp.get("skipped"))
+            except Exception as exc:
+                r.ok = False
+                r.error = describe_error(exc)
+            finally:
+                # A failed attempt's session is always dropped so a retry can
+                # open the port again.
+                if created and not (r.ok and self.keep_sessions):
+                    try:
+                        await api.destroy_session(sid)
+                    except Exception:
+                        pass  # best effort; the upload outcome is what gets reported
+                r.elapsed = time.perf_counter() - t0
+            self._stage(r, "skipped" if r.skipped else "done" if r.ok else "failed")
+
+
+def _target(fleet: Fleet, spec: dict, defaults: dict, where: str) -> FlashTarget:
+    host = spec.get("host") or next(iter(fleet.hosts))
+    if host not in fleet.hosts:
+        raise FleetConfigError(f"{where}: unknown host {host!r} (known: {', '.join(fleet.hosts)})")
+    paradigm = spec.get("paradigm") or defaults.get("paradigm")
+    board = spec.get("board") or defaults.get("board") or "uno"
+    if not paradigm:
+        raise FleetConfigError(f"{where}: no paradigm (set it on the target or in [defaults])")
+    if board not in BOARDS:
+        raise FleetConfigError(f"{where}: unknown board {board!r} (known: {', '.join(BOARDS)})")
+    port, sid = str(spec.get("port") or ""), str(spec.get("session") or "")
+    if bool(port) == bool(sid):
+        raise FleetConfigError(f"{where}: give exactly one of port or session")
+    return FlashTarget(host, paradigm, board, port=port, sid=sid)
+
+
+def load_plan(path: str, fleet: Fleet) -> tuple[list[FlashTarget], dict]:
+    """Parse a flash plan; returns ``(targets, defaults)``."""
+    from .fleet import tomllib
+
+    if tomllib is None:
+        raise FleetConfigError("reading TOML on Python 3.10 needs `tomli` (pip install labrynth[cli])")
+    try:
+        with open(os.path.expanduser(path), "rb") as f:
+            cfg = tomllib.load(f)
+    except OSError as exc:
+        raise FleetConfigError(f"cannot read {path}: {exc}") from exc
+    except tomllib.TOMLDecodeError as exc:
+        raise FleetConfigError(f"{path}: {exc}") from exc
+    defaults = cfg.get("defaults", {})
+    targets = [_target(fleet, spec, defaults, f"{path}: [[target]] #{i + 1}")
+               for i, spec in enumerate(cfg.get("target", []))]
+    return targets, defaults
+
+
+def split_spec(fleet: Fleet, spec: str) -> tuple[str, str]:
+    """``HOST:PORT`` / ``HOST:SID``, or a bare port or session id on the first host.
+
+    Only a known host name counts as a prefix, so ``COM3`` and ``/dev/ttyACM0``
+    pass through unchanged.
+    """
+    host, sep, rest = spec.partition(":")
+    if sep and host in fleet.hosts:
+        return host, rest
+    return next(iter(fleet.hosts)), spec
+
+
+def targets_from_args(fleet: Fleet, ports, sessions, defaults: dict) -> list[FlashTarget]:
+    """Targets for ``--port`` / ``--session`` specs."""
+    targets = []
+    for kind, specs in (("port", ports or ()), ("session", sessions or ())):
+        for spec in specs:
+            host, value = split_spec(fleet, spec)
+            targets.append(_target(fleet, {"host": host, kind: value}, defaults, f"--{kind} {spec}"))
+    return targets
+
+
+def targets_for_sessions(fleet: Fleet, sessions, defaults: dict) -> list[FlashTarget]:
+    """Targets for fleet sessions (:class:`~cli.fleet.FleetSession`); each keeps
+    its own paradigm unless *defaults* names one."""
+    return [
+        _target(fleet, {"host": s.host, "session": s.sid,
+                        "paradigm": defaults.get("paradigm") or s.paradigm},
+                defaults, f"session {s.host}:{s.sid}")
+        for s in sessions
+    ]
+
+
+def format_progress(r: FlashResult) -> str:
+    t = r.target
+    line = f"[{t.label}] {r.stage} {t.paradigm}/{t.board}"
+    if r.stage in ("done", "skipped", "failed"):
+        line += f" ({r.elapsed:.1f} s, attempt {r.attempts})"
+    if r.error:
+        line += f": {r.error}"
+    return line
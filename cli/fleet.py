@@ -0,0 +1,330 @@
+"""Many REACHER backends from one controller: ``--host`` / ``--hosts``.
+
+docs/multi-host-validation.md runs several REACHER hosts (typically a Pi per
+chamber) from one controller. :class:`Fleet` holds one ``ReacherClient`` per
+host — each with that host's API key and its own pooled connections — and fans
+calls out to all of them at once. A semaphore bounds how many calls are in
+flight across the fleet, and each call has its own deadline that starts only
+once it holds a slot, so a slow or unreachable host shows up as ``timeout`` in
+the dashboard instead of holding up the others.
+
+Hosts file (TOML)::
+
+    [defaults]
+    timeout = 5.0                   # seconds per host per call
+    concurrency = 8                 # calls in flight across the fleet
+
+    [[host]]
+    name = "rig-a"
+    url = "http://10.0.0.11:6229"
+    api_key_env = "RIG_A_KEY"       # or api_key = "..."
+
+    [[host]]
+    name = "rig-b"
+    url = "http://10.0.0.12:6229"
+
+A host without a key uses ``REACHER_API_KEY`` / ``~/.reacher/api_key``, as a
+single-backend CLI does. ``--host [NAME=]URL`` adds hosts on the command line.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from .client import ReacherClient
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    try:
+        import tomli as tomllib
+    except ModuleNotFoundError:
+        tomllib = None
+
+DEFAULT_HOST_TIMEOUT = 5.0
+DEFAULT_CONCURRENCY = 8
+
+
+class FleetConfigError(ValueError):
+    """The hosts file or a ``--host`` spec is invalid."""
+
+
+@dataclass(frozen=True)
+class Host:
+    name: str
+    url: str
+    api_key: str | None = field(default=None, repr=False)
+
+
+@dataclass
+class HostResult:
+    """Outcome of one fanned-out call on one host."""
+
+    host: str
+    ok: bool
+    value: Any = None
+    error: str = ""
+    elapsed: float = 0.0
+
+
+@dataclass
+class HostStatus:
+    name: str
+    url: str
+    reachable: bool
+    version: str = ""
+    device_id: str = ""
+    sessions: int = 0
+    latency: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class FleetSession:
+    host: str
+    sid: str
+    state: str
+    port: str = ""
+    paradigm: str = ""
+
+
+@dataclass
+class FleetSnapshot:
+    """Every host's health and sessions, gathered in one fan-out."""
+
+    hosts: list[HostStatus]
+    sessions: list[FleetSession]
+    elapsed: float
+    taken_at: float = field(default_factory=time.time)
+
+    @property
+    def reachable(self) -> int:
+        return sum(h.reachable for h in self.hosts)
+
+
+def describe_error(exc: Exception) -> str:
+    """One line for a failed call: the backend's ``detail`` when it sent one."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            detail = exc.response.json().get("detail")
+        except (ValueError, AttributeError):
+            detail = None
+        return f"HTTP {exc.response.status_code}: {detail or exc.response.reason_phrase}"
+    if isinstance(exc, httpx.TransportError):
+        return f"backend unreachable ({exc.__class__.__name__})"
+    return str(exc) or exc.__class__.__name__
+
+
+def parse_host(spec: str) -> Host:
+    """``NAME=URL`` or a bare ``URL`` (named after its host:port)."""
+    name, sep, url = spec.partition("=")
+    if not sep:
+        name, url = "", spec
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+    try:
+        parsed = httpx.URL(url)
+    except Exception as exc:
+        raise FleetConfigError(f"bad host {spec!r}: {exc}") from exc
+    if not parsed.host:
+        raise FleetConfigError(f"bad host {spec!r}: no hostname")
+    return Host(name.strip() or parsed.netloc.decode("ascii"), url.rstrip("/"))
+
+
+def load_hosts(path: str) -> tuple[list[Host], dict]:
+    """Parse a hosts file; returns ``(hosts, defaults)``."""
+    if tomllib is None:
+        raise FleetConfigError("reading TOML on Python 3.10 needs `tomli` (pip install labrynth[cli])")
+    try:
+        with open(os.path.expanduser(path), "rb") as f:
+            cfg = tomllib.load(f)
+    except OSError as exc:
+        raise FleetConfigError(f"cannot read {path}: {exc}") from exc
+    except tomllib.TOMLDecodeError as exc:
+        raise FleetConfigError(f"{path}: {exc}") from exc
+
+    hosts = []
+    for i, entry in enumerate(cfg.get("host", [])):
+        if not isinstance(entry, dict) or not entry.get("url"):
+            raise FleetConfigError(f"{path}: [[host]] #{i + 1} needs a url")
+        host = parse_host(f"{entry.get('name', '')}={entry['url']}")
+        key = entry.get("api_key")
+        if entry.get("api_key_env"):
+            key = os.getenv(entry["api_key_env"])
+            if not key:
+                raise FleetConfigError(
+                    f"{path}: host {host.name!r}: ${entry['api_key_env']} is not set")
+        hosts.append(Host(host.name, host.url, key))
+    defaults = cfg.get("defaults", {})
+    if not isinstance(defaults, dict):
+        raise FleetConfigError(f"{path}: [defaults] must be a table")
+    for key in ("timeout", "concurrency"):
+        val = defaults.get(key)
+        if val is not None and (isinstance(val, bool) or not isinstance(val, (int, float)) or val <= 0):
+            raise FleetConfigError(f"{path}: [defaults] {key} must be a positive number")
+    return hosts, defaults
+
+
+def resolve_hosts(hosts_file: str | None, specs: list[str] | None, default_url: str) -> tuple[list[Host], dict]:
+    """Hosts from ``--hosts`` and ``--host``; just *default_url* when neither is given."""
+    hosts, defaults = load_hosts(hosts_file) if hosts_file else ([], {})
+    hosts += [parse_host(spec) for spec in specs or ()]
+    if not hosts:
+        hosts = [Host("local", default_url)]
+    names = [h.name for h in hosts]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise FleetConfigError(f"duplicate host name(s): {', '.join(dupes)}")
+    return hosts, defaults
+
+
+def open_fleet(args, default_url: str, local: ReacherClient | None = None) -> Fleet:
+    """A :class:`Fleet` from parsed CLI arguments (``--hosts``, ``--host``,
+    and ``--timeout``/``--concurrency`` where the subcommand has them).
+
+    *local* is the TUI's own client: it joins the fleet (as ``local`` unless a
+    listed host has its URL) and stays owned by the caller.
+    """
+    hosts, defaults = resolve_hosts(args.hosts, args.host, default_url)
+    clients = {}
+    if local is not None:
+        url = local.base_url.rstrip("/")
+        mine = next((h for h in hosts if h.url == url), None)
+        if mine is None:
+            if any(h.name == "local" for h in hosts):
+                raise FleetConfigError("host name 'local' is reserved for the CLI's own backend")
+            mine = Host("local", url)
+            hosts.insert(0, mine)
+        clients[mine.name] = local
+    return Fleet(
+        hosts,
+        timeout=getattr(args, "timeout", None) or defaults.get("timeout", DEFAULT_HOST_TIMEOUT),
+        concurrency=int(getattr(args, "concurrency", None) or defaults.get("concurrency", DEFAULT_CONCURRENCY)),
+        wire=args.wire,
+        clients=clients,
+    )
+
+
+
+class Fleet:
+    """One ``ReacherClient`` per host, with bounded concurrent fan-out."""
+
+    def __init__(
+        self,
+        hosts: list[Host],
+        timeout: float = DEFAULT_HOST_TIMEOUT,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        wire: str = "auto",
+        clients: dict[str, ReacherClient] | None = None,
+    ):
+        self.hosts = {h.name: h for h in hosts}
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # Clients passed in belong to the caller and are not closed here.
+        self._borrowed = dict(clients or {})
+        self.clients: dict[str, ReacherClient] = {}
+        for h in hosts:
+            self.clients[h.name] = self._borrowed.get(h.name) or ReacherClient(
+                base_url=h.url, wire=wire, api_key=h.api_key)
+
+    def client(self, host: str) -> ReacherClient:
+        return self.clients[host]
+
+    async def call(
+        self,
+        host: str,
+        fn: Callable[[ReacherClient], Awaitable[Any]],
+        timeout: float | None = None,
+    ) -> HostResult:
+        """Run ``fn(client)`` for *host* in a fan-out slot, under its own deadline."""
+        async with self._slots:
+            t0 = time.perf_counter()
+            try:
+                value = await asyncio.wait_for(fn(self.clients[host]), timeout or self.timeout)
+            except asyncio.TimeoutError:
+                return HostResult(host, False, error="timeout", elapsed=time.perf_counter() - t0)
+            except httpx.TransportError:
+                return HostResult(host, False, error="unreachable", elapsed=time.perf_counter() - t0)
+            except Exception as exc:
+                return HostResult(host, False, error=describe_error(exc),
+                                  elapsed=time.perf_counter() - t0)
+            return HostResult(host, True, value, elapsed=time.perf_counter() - t0)
+
+    async def gather(
+        self,
+        fn: Callable[[ReacherClient], Awaitable[Any]],
+        hosts: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> list[HostResult]:
+        """``fn(client)`` on every host (or *hosts*) concurrently; one result each, in order."""
+        names = list(self.clients) if hosts is None else hosts
+        return list(await asyncio.gather(*(self.call(n, fn, timeout) for n in names)))
+
+    async def snapshot(self) -> FleetSnapshot:
+        """Health and session list of every host."""
+
+        async def probe(api: ReacherClient):
+            health, sessions = await asyncio.gather(api.health(), api.list_sessions())
+            return health, sessions
+
+        t0 = time.perf_counter()
+        results = await self.gather(probe)
+        statuses, rows = [], []
+        for r in results:
+            url = self.hosts[r.host].url
+            if not r.ok:
+                statuses.append(HostStatus(r.host, url, False, latency=r.elapsed, error=r.error))
+                continue
+            health, resp = r.value
+            health = health if isinstance(health, dict) else {}
+            entries = resp.get("sessions", []) if isinstance(resp, dict) else resp or []
+            for e in entries:
+                rows.append(FleetSession(
+                    host=r.host,
+                    sid=str(e.get("session_id") or e.get("id") or "?"),
+                    state=str(e.get("state") or e.get("status") or "-"),
+                    port=str(e.get("port") or ""),
+                    paradigm=str(e.get("paradigm") or ""),
+                ))
+            statuses.append(HostStatus(
+                r.host, url, True,
+                version=str(health.get("version", "")),
+                device_id=str(health.get("device_id", "")),
+                sessions=len(entries),
+                latency=r.elapsed,
+            ))
+        return FleetSnapshot(statuses, rows, time.perf_counter() - t0)
+
+    async def close(self) -> None:
+        for name, api in self.clients.items():
+            if name not in self._borrowed:
+                await api.close()
+
+
+def format_dashboard(snap: FleetSnapshot) -> list[str]:
+    """Plain-text dashboard lines, shared by ``reacher-cli fleet`` and the TUI."""
+    lines = [
+        f"{snap.reachable}/{len(snap.hosts)} hosts up, {len(snap.sessions)} sessions "
+        f"({snap.elapsed * 1000:.0f} ms)",
+        "",
+        f"{'HOST':<14}{'STATUS':<10}{'VERSION':<12}{'SESSIONS':>8}{'RTT':>9}  URL",
+    ]
+    for h in snap.hosts:
+        status = "up" if h.reachable else (h.error or "down")[:9]
+        sessions = str(h.sessions) if h.reachable else "-"
+        lines.append(f"{h.name[:13]:<14}{status:<10}{(h.version or '-')[:11]:<12}"
+                     f"{sessions:>8}{h.latency * 1000:>7.0f}ms  {h.url}")
+    if snap.sessions:
+        lines += ["", f"{'SESSION':<14}{'HOST':<14}{'STATE':<11}{'PARADIGM':<11}PORT"]
+        for s in snap.sessions:
+            lines.append(f"{s.sid[:13]:<14}{s.host[:13]:<14}{s.state[:10]:<11}"
+                         f"{(s.paradigm or '-')[:10]:<11}{s.port or '-'}")
+    return lines
@@ -0,0 +1,457 @@
+"""Headless, config-driven session runs: ``reacher-cli run session.toml``.
+
+Drives one session end to end through ``ReacherClient`` — no prompt_toolkit,
+no rendering — and logs every step as one JSON object per line on stderr, so
+chambers can be run from cron or a job scheduler. Example config::
+
+    backend = "http://localhost:6229"   # optional; defaults to --port
+
+    [session]
+    port = "/dev/ttyACM0"               # required
+    paradigm = "fr"
+    name = "rat12 day3"
+    notes = ""
+    filename = ""                       # passed to set_file_config when set
+    destination = ""
+
+    [firmware]
+    upload = true                       # needs session.paradigm
+    board = "uno"
+    force = false                       # flash even if the board already has this hex
+
+    [settings]
+    preset = "sa-high"                  # a key of cli.presets.PRESETS
+    [settings.commands]                 # explicit codes, sent after the preset
+    "1074" = 20000
+
+    [limits]                            # overrides the preset's limits
+    type = "Time"
+    time_limit = 3600
+
+    [run]
+    watchdog_grace = 120                # s past time_limit before forcing a stop
+    max_duration = 7200                 # hard cap in seconds (optional)
+    poll_interval = 10                  # s between session-state polls
+    destroy_session = true
+
+    [export]
+    zip = true
+    download = "~/reacher-data"         # optional local copy of the archive
+
+The run ends when the backend reports the session stopped (its limits were
+reached), when the watchdog deadline passes, or on SIGINT/SIGTERM; in every
+case the program is stopped and the export still runs. Exit status: 0 on
+success, 1 when a step failed, 2 for an invalid config, 130 when interrupted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+from .client import DownloadUnsupported, ReacherClient
+from .firmware import default_cache
+from .presets import PRESETS, compile_plan
+from .scheduler import CommandScheduler
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    try:
+        import tomli as tomllib
+    except ModuleNotFoundError:
+        tomllib = None
+
+DEFAULT_WATCHDOG_GRACE = 120.0
+DEFAULT_POLL_INTERVAL = 10.0
+# Event-stream reconnects without a message in between before giving up on
+# the WebSocket (state polling carries on).
+MAX_WS_RECONNECTS = 15
+
+_ENDED_STATES = frozenset({"stopped", "completed", "finished"})
+
+
+class ConfigError(ValueError):
+    """The run config is missing a required key or has a bad value."""
+
+
+class RunFailed(Exception):
+    """A run step failed; the message is already logged."""
+
+
+def load_config(path: str) -> dict:
+    """Parse and sanity-check a headless run config (TOML)."""
+    if tomllib is None:
+        raise ConfigError("reading TOML on Python 3.10 needs `tomli` (pip install labrynth[cli])")
+    try:
+        with open(path, "rb") as f:
+            cfg = tomllib.load(f)
+    except OSError as exc:
+        raise ConfigError(f"cannot read {path}: {exc}") from exc
+    except tomllib.TOMLDecodeError as exc:
+        raise ConfigError(f"{path}: {exc}") from exc
+
+    session = cfg.get("session")
+    if not isinstance(session, dict) or not session.get("port"):
+        raise ConfigError("[session] port is required")
+    if cfg.get("firmware", {}).get("upload") and not session.get("paradigm"):
+        raise ConfigError("[firmware] upload needs [session] paradigm")
+    preset = cfg.get("settings", {}).get("preset")
+    if preset is not None and preset not in PRESETS:
+        raise ConfigError(f"unknown preset {preset!r} (known: {', '.join(PRESETS)})")
+    commands = cfg.get("settings", {}).get("commands", {})
+    for code, value in commands.items():
+        if not str(code).isdigit() or not (value is None or isinstance(value, int)):
+            raise ConfigError(f"[settings.commands] {code} = {value!r}: codes and values must be integers")
+    return cfg
+
+
+class RunLog:
+    """Structured log lines: JSON objects (default) or ``key=value`` text."""
+
+    def __init__(self, stream: TextIO = sys.stderr, fmt: str = "json"):
+        self.stream = stream
+        self.fmt = fmt
+        self.context: dict[str, Any] = {}
+
+    def __call__(self, event: str, level: str = "info", **fields: Any) -> None:
+        record = {"ts": round(time.time(), 3), "level": level, "event": event,
+                  **self.context, **fields}
+        if self.fmt == "json":
+            line = json.dumps(record, separators=(",", ":"), default=str)
+        else:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.pop("ts")))
+            rest = " ".join(f"{k}={v}" for k, v in record.items() if k not in ("level", "event"))
+            line = f"{stamp} {level:<7} {event} {rest}".rstrip()
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+
+@dataclass
+class _Tally:
+    events: int = 0
+    infusions: int = 0
+    presses: int = 0
+    trials: int = 0
+
+    def add(self, event: dict) -> None:
+        # Same matching as ReacherCLI._handle_ws_message / pushEvent in the web UI.
+        self.events += 1
+        dev = str(event.get("device", "")).upper()
+        evt = str(event.get("event", "")).upper()
+        if dev in ("PUMP", "PUMP_1") and evt == "INFUSION":
+            self.infusions += 1
+        elif dev in ("RH_LEVER", "LEVER_RH", "LH_LEVER", "LEVER_LH") and "PRESS" in evt:
+            self.presses += 1
+        elif dev == "PAVLOV" and evt == "TRIAL_START":
+            self.trials += 1
+
+
+class HeadlessRun:
+    """One config-driven session, from creation to export."""
+
+    def __init__(self, config: dict, api: ReacherClient, log: RunLog):
+        self.cfg = config
+        self.api = api
+        self.log = log
+        self.sid: str | None = None
+        self.tally = _Tally()
+        self.program_start: float | None = None
+        self.wire_stats = None  # codec.WireStats once the event stream is open
+        self._ended = asyncio.Event()
+        self._interrupted = asyncio.Event()
+
+    # ── Steps ─────────────────────────────────────────────
+    async def run(self) -> int:
+        session = self.cfg["session"]
+        run_cfg = self.cfg.get("run", {})
+        self._install_signal_handlers()
+        status = 0
+        started = False
+        try:
+            await self._step("session_create", self._create_session)
+            if session.get("connect", True):
+                await self._step("serial_connect", lambda: self.api.connect_serial(self.sid))
+            if self.cfg.get("firmware", {}).get("upload"):
+                await self._step("firmware_upload", self._upload_firmware)
+            await self._step("configure", self._configure)
+            if self._interrupted.is_set():
+                self.log("interrupted", level="warning", before="program_start")
+                status = 130
+            elif run_cfg.get("start", True):
+                await self._step("program_start", self._start)
+                started = True
+                reason = await self._wait_for_end()
+                self.log("program_end", reason=reason, **self._counts())
+                if reason == "interrupted":
+                    status = 130
+        except RunFailed:
+            status = 1
+        finally:
+            if started and not self._ended.is_set():
+                await self._quietly("program_stop", lambda: self.api.stop_program(self.sid))
+            if self.sid and started and self.cfg.get("export", {}).get("zip", True):
+                try:
+                    await self._step("export", self._export)
+                except RunFailed:
+                    status = status or 1
+            if self.sid and run_cfg.get("destroy_session", True):
+                await self._quietly("session_destroy", lambda: self.api.destroy_session(self.sid))
+        wire = self.wire_stats
+        if wire is not None and wire.messages:
+            self.log("ws_wire", wire_bytes=wire.wire_bytes, payload_bytes=wire.payload_bytes,
+                     messages=wire.messages, compression=wire.compression)
+        self.log("run_done", status=status)
+        return status
+
+    async def _step(self, name: str, fn) -> Any:
+        t0 = time.perf_counter()
+        try:
+            result = await fn()
+        except RunFailed:
+            raise
+        except Exception as exc:
+            self.log(name, level="error", error=str(exc) or type(exc).__name__,
+                     seconds=round(time.perf_counter() - t0, 3))
+            raise RunFailed(name) from exc
+        fields = {k: v for k, v in result.items() if k not in ("ts", "level", "event", "seconds")} \
+            if isinstance(result, dict) else {}
+        self.log(name, seconds=round(time.perf_counter() - t0, 3), **fields)
+        return result
+
+    async def _quietly(self, name: str, fn) -> None:
+        try:
+            await self._step(name, fn)
+        except RunFailed:
+            pass
+
+    async def _create_session(self) -> dict:
+        s = self.cfg["session"]
+        resp = await self.api.create_session(s["port"], s.get("paradigm"))
+        self.sid = resp.get("session_id") or resp.get("id", "")
+        if not self.sid:
+            raise RuntimeError(f"backend returned no session id: {resp}")
+        self.log.context["sid"] = self.sid
+        return {"port": s["port"], "paradigm": s.get("paradigm")}
+
+    async def _upload_firmware(self) -> dict:
+        paradigm = self.cfg["session"]["paradigm"]
+        board = self.cfg.get("firmware", {}).get("board", "uno")
+        asset = await default_cache().get(paradigm, board)
+        resp = await self.api.upload_firmware(
+            self.sid, paradigm, board,
+            hex_data=asset.data if asset else None,
+            sha256=asset.sha256 if asset else None,
+            force=bool(self.cfg.get("firmware", {}).get("force")),
+        )
+        return {"paradigm": paradigm, "board": board, "local_hex": asset is not None,
+                "skipped": bool(isinstance(resp, dict) and resp.get("skipped"))}
+
+    async def _configure(self) -> dict:
+        s = self.cfg["session"]
+        settings = self.cfg.get("settings", {})
+        plan = None
+        if settings.get("preset"):
+            plan = compile_plan(settings["preset"], s.get("paradigm"),
+                                self.cfg.get("firmware", {}).get("board"))
+        commands = list(plan.commands) if plan else []
+        commands += [(int(code), value) for code, value in settings.get("commands", {}).items()]
+        # Paced through the token bucket so a long plan can't flood the board.
+        scheduler = CommandScheduler(self.api)
+        try:
+            results = await scheduler.submit_plan(self.sid, commands)
+        finally:
+            await scheduler.close()
+        failed = [f"{r.code}: {r.error}" for r in results if not r.ok]
+        if failed:
+            raise RuntimeError(f"{len(failed)} command(s) failed: {'; '.join(failed)}")
+
+        limits = {**(dict(plan.limits) if plan else {}), **self.cfg.get("limits", {})}
+        if limits:
+            await self.api.set_limit(self.sid, **limits)
+        file_cfg = {k: s[k] for k in ("filename", "destination", "notes") if s.get(k)}
+        if file_cfg:
+            await self.api.set_file_config(self.sid, **file_cfg)
+        return {"preset": settings.get("preset"), "commands": len(commands), "limits": limits}
+
+    async def _start(self) -> dict:
+        await self.api.start_program(self.sid)
+        self.program_start = time.time()
+        return {}
+
+    async def _export(self) -> dict:
+        s = self.cfg["session"]
+        payload = {
+            "session_name": s.get("name") or f"{(s.get('paradigm') or '').upper()} {s['port']}".strip(),
+            "notes": s.get("notes", ""),
+            "infusion_count": self.tally.infusions,
+            "press_count": self.tally.presses,
+            "trial_count": self.tally.trials,
+            "program_start_time": self.program_start,
+        }
+        resp = await self.api.export_zip(self.sid, **payload)
+        remote = resp.get("file_path") or resp.get("path")
+        fields: dict[str, Any] = {"file_path": remote}
+        dest = self.cfg.get("export", {}).get("download")
+        if dest and remote:
+            dest = os.path.expanduser(dest)
+            os.makedirs(dest, exist_ok=True)
+            try:
+                result = await self.api.download_export(self.sid, remote, dest, resume=False)
+            except DownloadUnsupported as exc:
+                # The export itself worked; it just stays on the backend host.
+                self.log("export_download", level="warning", error=str(exc))
+            else:
+                fields.update(local_path=result.path, bytes=result.size, sha256=result.sha256,
+                              checksum=result.verified)
+        return fields
+
+    # ── Waiting for the program to end ───────────────────
+    def _deadline(self) -> float | None:
+        run_cfg = self.cfg.get("run", {})
+        limits = {**self._preset_limits(), **self.cfg.get("limits", {})}
+        candidates = []
+        if run_cfg.get("max_duration"):
+            candidates.append(float(run_cfg["max_duration"]))
+        if limits.get("type") in ("Time", "Both") and limits.get("time_limit"):
+            grace = float(run_cfg.get("watchdog_grace", DEFAULT_WATCHDOG_GRACE))
+            candidates.append(float(limits["time_limit"]) + float(limits.get("delay") or 0) + grace)
+        return min(candidates) if candidates else None
+
+    def _preset_limits(self) -> dict:
+        preset = self.cfg.get("settings", {}).get("preset")
+        return dict(PRESETS[preset].get("limits", {})) if preset else {}
+
+    async def _wait_for_end(self) -> str:
+        deadline = self._deadline()
+        self.log("waiting", deadline_s=deadline)
+        watchers = [asyncio.ensure_future(self._watch_events()),
+                    asyncio.ensure_future(self._poll_state())]
+        ended = asyncio.ensure_future(self._ended.wait())
+        interrupted = asyncio.ensure_future(self._interrupted.wait())
+        try:
+            done, _ = await asyncio.wait({ended, interrupted}, timeout=deadline,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in (*watchers, ended, interrupted):
+                t.cancel()
+        if ended in done:
+            return "completed"
+        if interrupted in done:
+            return "interrupted"
+        self.log("watchdog_expired", level="warning", after_s=deadline)
+        return "watchdog"
+
+    def _on_message(self, msg: dict) -> None:
+        kind = msg.get("type", "")
+        data = msg.get("data", msg)
+        if kind == "event":
+            self.tally.add(data)
+        elif kind == "session_state":
+            state = data.get("state", "")
+            self.log("session_state", state=state)
+            if state in _ENDED_STATES:
+                self._ended.set()
+        elif kind in ("error", "kernel_error", "export_failed", "disconnect", "session_orphaned"):
+            self.log(kind, level="error", detail=data)
+        elif kind == "log":
+            self.log("backend_log", level=data.get("level", "info"), message=data.get("message"))
+
+    async def _watch_events(self) -> None:
+        try:
+            import websockets
+        except ImportError:
+            self.log("ws_unavailable", level="warning", detail="websockets not installed; polling only")
+            return
+        from . import codec
+
+        connect_kw = self.api.ws_connect_kwargs()
+        self.wire_stats = codec.WireStats()
+        attempt = 0
+        connected_once = False
+        while not self._ended.is_set():
+            error = "closed by backend"
+            try:
+                async with websockets.connect(self.api.ws_url(self.sid), **connect_kw) as ws:
+                    if connected_once:
+                        # Count what happened while we were disconnected.
+                        async with aclosing(self.api.iter_behavior(self.sid, since=self.tally.events)) as missed:
+                            async for event in missed:
+                                self.tally.add(event)
+                    connected_once = True
+                    frame_codec = codec.for_subprotocol(ws.subprotocol)
+                    async for msg in codec.ws_messages(ws, frame_codec, self.wire_stats):
+                        attempt = 0  # the link works; a later drop backs off afresh
+                        self._on_message(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+            # A clean close counts too: a backend that keeps accepting and
+            # closing must not get a tight reconnect-and-recover loop.
+            if self._ended.is_set():
+                return
+            attempt += 1
+            if attempt >= MAX_WS_RECONNECTS:
+                self.log("ws_gave_up", level="warning", attempts=attempt, detail="polling only")
+                return
+            delay = min(2.0 ** attempt, 30.0)
+            self.log("ws_disconnected", level="warning", error=error, retry_in=delay)
+            try:
+                await asyncio.wait_for(self._ended.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_state(self) -> None:
+        interval = float(self.cfg.get("run", {}).get("poll_interval", DEFAULT_POLL_INTERVAL))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                info = await self.api.get_session(self.sid)
+            except Exception as exc:
+                self.log("poll_failed", level="warning", error=str(exc))
+                continue
+            state = info.get("state") or info.get("status") if isinstance(info, dict) else None
+            if state in _ENDED_STATES:
+                self._ended.set()
+
+    def _counts(self) -> dict:
+        return {"events": self.tally.events, "infusions": self.tally.infusions,
+                "presses": self.tally.presses, "trials": self.tally.trials}
+
+    def _install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._interrupted.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl-C still raises KeyboardInterrupt
+
+
+async def run_headless(
+    config_path: str, base_url: str, log_format: str = "json", wire: str = "auto"
+) -> int:
+    """Entry point for ``reacher-cli run``; returns the process exit status."""
+    log = RunLog(fmt=log_format)
+    try:
+        cfg = load_config(config_path)
+    except ConfigError as exc:
+        log("config_invalid", level="error", error=str(exc), config=config_path)
+        return 2
+    try:
+        api = ReacherClient(base_url=cfg.get("backend", base_url), wire=wire)
+    except ValueError as exc:
+        log("config_invalid", level="error", error=str(exc), config=config_path)
+        return 2
+    log("run_begin", config=config_path, backend=api.base_url)
+    try:
+        return await HeadlessRun(cfg, api, log).run()
+    finally:
+        await api.close()
@@ -0,0 +1,96 @@
+"""Fixed-capacity monitor history with retention per line class.
+
+Every open session streams in the background, and an armed lick circuit can
+emit events for hours, so a session's monitor lines must not grow with the
+event rate. :class:`MonitorHistory` keeps one ring (a ``deque`` with
+``maxlen``) per class — behavior ``event`` lines, ``info`` lines (reconnects,
+splits, backend logs) and ``error`` lines — so a flood of events never pushes
+the last disconnect or error out of view. Appending is O(1), memory is bounded
+by the sum of the retentions, and the monitor's tail is read from the ends of
+the rings without walking them. Lines dropped to make room are counted per
+class for the monitor header.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from itertools import count, islice
+from typing import Iterator
+
+KINDS = ("event", "info", "error")
+
+# Lines kept per class and session.
+DEFAULT_RETENTION = {"event": 200, "info": 50, "error": 50}
+
+
+def parse_retention(specs: list[str] | None) -> dict[str, int]:
+    """``KIND=N`` specs (``--monitor-retention``) over :data:`DEFAULT_RETENTION`."""
+    retention = dict(DEFAULT_RETENTION)
+    for spec in specs or ():
+        kind, sep, value = spec.partition("=")
+        kind = kind.strip()
+        if not sep or kind not in KINDS:
+            raise ValueError(f"bad retention {spec!r}: expected KIND=N with KIND one of {', '.join(KINDS)}")
+        try:
+            n = int(value)
+        except ValueError:
+            raise ValueError(f"bad retention {spec!r}: {value!r} is not a number") from None
+        if n < 1:
+            raise ValueError(f"bad retention {spec!r}: must keep at least one line")
+        retention[kind] = n
+    return retention
+
+
+class MonitorHistory:
+    """Per-class ring buffers of ``(style, text)`` monitor lines."""
+
+    def __init__(self, retention: dict[str, int] | None = None):
+        self.retention = dict(retention or DEFAULT_RETENTION)
+        self._seq = count()
+        # Entries are (seq, style, text); seq restores the interleaving.
+        self._rings: dict[str, deque] = {k: deque(maxlen=n) for k, n in self.retention.items()}
+        self.evicted: dict[str, int] = dict.fromkeys(self.retention, 0)
+
+    def append(self, line: tuple[str, str], kind: str = "info") -> None:
+        ring = self._rings[kind]
+        if len(ring) == ring.maxlen:
+            self.evicted[kind] += 1
+        ring.append((next(self._seq), *line))
+
+    def tail(self, n: int) -> list[tuple[str, str]]:
+        """The last *n* lines across all classes, oldest first."""
+        if n <= 0:
+            return []
+        newest = [list(islice(reversed(ring), n))[::-1] for ring in self._rings.values()]
+        merged = list(heapq.merge(*newest))[-n:]
+        return [(style, text) for _, style, text in merged]
+
+    def resize(self, retention: dict[str, int]) -> None:
+        """Apply new retentions, keeping the newest lines of each class."""
+        for kind, n in retention.items():
+            ring = self._rings.get(kind, ())
+            dropped = max(0, len(ring) - n)
+            self._rings[kind] = deque(islice(ring, dropped, None), maxlen=n)
+            self.evicted[kind] = self.evicted.get(kind, 0) + dropped
+        self.retention.update(retention)
+
+    def clear(self) -> None:
+        for ring in self._rings.values():
+            ring.clear()
+        self.evicted = dict.fromkeys(self.retention, 0)
+
+    @property
+    def evicted_total(self) -> int:
+        return sum(self.evicted.values())
+
+    def evicted_summary(self) -> str:
+        """``"1,204 event, 3 info"`` — the classes that dropped lines."""
+        return ", ".join(f"{n:,} {kind}" for kind, n in self.evicted.items() if n)
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self._rings.values())
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        for _, style, text in heapq.merge(*self._rings.values()):
+            yield style, text
@@ -0,0 +1,168 @@
+"""Low-overhead request metrics for ``ReacherClient``.
+
+Latencies go into fixed log-spaced buckets (each ~19% wider than the last,
+50 µs to ~14 min), so recording is one ``log`` and a list increment, memory is
+constant, and percentiles are accurate to within a bucket. Requests are grouped
+by route — the method plus the path with session ids replaced by ``{id}`` —
+and hardware commands additionally by command code.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+_MIN = 50e-6
+_GROWTH = 2 ** 0.25
+_LOG_GROWTH = math.log(_GROWTH)
+_BUCKETS = 96  # _MIN * _GROWTH**96 ≈ 14 min
+
+# Path segments that are ids rather than route words (hex/uuid-ish or numeric).
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F-]{8,}|\d+)$")
+
+
+@lru_cache(maxsize=256)
+def route_of(method: str, path: str) -> str:
+    """``POST /api/hardware/4f1c2a9e/command`` → ``POST /api/hardware/{id}/command``."""
+    parts = ["{id}" if _ID_SEGMENT.match(p) else p for p in path.split("/")]
+    return f"{method} {'/'.join(parts)}"
+
+
+def _bucket(seconds: float) -> int:
+    if seconds <= _MIN:
+        return 0
+    return min(_BUCKETS - 1, int(math.log(seconds / _MIN) / _LOG_GROWTH) + 1)
+
+
+def _upper(index: int) -> float:
+    return _MIN * _GROWTH ** index
+
+
+@dataclass
+class Histogram:
+    """Log-bucketed latency histogram (seconds)."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * _BUCKETS)
+    count: int = 0
+    total: float = 0.0
+    min: float = math.inf
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[_bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float | None:
+        """Upper edge of the bucket holding the *q* quantile, clamped to the
+        observed min/max (None when empty)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(max(_upper(i), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+@dataclass
+class RouteStats:
+    latency: Histogram = field(default_factory=Histogram)
+    errors: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    def snapshot(self) -> dict:
+        return {**self.latency.snapshot(), "errors": self.errors,
+                "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
+
+
+def format_ms(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    ms = seconds * 1000
+    return f"{ms:.1f}" if ms < 10 else f"{ms:.0f}"
+
+
+def percentiles_line(h: Histogram) -> str:
+    """``p50 12 · p95 40 · p99 81 ms`` for menu suffixes."""
+    return (f"p50 {format_ms(h.percentile(0.5))} · p95 {format_ms(h.percentile(0.95))} · "
+            f"p99 {format_ms(h.percentile(0.99))} ms")
+
+
+class ClientMetrics:
+    """Per-route and per-command-code stats for one ``ReacherClient``."""
+
+    def __init__(self):
+        self.routes: dict[str, RouteStats] = {}
+        self.commands: dict[int, Histogram] = {}
+        self.command_latency = Histogram()  # every code together
+        self.started = time.time()
+
+    def route(self, method: str, path: str) -> RouteStats:
+        key = route_of(method, path)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        return stats
+
+    def observe(
+        self,
+        method: str,
+        path: str,
+        seconds: float,
+        ok: bool,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        stats = self.route(method, path)
+        stats.latency.observe(seconds)
+        if not ok:
+            stats.errors += 1
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+
+    def observe_command(self, code: int, seconds: float) -> None:
+        h = self.commands.get(code)
+        if h is None:
+            h = self.commands[code] = Histogram()
+        h.observe(seconds)
+        self.command_latency.observe(seconds)
+
+    def reset(self) -> None:
+        self.routes.clear()
+        self.commands.clear()
+        self.command_latency = Histogram()
+        self.started = time.time()
+
+    def snapshot(self) -> dict:
+        return {
+            "started": self.started,
+            "taken": time.time(),
+            "routes": {k: v.snapshot() for k, v in sorted(self.routes.items())},
+            "commands": {str(k): v.snapshot() for k, v in sorted(self.commands.items())},
+        }
@@ -0,0 +1,157 @@
+"""One multiplexed WebSocket per backend carrying many sessions' events.
+
+With one ``/ws/{sid}`` socket per session, a host running dozens of sessions
+costs dozens of sockets, handshakes and reconnect loops. :class:`SessionMux`
+instead keeps one connection to ``/ws`` and subscribes it to any number of
+sessions::
+
+    → {"type": "subscribe", "session_ids": ["3f9c…", "77d2…"]}
+    → {"type": "unsubscribe", "session_ids": ["77d2…"]}
+    ← {"type": "event", "session_id": "3f9c…", "data": {...}}
+
+Server messages are the same as on ``/ws/{sid}``, tagged with ``session_id``
+(``sid`` is accepted too); :class:`SessionMux` hands each one to its session's
+handler. Control frames are always JSON; data frames use whatever encoding
+the connection negotiated (see :mod:`cli.codec`).
+
+Backends without the endpoint reject the handshake. :class:`SessionMux` then
+raises :class:`MuxUnsupported`, records that on the client
+(``ReacherClient.ws_mux``), and callers fall back to one socket per session.
+A reconnect re-subscribes every session, then calls ``on_reconnect`` for each
+one (the TUI uses it to recover missed events over REST) before reading.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+from . import codec
+
+MAX_RECONNECTS = 15
+
+# Handshake statuses meaning "no such endpoint here", not "try again later".
+_UNSUPPORTED_STATUSES = frozenset({400, 403, 404, 405, 426})
+
+
+class MuxUnsupported(Exception):
+    """The backend has no multiplexed WebSocket endpoint."""
+
+
+def _handshake_status(exc: Exception) -> int | None:
+    # websockets >= 14 raises InvalidStatus(response); older InvalidStatusCode(status_code).
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+class SessionMux:
+    """Subscribes one connection to many session ids and demultiplexes them."""
+
+    def __init__(
+        self,
+        api,
+        on_message: Callable[[str, dict], None],
+        on_reconnect: Callable[[str], Awaitable[None]] | None = None,
+        on_link: Callable[[bool, str], None] | None = None,
+    ):
+        self.api = api
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self.on_link = on_link  # (connected, detail) on every link change
+        self.sids: set[str] = set()
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.untagged = 0  # messages with no (known) session id
+        self.wire_stats = codec.WireStats()
+        self._ws = None
+
+    def subscribe(self, sid: str) -> None:
+        if sid not in self.sids:
+            self.sids.add(sid)
+            self._send({"type": "subscribe", "session_ids": [sid]})
+
+    def unsubscribe(self, sid: str) -> None:
+        if sid in self.sids:
+            self.sids.discard(sid)
+            self._send({"type": "unsubscribe", "session_ids": [sid]})
+
+    def _send(self, frame: dict) -> None:
+        # While disconnected there is nothing to do: the next connect
+        # subscribes the whole current set.
+        if self._ws is not None:
+            asyncio.ensure_future(self._send_now(frame))
+
+    async def _send_now(self, frame: dict) -> None:
+        try:
+            await self._ws.send(json.dumps(frame))
+        except Exception:
+            pass  # the read loop sees the broken link and reconnects
+
+    def _link(self, connected: bool, detail: str = "") -> None:
+        self.connected = connected
+        if self.on_link is not None:
+            self.on_link(connected, detail)
+
+    async def run(self) -> None:
+        """Connect, subscribe and dispatch until cancelled; reconnects with
+        backoff. Raises :class:`MuxUnsupported` when the backend has no
+        multiplexed endpoint."""
+        import websockets
+
+        connect_kw = self.api.ws_connect_kwargs()
+        attempt = 0
+        while True:
+            detail = "closed by backend"
+            try:
+                async with websockets.connect(self.api.ws_mux_url(), **connect_kw) as ws:
+                    self.api.ws_mux = True
+                    self._ws = ws
+                    self.connects += 1
+                    if self.sids:
+                        await ws.send(json.dumps({"type": "subscribe", "session_ids": sorted(self.sids)}))
+                    if self.connects > 1 and self.on_reconnect is not None:
+                        for sid in list(self.sids):
+                            await self.on_reconnect(sid)
+                    self._link(True, "reconnected" if self.connects > 1 else "connected")
+                    frame_codec = codec.for_subprotocol(ws.subprotocol)
+                    async for msg in codec.ws_messages(ws, frame_codec, self.wire_stats):
+                        attempt = 0  # the link works; a later drop backs off afresh
+                        self._dispatch(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                status = _handshake_status(exc)
+                if self.connects == 0 and status in _UNSUPPORTED_STATUSES:
+                    self.api.ws_mux = False
+                    raise MuxUnsupported(f"backend answered {status} on /ws") from exc
+                detail = str(exc) or type(exc).__name__
+            finally:
+                self._ws = None
+                self.connected = False
+            # A clean close counts too: a backend that keeps accepting and
+            # closing must not get a tight reconnect-and-recover loop.
+            attempt += 1
+            if attempt >= MAX_RECONNECTS:
+                self._link(False, f"failed after {attempt} attempts: {detail}")
+                raise ConnectionError(detail)
+            delay = min(2.0 ** (attempt - 1), 10.0)
+            self._link(False, f"disconnected, retrying in {delay:.0f}s...")
+            await asyncio.sleep(delay)
+
+    def _dispatch(self, msg) -> None:
+        self.messages += 1
+        sid = msg.get("session_id") or msg.get("sid") if isinstance(msg, dict) else None
+        if sid is None and isinstance(msg, dict) and isinstance(msg.get("data"), dict):
+            sid = msg["data"].get("session_id")
+        if sid not in self.sids:
+            self.untagged += 1
+            return
+        self.on_message(sid, msg)
+
+    def summary(self) -> str:
+        state = "up" if self.connected else "down"
+        return (f"1 socket ({state}) for {len(self.sids)} sessions, {self.messages} messages, "
+                f"{self.connects} connects, {self.untagged} unrouted")
@@ -0,0 +1,224 @@
+"""Preset tables and their compiled command plans.
+
+Kept free of prompt_toolkit so both the TUI (``app.py``) and non-interactive
+callers can apply presets. ``compile_plan`` turns a (preset, paradigm, board)
+triple into an immutable, validated :class:`CommandPlan` once and memoizes it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from .client import command_lane
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Tables
+# ═══════════════════════════════════════════════════════════════════════════
+
+PARADIGM_SETTING_CODES = {
+    "ratio": 201,
+    "step": 205,
+    "vi_interval": 204,
+    "om_interval": 203,
+    "trace_interval": 220,
+}
+
+# Paradigm settings each paradigm actually uses, as (PARADIGM_SETTING_CODES key,
+# paradigm_settings slot) pairs — mirrors the fields _paradigm_settings_menu
+# (and ParadigmSettings.tsx) shows. VI and OM share the single "interval" slot.
+PARADIGM_SETTING_KEYS: dict[str, tuple[tuple[str, str], ...]] = {
+    "fr": (("ratio", "ratio"), ("trace_interval", "trace_interval")),
+    "pr": (("ratio", "ratio"), ("step", "step"), ("trace_interval", "trace_interval")),
+    "vi": (("vi_interval", "interval"), ("trace_interval", "trace_interval")),
+    "omission": (("om_interval", "interval"),),
+    "pavlovian": (),
+}
+
+PRESET_COMMAND_MAP: dict[str, dict] = {
+    "rh-lever": {"arm": 1001, "disarm": 1000, "params": {"timeout": 1074, "ratio": 1075}},
+    "lh-lever": {"arm": 1301, "disarm": 1300, "params": {"timeout": 1374, "ratio": 1375}},
+    "primary-cue": {"arm": 301, "disarm": 300, "params": {"frequency": 371, "duration": 372}},
+    "secondary-cue": {"arm": 311, "disarm": 310, "params": {"frequency": 381, "duration": 382}},
+    "primary-pump": {"arm": 401, "disarm": 400, "params": {"duration": 472}},
+    "secondary-pump": {"arm": 411, "disarm": 410, "params": {"duration": 482}},
+    "laser": {"arm": 601, "disarm": 600, "params": {"frequency": 671, "duration": 672}},
+    "lick-circuit": {"arm": 501, "disarm": 500, "params": {}},
+    "microscope": {"arm": 901, "disarm": 900, "params": {}},
+}
+
+PRESETS: dict[str, dict] = {
+    "sa-high": {
+        "name": "SA High",
+        "paradigm": "fr",
+        "hardware": {
+            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
+            "secondary-cue": {"armed": False},
+            "primary-pump": {"armed": True, "duration": 2000},
+            "secondary-pump": {"armed": False},
+            "laser": {"armed": False, "frequency": 40, "duration": 5000},
+            "lick-circuit": {"armed": False},
+            "microscope": {"armed": False},
+        },
+        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
+        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 10, "delay": 60},
+    },
+    "sa-mid": {
+        "name": "SA Mid",
+        "paradigm": "fr",
+        "hardware": {
+            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
+            "secondary-cue": {"armed": False},
+            "primary-pump": {"armed": True, "duration": 2000},
+            "secondary-pump": {"armed": False},
+            "laser": {"armed": False},
+            "lick-circuit": {"armed": False},
+            "microscope": {"armed": False},
+        },
+        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
+        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 20, "delay": 60},
+    },
+    "sa-low": {
+        "name": "SA Low",
+        "paradigm": "fr",
+        "hardware": {
+            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
+            "secondary-cue": {"armed": False},
+            "primary-pump": {"armed": True, "duration": 2000},
+            "secondary-pump": {"armed": False},
+            "laser": {"armed": False},
+            "lick-circuit": {"armed": False},
+            "microscope": {"armed": False},
+        },
+        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
+        "limits": {"type": "Both", "time_limit": 3600, "infusion_limit": 40, "delay": 60},
+    },
+    "sa-extinction": {
+        "name": "SA Extinction",
+        "paradigm": "fr",
+        "hardware": {
+            "rh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "lh-lever": {"armed": True, "timeout": 20000, "ratio": 1},
+            "primary-cue": {"armed": True, "frequency": 8000, "duration": 1600},
+            "secondary-cue": {"armed": False},
+            "primary-pump": {"armed": False},
+            "secondary-pump": {"armed": False},
+            "laser": {"armed": False},
+            "lick-circuit": {"armed": False},
+            "microscope": {"armed": False},
+        },
+        "paradigm_settings": {"ratio": 1, "step": 1, "interval": 30000, "trace_interval": 0},
+        "limits": {"type": "Time", "time_limit": 3600, "infusion_limit": 30, "delay": 60},
+    },
+}
+
+# Used by dry runs until the client has measured real command latency.
+DEFAULT_COMMAND_LATENCY = 0.05
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Compiled plans
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+@dataclass(frozen=True)
+class CommandPlan:
+    """Everything a preset sends, pre-validated and in send order.
+
+    ``commands`` lists ``(code, value)`` with each device's arm/disarm ahead of
+    its params; ``arms`` maps a command index to the ``(device_id, armed)`` it
+    sets. Mappings are read-only views — plans are shared via the memo cache.
+    """
+
+    preset: str
+    name: str
+    paradigm: str | None
+    board: str | None
+    commands: tuple[tuple[int, int | None], ...]
+    arms: Mapping[int, tuple[str, bool]]
+    paradigm_settings: Mapping[str, int]
+    limits: Mapping[str, Any]
+
+    @property
+    def critical_path(self) -> int:
+        """Longest run of commands that must go out in order (one lane)."""
+        lanes: dict[int, int] = {}
+        for code, _value in self.commands:
+            lane = command_lane(code)
+            lanes[lane] = lanes.get(lane, 0) + 1
+        return max(lanes.values(), default=0)
+
+    def estimate_seconds(self, latency: float, bulk: bool = False) -> float:
+        """Expected wall time to apply the plan at *latency* seconds per command.
+
+        With the bulk endpoint the whole plan is one round-trip; pipelined, the
+        longest lane dominates. The limit call runs alongside either way.
+        """
+        if bulk:
+            steps = 1 if (self.commands or self.limits) else 0
+        else:
+            steps = max(self.critical_path, 1 if self.limits else 0)
+        return steps * latency
+
+
+def _int(preset_key: str, key: str, raw: Any) -> int:
+    if isinstance(raw, bool):
+        raise ValueError(f"preset {preset_key!r}: {key} must be an integer, got {raw!r}")
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"preset {preset_key!r}: {key} must be an integer, got {raw!r}") from None
+
+
+@lru_cache(maxsize=None)
+def compile_plan(preset_key: str, paradigm: str | None = None, board: str | None = None) -> CommandPlan:
+    """Compile ``PRESETS[preset_key]`` for *paradigm*/*board* (memoized).
+
+    *paradigm* defaults to the preset's own. Only the paradigm settings that
+    paradigm uses are emitted; an unrecognised paradigm falls back to every
+    setting whose key the preset names. No command code is board-specific
+    today, but *board* is part of the key so plans stay per-board if one
+    becomes so. Raises KeyError for an unknown preset and ValueError for a
+    non-integer value.
+    """
+    preset = PRESETS[preset_key]
+    paradigm = (paradigm or preset.get("paradigm") or "").lower() or None
+
+    commands: list[tuple[int, int | None]] = []
+    arms: dict[int, tuple[str, bool]] = {}
+    for dev_id, hw_cfg in preset["hardware"].items():
+        cmd_map = PRESET_COMMAND_MAP[dev_id]
+        armed = bool(hw_cfg.get("armed", False))
+        arms[len(commands)] = (dev_id, armed)
+        commands.append((cmd_map["arm"] if armed else cmd_map["disarm"], None))
+        for param_key, param_code in cmd_map.get("params", {}).items():
+            if param_key in hw_cfg:
+                commands.append((param_code, _int(preset_key, f"{dev_id}.{param_key}", hw_cfg[param_key])))
+
+    ps = preset.get("paradigm_settings", {})
+    settings = {k: _int(preset_key, k, v) for k, v in ps.items()}
+    keys = PARADIGM_SETTING_KEYS.get(paradigm or "")
+    if keys is None:
+        keys = tuple((k, k) for k in PARADIGM_SETTING_CODES)
+    for code_key, slot in keys:
+        if slot in settings:
+            commands.append((PARADIGM_SETTING_CODES[code_key], settings[slot]))
+
+    return CommandPlan(
+        preset=preset_key,
+        name=preset["name"],
+        paradigm=paradigm,
+        board=board,
+        commands=tuple(commands),
+        arms=MappingProxyType(arms),
+        paradigm_settings=MappingProxyType(settings),
+        limits=MappingProxyType(dict(preset.get("limits", {}))),
+    )
@@ -0,0 +1,107 @@
+"""Retry policy for ``ReacherClient`` requests.
+
+Requests are split into *safe* (idempotent — reads, and writes that set state
+to a value) and *unsafe* (``start``, ``split``, test pulses, uploads...). Safe
+requests are retried on any transient failure. Unsafe ones are retried only
+when the request provably never reached the backend (connect errors) or the
+backend explicitly refused it (429/503), so a lost response can never turn one
+key press into two splits. Every mutating request carries an
+``Idempotency-Key`` that stays the same across its retries, letting a backend
+that honours it drop duplicates.
+
+Backoff is exponential with full jitter, and retries draw from a shared budget
+so a dead backend costs a few seconds, not a retry storm per call.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+
+# Failures that happen before any byte of the request is on the wire.
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Failures after sending; the backend may or may not have acted.
+_MAYBE_SENT = (httpx.ReadTimeout, httpx.ReadError, httpx.WriteError,
+               httpx.WriteTimeout, httpx.RemoteProtocolError)
+
+_REFUSED = frozenset({429, 503})
+_GATEWAY = frozenset({502, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """Backoff schedule: attempt *n* sleeps ``uniform(0, min(cap, base * 2**n))``."""
+
+    max_attempts: int = 4
+    base: float = 0.2
+    cap: float = 3.0
+    max_retry_after: float = 10.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class RetryBudget:
+    """Token bucket shared by all requests of one client.
+
+    Each request deposits *ratio* tokens (up to *capacity*) and each retry
+    withdraws one, so retries stay around ``ratio`` of traffic once the
+    initial allowance is spent.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def summary(self) -> str:
+        return f"retries {self.retries}, budget exhausted {self.exhausted}x"
+
+
+def is_retryable(error: Exception | None, response: httpx.Response | None, safe: bool) -> bool:
+    """Whether a failed attempt may be repeated without risking a double-apply."""
+    if isinstance(error, _NOT_SENT):
+        return True
+    if isinstance(error, _MAYBE_SENT):
+        return safe
+    if response is not None:
+        if response.status_code in _REFUSED:
+            return True
+        if response.status_code in _GATEWAY:
+            return safe
+    return False
+
+
+def retry_after(response: httpx.Response | None) -> float | None:
+    """Seconds requested by a ``Retry-After`` header, if any."""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
@@ -0,0 +1,279 @@
+"""Client-side flow control for interactive hardware commands.
+
+Sits between ``ReacherCLI`` and ``ReacherClient``: writes are queued per
+session and drained through a token bucket sized to the Arduino serial link,
+so a burst of edits cannot flood the board. A write to a code that is still
+queued replaces the queued value (last value wins), and priority codes
+(disarm, plus the program stop/pause calls) skip the queue entirely. Whole
+command plans (presets) go through :meth:`CommandScheduler.submit_plan`,
+which draws from the same bucket and keeps queued writes from interleaving.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+from .client import CommandResult, ReacherClient
+
+# The firmware reads one command line at a time off a 115200-baud link and
+# acknowledges it before reading the next; ~20 commands/s with a burst of 10
+# stays well inside what the board's RX buffer absorbs.
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 10
+
+
+class CommandSuperseded(Exception):
+    """A queued command was dropped because a priority command made it moot."""
+
+
+class TokenBucket:
+    """Classic token bucket; *rate* tokens/s refill up to *capacity*."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0.0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume a token. Priority traffic may drive the balance negative,
+        which simply delays the queued writes behind it."""
+        self._refill()
+        self.tokens -= 1
+
+
+@dataclass
+class QueueStats:
+    """Counters for one session's command queue."""
+
+    depth: int = 0
+    peak_depth: int = 0
+    enqueued: int = 0
+    coalesced: int = 0
+    dispatched: int = 0
+    batches: int = 0
+    priority: int = 0
+    superseded: int = 0
+    failed: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    @property
+    def wait_avg(self) -> float:
+        return self.wait_total / self.dispatched if self.dispatched else 0.0
+
+    def summary(self) -> str:
+        return (f"Queue: depth {self.depth} (peak {self.peak_depth})  |  "
+                f"sent {self.dispatched} ({self.batches} plan batches), "
+                f"coalesced {self.coalesced}, "
+                f"priority {self.priority}  |  "
+                f"wait avg {self.wait_avg * 1000:.0f} ms, max {self.wait_max * 1000:.0f} ms")
+
+
+@dataclass
+class _Pending:
+    code: int
+    value: int | None
+    enqueued: float
+    future: asyncio.Future
+
+
+class _SessionQueue:
+    def __init__(self, rate: float, burst: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.pending: OrderedDict[int, _Pending] = OrderedDict()
+        self.wake = asyncio.Event()
+        # Held for each queued send and for a whole plan, so the two never
+        # interleave on the link. The priority lane does not take it.
+        self.sending = asyncio.Lock()
+        self.stats = QueueStats()
+        self.task: asyncio.Task | None = None
+
+
+def _retrieve(fut: asyncio.Future) -> None:
+    # Coalesced writers may all have gone away; don't warn about an
+    # exception nobody awaited.
+    if not fut.cancelled():
+        fut.exception()
+
+
+class CommandScheduler:
+    """Rate-limited, coalescing, per-session command queue.
+
+    *priority_codes* bypass the queue (they still draw a token, so they count
+    against the link budget). *supersedes* maps a priority code to the queued
+    codes it cancels — e.g. a disarm drops a still-queued arm for the same
+    device, whose awaiter gets :class:`CommandSuperseded`.
+    """
+
+    def __init__(
+        self,
+        api: ReacherClient,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        priority_codes: Iterable[int] = (),
+        supersedes: Mapping[int, Iterable[int]] | None = None,
+    ):
+        self.api = api
+        self.rate = rate
+        self.burst = burst
+        self.priority_codes = frozenset(priority_codes)
+        self.supersedes = {k: tuple(v) for k, v in (supersedes or {}).items()}
+        self._queues: dict[str, _SessionQueue] = {}
+
+    def _queue(self, sid: str) -> _SessionQueue:
+        q = self._queues.get(sid)
+        if q is None:
+            q = self._queues[sid] = _SessionQueue(self.rate, self.burst)
+        if q.task is None or q.task.done():
+            q.task = asyncio.ensure_future(self._drain(sid, q))
+        return q
+
+    async def submit(self, sid: str, code: int, value: int | None = None) -> Any:
+        """Queue a command and wait for the backend's response."""
+        q = self._queue(sid)
+        if code in self.priority_codes:
+            for victim in self.supersedes.get(code, ()):
+                p = q.pending.pop(victim, None)
+                if p is not None:
+                    q.stats.superseded += 1
+                    if not p.future.done():
+                        p.future.set_exception(CommandSuperseded(f"{victim} superseded by {code}"))
+            return await self.priority(sid, lambda: self.api.send_command(sid, code, value))
+
+        p = q.pending.get(code)
+        if p is not None:
+            p.value = value
+            q.stats.coalesced += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            fut.add_done_callback(_retrieve)
+            p = q.pending[code] = _Pending(code, value, time.monotonic(), fut)
+            q.stats.enqueued += 1
+            q.stats.peak_depth = max(q.stats.peak_depth, len(q.pending))
+            q.wake.set()
+        return await asyncio.shield(p.future)
+
+    async def submit_plan(
+        self, sid: str, commands: Iterable[tuple[int, int | None]]
+    ) -> list[CommandResult]:
+        """Send a command plan as one unit, paced by *sid*'s token bucket.
+
+        The plan's value replaces any still-queued write to the same code
+        (whose awaiter gets :class:`CommandSuperseded`), queued writes wait
+        until the plan has been sent, and priority calls still go ahead of it.
+        Each command draws a token; the plan goes out in chunks of at most the
+        bucket's burst, via :meth:`ReacherClient.send_commands`.
+        Returns one :class:`CommandResult` per command, like ``send_commands``.
+        """
+        plan = [(int(code), value) for code, value in commands]
+        if not plan:
+            return []
+        q = self._queue(sid)
+        for code, _value in plan:
+            p = q.pending.pop(code, None)
+            if p is not None:
+                q.stats.coalesced += 1
+                if not p.future.done():
+                    p.future.set_exception(CommandSuperseded(f"{code} superseded by a command plan"))
+
+        t0 = time.monotonic()
+        results: list[CommandResult] = []
+        async with q.sending:
+            while len(results) < len(plan):
+                # Wait for a full chunk's worth of tokens rather than trickling
+                # out one-command batches as the bucket refills.
+                n = min(len(plan) - len(results), q.bucket.capacity)
+                delay = q.bucket.delay()
+                if delay == 0 and q.bucket.tokens < n:
+                    delay = (n - q.bucket.tokens) / q.bucket.rate
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                chunk = plan[len(results):len(results) + n]
+                for _ in chunk:
+                    q.bucket.take()
+                waited = time.monotonic() - t0
+                q.stats.dispatched += n
+                q.stats.batches += 1
+                q.stats.wait_total += waited * n
+                q.stats.wait_max = max(q.stats.wait_max, waited)
+                chunk_results = await self.api.send_commands(sid, chunk)
+                q.stats.failed += sum(1 for r in chunk_results if not r.ok)
+                results.extend(chunk_results)
+        return results
+
+    async def priority(self, sid: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run *call* immediately, ahead of anything queued for *sid*."""
+        q = self._queue(sid)
+        q.bucket.take()
+        q.stats.priority += 1
+        return await call()
+
+    async def _drain(self, sid: str, q: _SessionQueue) -> None:
+        while True:
+            if not q.pending:
+                q.wake.clear()
+                await q.wake.wait()
+                continue
+            async with q.sending:
+                delay = q.bucket.delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                if not q.pending:
+                    continue  # a plan took them over while we waited
+                code, p = q.pending.popitem(last=False)
+                q.bucket.take()
+                waited = time.monotonic() - p.enqueued
+                q.stats.dispatched += 1
+                q.stats.wait_total += waited
+                q.stats.wait_max = max(q.stats.wait_max, waited)
+                try:
+                    resp = await self.api.send_command(sid, code, p.value)
+                except Exception as exc:
+                    q.stats.failed += 1
+                    if not p.future.done():
+                        p.future.set_exception(exc)
+                else:
+                    if not p.future.done():
+                        p.future.set_result(resp)
+
+    def stats(self, sid: str) -> QueueStats:
+        q = self._queues.get(sid)
+        if q is None:
+            return QueueStats()
+        q.stats.depth = len(q.pending)
+        return q.stats
+
+    def forget(self, sid: str) -> None:
+        """Stop the drain task for *sid* and fail anything still queued."""
+        q = self._queues.pop(sid, None)
+        if q is None:
+            return
+        if q.task is not None:
+            q.task.cancel()
+        for p in q.pending.values():
+            if not p.future.done():
+                p.future.cancel()
+        q.pending.clear()
+
+    async def close(self) -> None:
+        for sid in list(self._queues):
+            self.forget(sid)
@@ -0,0 +1,232 @@
+"""``reacher-cli stream <sid>``: a session's WebSocket events as JSON lines.
+
+Every message the backend pushes (events, frames, state changes, logs) is
+written to stdout as one compact JSON object per line, so it can be piped into
+``jq``, a database loader or a custom aggregator without running the TUI.
+
+Output is batched: lines accumulate in memory and are written when
+``batch_bytes`` pile up or ``flush_interval`` passes, whichever comes first, so
+a burst costs a handful of ``write`` calls rather than one per event while a
+quiet session still shows each event within the interval. Writes happen on a
+worker thread while the next batch fills; when the reader downstream is slower
+than the session, the next flush waits for the previous write, the WebSocket
+read loop stops pulling, and TCP flow control pushes back on the backend —
+memory stays bounded and nothing is dropped. Events missed across a reconnect
+are recovered from the REST API, as in the monitor screen.
+
+A closed pipe (``reacher-cli stream <sid> | head``) ends the stream quietly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import signal
+import sys
+import time
+from contextlib import aclosing
+
+from . import codec
+
+DEFAULT_BATCH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.05
+MAX_RECONNECTS = 15
+
+_ENDED_STATES = frozenset({"stopped", "completed", "finished"})
+
+
+class SinkClosed(Exception):
+    """The consumer closed stdout (``BrokenPipeError``)."""
+
+
+class NdjsonSink:
+    """Batched, back-pressured NDJSON writer over a binary file."""
+
+    def __init__(
+        self,
+        out,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self._out = out
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self._buf = bytearray()
+        self._inflight: asyncio.Future | None = None
+        # One flush at a time: the ticker and write() can both trigger one,
+        # and batches must reach the writer thread in order, one at a time.
+        self._flushing = asyncio.Lock()
+        self._ticker: asyncio.Task | None = None
+        self.closed = False
+        self.messages = 0
+        self.bytes = 0
+        self.flushes = 0
+        self.stalls = 0  # flushes that had to wait for the previous write
+        self.stalled = 0.0  # seconds spent waiting
+
+    async def write(self, msg) -> None:
+        if self.closed:
+            raise SinkClosed
+        self._buf += codec.json_dumps(msg)
+        self._buf += b"\n"
+        self.messages += 1
+        if self._ticker is None:
+            self._ticker = asyncio.ensure_future(self._tick())
+        if len(self._buf) >= self.batch_bytes:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Hand the pending batch to the writer thread, first waiting for the
+        previous batch — that wait is the back-pressure."""
+        async with self._flushing:
+            await self._wait_inflight()
+            if not self._buf or self.closed:
+                return
+            batch, self._buf = bytes(self._buf), bytearray()
+            self.bytes += len(batch)
+            self.flushes += 1
+            self._inflight = asyncio.ensure_future(asyncio.to_thread(self._write, batch))
+
+    async def aclose(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        try:
+            await self.flush()
+            async with self._flushing:
+                await self._wait_inflight()
+        except SinkClosed:
+            pass
+
+    async def _wait_inflight(self) -> None:
+        # Call with _flushing held. The write stays tracked until it has
+        # finished, and a cancelled waiter (the ticker, on aclose) must not
+        # cancel it: aclose still has to see it through.
+        pending = self._inflight
+        if pending is None:
+            return
+        if not pending.done():
+            self.stalls += 1
+            t0 = time.perf_counter()
+            try:
+                await asyncio.shield(pending)
+            finally:
+                self.stalled += time.perf_counter() - t0
+        self._inflight = None
+        try:
+            pending.result()
+        except BrokenPipeError:
+            self.closed = True
+            raise SinkClosed from None
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buf:
+                try:
+                    await self.flush()
+                except SinkClosed:
+                    return
+
+    def _write(self, batch: bytes) -> None:
+        self._out.write(batch)
+        self._out.flush()
+
+    def summary(self) -> str:
+        return (f"{self.messages} messages, {self.bytes:,} bytes in {self.flushes} writes; "
+                f"waited on the reader {self.stalls}x ({self.stalled:.2f} s)")
+
+
+async def stream_events(
+    api,
+    sid: str,
+    sink: NdjsonSink,
+    types: set[str] | None = None,
+    exit_on_stop: bool = False,
+) -> int:
+    """Copy *sid*'s WebSocket messages into *sink* until interrupted, the
+    reader goes away, or (with *exit_on_stop*) the session stops. Returns
+    the process exit status."""
+    try:
+        import websockets
+    except ImportError:
+        print("ERROR: websockets is not installed (pip install labrynth[cli])", file=sys.stderr)
+        return 1
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl-C still raises KeyboardInterrupt
+
+    connect_kw = api.ws_connect_kwargs()
+    wire_stats = codec.WireStats()
+    # While stdout is stalled the socket is not being read, so the closing
+    # handshake can't complete; don't sit out websockets' 10 s default.
+    connect_kw["close_timeout"] = 1.0
+    # Index of the next behavior event, so a reconnect can ask for what it missed.
+    next_event = await api.behavior_count(sid)
+
+    async def emit(msg) -> bool:
+        nonlocal next_event
+        kind = msg.get("type", "") if isinstance(msg, dict) else ""
+        if kind == "event":
+            next_event += 1
+        if types is None or kind in types:
+            await sink.write(msg)
+        if exit_on_stop and kind == "session_state":
+            data = msg.get("data", msg)
+            return isinstance(data, dict) and data.get("state") in _ENDED_STATES
+        return False
+
+    async def pump() -> int:
+        attempt = 0
+        connected_once = False
+        while True:
+            error = "closed by backend"
+            try:
+                async with websockets.connect(api.ws_url(sid), **connect_kw) as ws:
+                    if connected_once:
+                        # aclosing: returning early must hand the connection back now.
+                        async with aclosing(api.iter_behavior(sid, since=next_event)) as missed:
+                            async for entry in missed:
+                                if await emit({"type": "event", "data": entry}):
+                                    return 0
+                    connected_once = True
+                    frame_codec = codec.for_subprotocol(ws.subprotocol)
+                    async for msg in codec.ws_messages(ws, frame_codec, wire_stats):
+                        attempt = 0  # the link works; a later drop backs off afresh
+                        if await emit(msg):
+                            return 0
+            except (asyncio.CancelledError, SinkClosed):
+                raise
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+            # A clean close counts too: a backend that keeps accepting and
+            # closing must not get a tight reconnect-and-recover loop.
+            attempt += 1
+            if attempt >= MAX_RECONNECTS:
+                print(f"ERROR: WebSocket failed after {attempt} attempts: {error}", file=sys.stderr)
+                return 1
+            delay = min(2.0 ** (attempt - 1), 10.0)
+            print(f"WebSocket disconnected ({error}); retrying in {delay:.0f}s", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+    pumping = asyncio.ensure_future(pump())
+    stopping = asyncio.ensure_future(stop.wait())
+    status = 130
+    try:
+        await asyncio.wait({pumping, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        if pumping.done():
+            try:
+                status = pumping.result()
+            except SinkClosed:
+                status = 0
+    finally:
+        for t in (pumping, stopping):
+            t.cancel()
+        await asyncio.gather(pumping, stopping, return_exceptions=True)
+        await sink.aclose()
+        print(f"stream {sid}: {sink.summary()}; websocket: {wire_stats.summary()}", file=sys.stderr)
+    return status
@@ -0,0 +1,209 @@
+"""Process-wide HTTP connection pools for the REACHER CLI.
+
+Every ``ReacherClient`` talking to the same backend host shares one pooled
+``httpx.AsyncClient`` (keep-alive, optional HTTP/2), so several sessions or
+fleet views against one machine reuse connections instead of each opening
+their own. Pools are reference-counted and closed when the last client using
+them closes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+
+import httpx
+
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``). Only look for it
+# here — httpx imports it when an HTTP/2 pool is actually built.
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# Per-endpoint timeouts. Hardware commands should fail fast so the scheduler
+# can report them; firmware upload (avrdude) and export (zipping a session)
+# legitimately take minutes on a Pi.
+DEFAULT_TIMEOUTS = {
+    "default": httpx.Timeout(30.0, connect=5.0),
+    "command": httpx.Timeout(5.0, connect=3.0),
+    "upload": httpx.Timeout(300.0, connect=5.0),
+    "export": httpx.Timeout(300.0, connect=5.0),
+}
+
+
+@dataclass
+class TransportConfig:
+    """Pool settings applied to every backend host."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    timeouts: dict[str, httpx.Timeout] = field(default_factory=lambda: dict(DEFAULT_TIMEOUTS))
+    # WebSocket permessage-deflate. ``ws_window_bits`` (9-15) caps the LZ77
+    # window both ends compress with — less zlib memory per socket on a Pi, at
+    # some cost in ratio; None keeps websockets' own offer (12 bits).
+    ws_compression: bool = True
+    ws_window_bits: int | None = None
+
+    def timeout(self, kind: str) -> httpx.Timeout:
+        return self.timeouts.get(kind) or self.timeouts["default"]
+
+    def ws_options(self) -> dict:
+        """Compression keyword arguments for ``websockets.connect``."""
+        if not self.ws_compression:
+            return {"compression": None}
+        if self.ws_window_bits is None:
+            return {}
+        from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+
+        bits = self.ws_window_bits
+        # memLevel scales with the window as in websockets' default (12 → 5).
+        deflate = ClientPerMessageDeflateFactory(
+            server_max_window_bits=bits,
+            client_max_window_bits=bits,
+            compress_settings={"memLevel": max(1, min(bits - 7, 9))},
+        )
+        return {"compression": None, "extensions": [deflate]}
+
+
+@dataclass
+class PoolStats:
+    """Connection reuse counters for one backend host."""
+
+    host: str
+    http2: bool = False
+    clients: int = 0
+    requests: int = 0
+    connections: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests served on an already-open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.requests)
+
+    def summary(self) -> str:
+        proto = "HTTP/2" if self.http2 else "HTTP/1.1"
+        return (f"Pool {self.host} ({proto}): {self.requests} requests on "
+                f"{self.connections} connections ({self.reuse_ratio:.0%} reused)  |  "
+                f"in flight {self.in_flight} (peak {self.peak_in_flight})  |  "
+                f"{self.clients} client(s)")
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to count requests and new TCP connections."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, stats: PoolStats):
+        self._inner = inner
+        self._stats = stats
+
+    async def _trace(self, name: str, info: dict) -> None:
+        if name == "connection.connect_tcp.complete":
+            self._stats.connections += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        request.extensions["trace"] = self._trace
+        try:
+            return await self._inner.handle_async_request(request)
+        finally:
+            stats.in_flight -= 1
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+@dataclass
+class _Pool:
+    client: httpx.AsyncClient
+    stats: PoolStats
+    refs: int = 0
+
+
+def _host_key(base_url: str) -> str:
+    url = httpx.URL(base_url)
+    return f"{url.scheme}://{url.host}:{url.port or (443 if url.scheme == 'https' else 80)}"
+
+
+class TransportManager:
+    """Hands out one shared, tuned ``httpx.AsyncClient`` per backend host."""
+
+    def __init__(self, config: TransportConfig | None = None):
+        self.config = config or TransportConfig()
+        self._pools: dict[str, _Pool] = {}
+
+    def acquire(self, base_url: str) -> httpx.AsyncClient:
+        """Return the pooled client for *base_url*'s host (opening it if needed)."""
+        key = _host_key(base_url)
+        pool = self._pools.get(key)
+        if pool is None:
+            cfg = self.config
+            http2 = cfg.http2 and HTTP2_AVAILABLE
+            inner = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=cfg.max_connections,
+                    max_keepalive_connections=cfg.max_keepalive_connections,
+                    keepalive_expiry=cfg.keepalive_expiry,
+                ),
+                http2=http2,
+                # A plain-HTTP pool never handshakes TLS; don't spend ~35 ms
+                # loading the CA bundle for it (most backends are http://).
+                verify=key.startswith("https://"),
+            )
+            stats = PoolStats(host=key, http2=http2)
+            client = httpx.AsyncClient(
+                base_url=key,
+                timeout=cfg.timeout("default"),
+                transport=_CountingTransport(inner, stats),
+            )
+            pool = self._pools[key] = _Pool(client, stats)
+        pool.refs += 1
+        pool.stats.clients = pool.refs
+        return pool.client
+
+    async def release(self, base_url: str) -> None:
+        """Drop one reference to *base_url*'s pool, closing it with the last one."""
+        key = _host_key(base_url)
+        pool = self._pools.get(key)
+        if pool is None:
+            return
+        pool.refs -= 1
+        pool.stats.clients = max(pool.refs, 0)
+        if pool.refs <= 0:
+            del self._pools[key]
+            await pool.client.aclose()
+
+    def stats(self, base_url: str | None = None) -> list[PoolStats]:
+        """Pool statistics for one host, or for every open pool."""
+        if base_url is not None:
+            pool = self._pools.get(_host_key(base_url))
+            return [pool.stats] if pool else []
+        return [p.stats for p in self._pools.values()]
+
+    async def aclose(self) -> None:
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            await pool.client.aclose()
+
+
+_default: TransportManager | None = None
+
+
+def default_manager() -> TransportManager:
+    """The process-wide manager used by clients that don't bring their own."""
+    global _default
+    if _default is None:
+        _default = TransportManager()
+    return _default
+
+
+def configure(config: TransportConfig) -> TransportManager:
+    """Replace the process-wide manager's settings (call before any client exists)."""
+    global _default
+    _default = TransportManager(config)
+    return _default
@@ -34,7 +34,7 @@ PROJECT_ROOT = SPEC_DIR
 # Firmware hex ships as package data inside the installed reacher dependency.
 # Resolve it via build.py's shared helper so spec and orchestrator agree.
 sys.path.insert(0, SPEC_DIR)
-from build import resolve_reacher_hex_dir  # noqa: E402
+from build import HEX_MANIFEST, resolve_reacher_hex_dir  # noqa: E402
 
 HEX_DIR = resolve_reacher_hex_dir()
 
@@ -53,6 +53,13 @@ if HEX_DIR and os.path.isdir(HEX_DIR):
 else:
     print(f"WARNING: reacher firmware hex directory not found (resolved: {HEX_DIR})")
 
+# Sizes + hashes of those files (written by build.py's asset validation) →
+# hex/hex-manifest.json, where the CLI uploader looks for it.
+if os.path.isfile(HEX_MANIFEST):
+    datas.append((HEX_MANIFEST, "hex"))
+else:
+    print(f"WARNING: hex manifest not found at {HEX_MANIFEST} (run python build.py --check-hex)")
+
 # avrdude binary + companion DLLs + conf → avrdude/  (see labrynth.spec for why
 # the executable + libraries go through ``binaries`` rather than ``datas``).
 extra_binaries = []
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Compare wire encodings and JSON decoders for REACHER WebSocket traffic.
+
+Usage:
+    python scripts/bench-wire.py                         # synthetic lick + frame burst
+    python scripts/bench-wire.py session.ndjson          # recorded session (one WS message per line)
+    python scripts/bench-wire.py --messages 50000 --repeat 7
+
+For every codec ``cli.codec`` has available (JSON always; MessagePack/CBOR when
+``msgpack``/``cbor2`` are installed) this re-encodes the messages, then reports
+bytes on the wire and per-message decode cost, taking the best of ``--repeat``
+runs. A second table times the JSON decode paths on the same burst — the
+old ``json.loads(str)`` per frame against stdlib/``orjson`` decoding straight
+from bytes — i.e. event-burst throughput before and after the ``cli.codec``
+fast path. A recorded session is any NDJSON file of WebSocket messages, e.g.
+the output of ``reacher-cli stream <sid>``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cli import codec  # noqa: E402
+
+
+def synthetic(n: int, seed: int = 0) -> list[dict]:
+    """A lick-circuit/microscope burst shaped like the backend's WS messages."""
+    rng = random.Random(seed)
+    t = time.time()
+    msgs: list[dict] = []
+    for i in range(n):
+        t += rng.uniform(0.001, 0.05)
+        if i % 3 == 0:
+            msgs.append({"type": "frame", "data": {"timestamp": t, "frame": i // 3}})
+        else:
+            device, event = rng.choice([
+                ("LICK_CIRCUIT", "LICK"), ("LEVER_RH", "ACTIVE_PRESS"),
+                ("LEVER_LH", "INACTIVE_PRESS"), ("CUE", "ON"), ("PUMP", "INFUSION"),
+            ])
+            msgs.append({"type": "event", "data": {
+                "device": device, "event": event, "timestamp": t,
+                "start_timestamp": t - 0.012, "end_timestamp": t,
+            }})
+    return msgs
+
+
+def load_recording(path: Path) -> list[dict]:
+    msgs = []
+    with path.open() as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                msgs.append(json.loads(line))
+    return msgs
+
+
+def bench(c: codec.Codec, msgs: list[dict], repeat: int) -> tuple[int, float]:
+    frames = [c.encode(m) for m in msgs]
+    size = sum(len(f) for f in frames)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for f in frames:
+            c.decode(f)
+        best = min(best, time.perf_counter() - t0)
+    return size, best
+
+
+def bench_json_paths(msgs: list[dict], repeat: int) -> None:
+    # Frames arrive as UTF-8 bytes; the old path decoded them to str (inside
+    # websockets / httpx) and then called json.loads.
+    blobs = [json.dumps(m).encode() for m in msgs]
+    paths = [("utf-8 str + json.loads (before)", lambda b: json.loads(b.decode()), blobs),
+             ("stdlib fallback, bytes", codec.stdlib_loads, blobs)]
+    if codec.orjson is not None:
+        paths.append(("orjson, bytes", codec.orjson.loads, blobs))
+    print(f"\nJSON decode paths (cli.codec uses: {codec.JSON_BACKEND}, bytes)")
+    print(f"{'path':<34}{'msgs/s':>12}{'speedup':>10}")
+    baseline = None
+    for label, loads, frames in paths:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for f in frames:
+                loads(f)
+            best = min(best, time.perf_counter() - t0)
+        rate = len(frames) / best
+        baseline = baseline or rate
+        print(f"{label:<34}{rate:>12,.0f}{rate / baseline:>9.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", nargs="?", type=Path, help="NDJSON file of WS messages")
+    parser.add_argument("--messages", type=int, default=20000, help="synthetic message count")
+    parser.add_argument("--repeat", type=int, default=5, help="decode runs per codec (best is kept)")
+    args = parser.parse_args()
+
+    msgs = load_recording(args.recording) if args.recording else synthetic(args.messages)
+    if not msgs:
+        print("No messages to benchmark.", file=sys.stderr)
+        sys.exit(1)
+    source = args.recording or "synthetic burst"
+    print(f"{source}: {len(msgs)} messages\n")
+    print(f"{'codec':<9}{'bytes':>12}{'vs json':>10}{'decode µs/msg':>16}{'msgs/s':>12}")
+
+    results = {c.name: bench(c, msgs, args.repeat) for c in codec.CODECS.values()}
+    json_size = results["json"][0]
+    for name, (size, secs) in results.items():
+        ratio = f"{size / json_size:.2f}x"
+        print(f"{name:<9}{size:>12,}{ratio:>10}{secs / len(msgs) * 1e6:>16.2f}"
+              f"{len(msgs) / secs:>12,.0f}")
+    bench_json_paths(msgs, args.repeat)
+    missing = {"msgpack", "cbor"} - set(codec.CODECS)
+    if codec.orjson is None:
+        missing.add("orjson")
+    if missing:
+        print(f"\nNot installed: {', '.join(sorted(missing))} (pip install labrynth[cli-fast])")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Guard the import footprint of the CLI's one-shot subcommands.
+
+Usage:
+    python scripts/check-import-time.py                  # module check; time is advisory
+    python scripts/check-import-time.py --budget-ms 150  # also fail over 150 ms
+    python scripts/check-import-time.py --top 25         # list the 25 slowest imports
+
+``reacher-cli cmd <sid> 104`` and friends (``cli/commands.py``) should cost
+interpreter start plus one request, not the TUI's startup. This imports what
+such a call imports — ``cli.__main__``, ``cli.commands`` and ``cli.client`` —
+in a fresh interpreter and exits 1 when any of them pulls in a module the
+one-shot path must never load (prompt_toolkit, websockets, the menu code,
+presets, the headless runner), as listed in that interpreter's ``sys.modules``.
+That check does not depend on how fast the machine is, so it is the one CI
+relies on.
+
+Import time is measured under ``python -X importtime`` (best of ``--repeat``
+runs) and the slowest imports are listed, so a regression names its culprit.
+Shared CI runners are too noisy for a hard time limit: going over
+:data:`DEFAULT_BUDGET_MS` only prints a warning, unless ``--budget-ms`` is
+given. Interpreter start-up itself (``site``, encodings) is reported but not
+budgeted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ONE_SHOT_IMPORTS = "import cli.__main__, cli.commands, cli.client"
+
+# Modules the one-shot path must not import, directly or transitively.
+FORBIDDEN = ("prompt_toolkit", "websockets", "cli.app", "cli.presets", "cli.scheduler",
+             "cli.headless", "cli.firmware")
+
+# Advisory unless --budget-ms is passed; ~115 ms on a developer laptop.
+DEFAULT_BUDGET_MS = 150.0
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def loaded_modules() -> list[str]:
+    """``sys.modules`` of a fresh interpreter after the one-shot imports."""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{ONE_SHOT_IMPORTS}; import sys; print(*sys.modules, sep='\\n')"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import failed:\n{proc.stderr}")
+    return proc.stdout.split()
+
+
+def sample() -> dict[str, tuple[int, int, int]]:
+    """``{module: (self_us, cumulative_us, depth)}`` for one fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ONE_SHOT_IMPORTS],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import failed:\n{proc.stderr}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            modules[m.group(4)] = (int(m.group(1)), int(m.group(2)), depth)
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail when the cumulative import time exceeds this "
+                             f"(default: warn over {DEFAULT_BUDGET_MS:.0f} ms)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs (best is kept)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+    budget_ms = DEFAULT_BUDGET_MS if args.budget_ms is None else args.budget_ms
+
+    runs = [sample() for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda mods: sum(c for _s, c, d in mods.values() if d == 0))
+    top_level = {name: cum for name, (_s, cum, depth) in best.items() if depth == 0}
+    startup = sum(cum for name, cum in top_level.items()
+                  if name in ("site", "encodings") or name.startswith("_"))
+    ours = sum(cum for name, cum in top_level.items() if name.startswith("cli"))
+
+    print(f"one-shot imports: {ours / 1000:.1f} ms (budget {budget_ms:.0f} ms), "
+          f"interpreter start-up {startup / 1000:.1f} ms, best of {len(runs)}")
+    print(f"\n{'self ms':>9}{'cumul ms':>10}  module")
+    slowest = sorted(best.items(), key=lambda kv: kv[1][0], reverse=True)[: args.top]
+    for name, (self_us, cum, _depth) in slowest:
+        print(f"{self_us / 1000:>9.1f}{cum / 1000:>10.1f}  {name}")
+
+    failed = False
+    leaked = sorted(name for name in loaded_modules()
+                    if any(name == f or name.startswith(f + ".") for f in FORBIDDEN))
+    if leaked:
+        print(f"\nFAIL: one-shot path imports {', '.join(leaked)}", file=sys.stderr)
+        failed = True
+    if ours / 1000 > budget_ms:
+        if args.budget_ms is None:
+            print(f"\nwarning: {ours / 1000:.1f} ms exceeds the {budget_ms:.0f} ms budget "
+                  "(advisory; pass --budget-ms to enforce)", file=sys.stderr)
+        else:
+            print(f"\nFAIL: {ours / 1000:.1f} ms exceeds the {budget_ms:.0f} ms budget",
+                  file=sys.stderr)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
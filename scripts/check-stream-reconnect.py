@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Check that ``reacher-cli stream`` backs off when the backend keeps closing.
+
+Usage:
+    python scripts/check-stream-reconnect.py                # watch for 3.5 s
+    python scripts/check-stream-reconnect.py --seconds 8
+
+Runs a local WebSocket server that accepts every connection and closes it at
+once, points ``cli.stream.stream_events`` at it (REST calls are answered in
+process) and counts connections and missed-event recovery requests. With
+backoff of 1 s, 2 s, 4 s … between attempts there are only a handful of each;
+without it a clean close reconnects in a tight loop (hundreds per second).
+Exits 1 when more connections were opened than the backoff allows.
+
+Needs ``websockets`` (``pip install labrynth[cli]``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import math
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+from cli.client import ReacherClient  # noqa: E402
+from cli.stream import NdjsonSink, stream_events  # noqa: E402
+
+
+def allowed_connections(seconds: float) -> int:
+    """Connections a 1 s, 2 s, 4 s … backoff can open within *seconds*."""
+    return 1 + max(0, math.floor(math.log2(seconds + 1)))
+
+
+async def run(seconds: float) -> tuple[int, int]:
+    connections = 0
+    recoveries = 0
+
+    async def handler(ws):
+        nonlocal connections
+        connections += 1
+        await ws.close()
+
+    def rest(request: httpx.Request) -> httpx.Response:
+        nonlocal recoveries
+        # behavior_count asks for a one-event page; recovery pages are larger.
+        if request.url.params.get("limit", "1") != "1":
+            recoveries += 1
+        return httpx.Response(200, json={"data": [], "total": 0, "count": 0})
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        api = ReacherClient(base_url=f"http://127.0.0.1:{port}")
+        api._http = httpx.AsyncClient(base_url=api.base_url, transport=httpx.MockTransport(rest))
+        sink = NdjsonSink(io.BytesIO())
+        task = asyncio.ensure_future(stream_events(api, "check", sink))
+        await asyncio.sleep(seconds)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return connections, recoveries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.5)
+    args = parser.parse_args()
+
+    connections, recoveries = asyncio.run(run(args.seconds))
+    limit = allowed_connections(args.seconds)
+    if connections > limit:
+        print(f"FAIL: {connections} connections ({recoveries} recovery requests) in "
+              f"{args.seconds:g} s against a server that closes at once; backoff allows {limit}",
+              file=sys.stderr)
+        return 1
+    print(f"ok: {connections} connections, {recoveries} recovery requests in {args.seconds:g} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
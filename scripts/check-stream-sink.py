@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Check that ``reacher-cli stream``'s NDJSON sink keeps order under a slow reader.
+
+Usage:
+    python scripts/check-stream-sink.py                 # 300 lines, 20 ms per write
+    python scripts/check-stream-sink.py --lines 2000 --write-ms 5
+
+``cli.stream.NdjsonSink`` promises that batches reach stdout one write at a
+time and in order, and that ``aclose()`` returns only once everything has been
+written. This feeds it through a deliberately slow writer while both
+``write()`` (small ``--batch-bytes``) and the flush ticker trigger flushes,
+then exits 1 when
+
+  - two writes were ever in flight at once,
+  - lines came out of order, or
+  - any line was missing when ``aclose()`` returned.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cli.stream import NdjsonSink  # noqa: E402
+
+
+class SlowOut:
+    """A binary file whose writes take *delay* seconds and record overlap."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.data = bytearray()
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def write(self, batch: bytes) -> None:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.data += batch
+            self.active -= 1
+
+    def flush(self) -> None:
+        pass
+
+
+async def run(lines: int, delay: float) -> SlowOut:
+    out = SlowOut(delay)
+    sink = NdjsonSink(out, batch_bytes=64, flush_interval=0.001)
+    for i in range(lines):
+        await sink.write({"n": i})
+        if i % 7 == 0:
+            await asyncio.sleep(0)  # let the ticker in between writes
+    await sink.aclose()
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument("--write-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    out = asyncio.run(run(args.lines, args.write_ms / 1000))
+    got = [json.loads(line)["n"] for line in out.data.splitlines()]
+    problems = []
+    if out.peak > 1:
+        problems.append(f"{out.peak} writes were in flight at once")
+    if got != sorted(got):
+        problems.append("lines were written out of order")
+    if len(got) != args.lines:
+        problems.append(f"{len(got)} of {args.lines} lines written when aclose() returned")
+    for p in problems:
+        print(f"FAIL: {p}", file=sys.stderr)
+    if not problems:
+        print(f"ok: {args.lines} lines, in order, one write at a time")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())